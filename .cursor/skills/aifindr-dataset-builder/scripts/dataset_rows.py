@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+"""
+Pure helpers over Weave dataset rows (no weave or openai import).
+
+Used by upload_query.py, and by the evaluator's benchmark.py, which times
+get_next_id without the dataset builder's dependencies installed.
+
+Usage:
+    from dataset_rows import get_next_id, scan_rows
+    max_id, count = scan_rows(dataset.rows)
+"""
+
+
+def get_next_id(existing_rows: list) -> int:
+    """Get the next available ID from existing rows."""
+    return scan_rows(existing_rows)[0] + 1
+
+
+def scan_rows(rows) -> tuple[int, int]:
+    """Single pass over dataset rows. Returns (max meta.id, row count)."""
+    max_id = 0
+    count = 0
+    for row in rows:
+        count += 1
+        meta_id = row.get('meta.id', 0)
+        if isinstance(meta_id, int) and meta_id > max_id:
+            max_id = meta_id
+        elif isinstance(meta_id, str) and meta_id.isdigit():
+            max_id = max(max_id, int(meta_id))
+    return max_id, count
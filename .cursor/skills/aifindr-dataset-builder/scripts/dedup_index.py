@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Near-duplicate index over dataset queries.
+
+Each query is reduced to character 3-gram shingles (accents, case and
+punctuation removed) and a MinHash signature. Signatures are split into LSH
+bands, so a lookup only compares against rows that share a band bucket and
+stays sublinear as the dataset grows; candidates are then confirmed with the
+exact Jaccard similarity of their shingles.
+
+Signatures are stored per dataset in a local SQLite file together with the
+dataset digest they were built from. upload_query.py (--dedup) reuses them
+while the digest is unchanged and rebuilds them from the dataset otherwise.
+
+Usage:
+    # Check queries against an index built by upload_query.py
+    python dedup_index.py check --dataset entity/project/dataset_feedback_variants \
+        --query "¿Cuántos sueldos cubre el Vida Ley?"
+
+    # Find near-duplicate pairs within a CSV/JSONL file (query column)
+    python dedup_index.py scan --input queries.csv --threshold 0.8
+
+    python dedup_index.py stats --index .dedup_index.sqlite
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import re
+import sqlite3
+from array import array
+from contextlib import closing
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+from text_terms import fold
+
+
+DEFAULT_INDEX_PATH = ".dedup_index.sqlite"
+DEFAULT_THRESHOLD = 0.8
+SHINGLE_SIZE = 3
+BANDS = 20
+BAND_ROWS = 5
+NUM_PERM = BANDS * BAND_ROWS
+
+_EMPTY = bytes(4 * NUM_PERM)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS datasets (
+    dataset TEXT PRIMARY KEY,
+    digest TEXT,
+    updated_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS rows (
+    dataset TEXT NOT NULL,
+    row_id INTEGER,
+    query TEXT NOT NULL,
+    signature BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_rows_dataset ON rows (dataset);
+"""
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase, strip accents and punctuation, collapse whitespace."""
+    return " ".join(re.sub(r"[^\w\s]", " ", fold(text)).split())
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> set[str]:
+    """Character n-grams of the normalized text (padded so word edges count)."""
+    text = f" {normalize_text(text)} "
+    return {text[i:i + size] for i in range(max(1, len(text) - size + 1))}
+
+
+def jaccard(a: set, b: set) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+def minhash(shingle_set: set[str]) -> array:
+    """
+    MinHash signature (NUM_PERM 32-bit values) of a shingle set.
+
+    Each shingle is hashed once into NUM_PERM independent values with
+    SHAKE-128; the signature is their column-wise minimum.
+    """
+    hashed = [array("I", hashlib.shake_128(s.encode("utf-8")).digest(4 * NUM_PERM)) for s in shingle_set]
+    return array("I", map(min, zip(*hashed))) if hashed else array("I", _EMPTY)
+
+
+class DedupIndex:
+    """
+    MinHash/LSH index of one dataset's queries.
+
+    Args:
+        path: SQLite file holding the signatures (None keeps the index in memory only)
+        dataset: Key of the dataset in the file (e.g. entity/project/dataset)
+        threshold: Jaccard similarity at or above which two queries are near-duplicates
+    """
+
+    def __init__(self, path: Optional[str] = DEFAULT_INDEX_PATH, dataset: str = "", threshold: float = DEFAULT_THRESHOLD):
+        self.path = path
+        self.dataset = dataset
+        self.threshold = threshold
+        self.digest = None
+        self._row_ids: list = []
+        self._queries: list[str] = []
+        self._signatures: list[array] = []
+        self._buckets: dict[tuple, list[int]] = {}
+        self._shingles: dict[int, set[str]] = {}
+        self._saved = 0
+        if path:
+            self._load()
+
+    def __len__(self) -> int:
+        return len(self._queries)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path)
+        conn.executescript(_SCHEMA)
+        return conn
+
+    def _load(self) -> None:
+        with closing(self._connect()) as conn:
+            meta = conn.execute("SELECT digest FROM datasets WHERE dataset = ?", (self.dataset,)).fetchone()
+            if meta is None:
+                return
+            self.digest = meta[0]
+            for row_id, query, blob in conn.execute(
+                "SELECT row_id, query, signature FROM rows WHERE dataset = ? ORDER BY rowid", (self.dataset,)
+            ):
+                signature = array("I")
+                signature.frombytes(blob)
+                self._insert(row_id, query, signature)
+        self._saved = len(self._queries)
+
+    def _insert(self, row_id, query: str, signature: array) -> None:
+        position = len(self._queries)
+        self._row_ids.append(row_id)
+        self._queries.append(query)
+        self._signatures.append(signature)
+        for band in range(BANDS):
+            key = (band, tuple(signature[band * BAND_ROWS:(band + 1) * BAND_ROWS]))
+            self._buckets.setdefault(key, []).append(position)
+
+    def reset(self) -> None:
+        """Drop every indexed query (the stored copy is replaced on the next save)."""
+        self._row_ids, self._queries, self._signatures = [], [], []
+        self._buckets, self._shingles = {}, {}
+        self.digest = None
+        self._saved = -1
+
+    def add(self, query: str, row_id=None) -> None:
+        """Index a query (kept in memory until save)."""
+        self._insert(row_id, query, minhash(shingles(query)))
+
+    def ingest(self, rows: Iterable[dict]) -> Iterator[dict]:
+        """Index the query of each dataset row while passing the rows through."""
+        for row in rows:
+            query = row.get("query")
+            if query:
+                self.add(query, row.get("meta.id"))
+            yield row
+
+    def find(self, query: str, threshold: Optional[float] = None, limit: int = 5) -> list[dict]:
+        """
+        Indexed queries similar to query, most similar first.
+
+        Returns:
+            List of {"row_id", "query", "similarity"} at or above the threshold
+        """
+        threshold = self.threshold if threshold is None else threshold
+        query_shingles = shingles(query)
+        signature = minhash(query_shingles)
+
+        candidates = set()
+        for band in range(BANDS):
+            key = (band, tuple(signature[band * BAND_ROWS:(band + 1) * BAND_ROWS]))
+            candidates.update(self._buckets.get(key, ()))
+
+        matches = []
+        for position in candidates:
+            if position not in self._shingles:
+                self._shingles[position] = shingles(self._queries[position])
+            similarity = jaccard(query_shingles, self._shingles[position])
+            if similarity >= threshold:
+                matches.append({
+                    "row_id": self._row_ids[position],
+                    "query": self._queries[position],
+                    "similarity": round(similarity, 4),
+                })
+        matches.sort(key=lambda m: -m["similarity"])
+        return matches[:limit]
+
+    def save(self, digest: Optional[str] = None) -> None:
+        """Persist queries added since the last save and the dataset digest they match."""
+        self.digest = digest
+        if not self.path:
+            return
+        start = max(self._saved, 0)
+        with closing(self._connect()) as conn:
+            if self._saved < 0:
+                conn.execute("DELETE FROM rows WHERE dataset = ?", (self.dataset,))
+            conn.executemany(
+                "INSERT INTO rows (dataset, row_id, query, signature) VALUES (?, ?, ?, ?)",
+                [
+                    (self.dataset, self._row_ids[i], self._queries[i], self._signatures[i].tobytes())
+                    for i in range(start, len(self._queries))
+                ]
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO datasets (dataset, digest, updated_at) VALUES (?, ?, ?)",
+                (self.dataset, digest, datetime.now().isoformat(timespec="seconds"))
+            )
+            conn.commit()
+        self._saved = len(self._queries)
+
+
+def index_stats(path: str) -> list[dict]:
+    """Indexed row count and digest per dataset in an index file."""
+    with closing(sqlite3.connect(path)) as conn:
+        conn.executescript(_SCHEMA)
+        return [
+            {"dataset": dataset, "rows": rows, "digest": digest, "updated_at": updated_at}
+            for dataset, digest, updated_at, rows in conn.execute(
+                "SELECT d.dataset, d.digest, d.updated_at, COUNT(r.rowid) FROM datasets d "
+                "LEFT JOIN rows r ON r.dataset = d.dataset GROUP BY d.dataset ORDER BY d.dataset"
+            )
+        ]
+
+
+def load_queries(path: str) -> list[str]:
+    """Queries from a CSV (query column) or JSONL file."""
+    if Path(path).suffix.lower() == ".csv":
+        with open(path, "r", encoding="utf-8-sig", newline="") as f:
+            records = list(csv.DictReader(f))
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            records = [json.loads(line) for line in f if line.strip()]
+    return [(record.get("query") or "").strip() for record in records if (record.get("query") or "").strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Near-duplicate detection for dataset queries")
+    parser.add_argument("command", choices=["check", "scan", "stats"])
+    parser.add_argument("--index", default=DEFAULT_INDEX_PATH, help=f"Index file (default: {DEFAULT_INDEX_PATH})")
+    parser.add_argument("--dataset", help="check: dataset key in the index (entity/project/dataset)")
+    parser.add_argument("--query", "-q", action="append", default=[], help="check: query to look up (repeatable)")
+    parser.add_argument("--input", "-i", help="scan: CSV/JSONL file with a query column")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help=f"Jaccard similarity of character 3-grams (default: {DEFAULT_THRESHOLD})")
+    args = parser.parse_args()
+
+    if args.command == "stats":
+        print(json.dumps(index_stats(args.index), ensure_ascii=False, indent=2))
+        return 0
+
+    if args.command == "check":
+        if not args.dataset or not args.query:
+            parser.error("check needs --dataset and --query")
+        index = DedupIndex(args.index, args.dataset, args.threshold)
+        print(f"{len(index)} indexed queries")
+        found = 0
+        for query in args.query:
+            matches = index.find(query)
+            found += bool(matches)
+            print(f"\n{query}")
+            for match in matches:
+                print(f"  {match['similarity']:.2f}  [ID {match['row_id']}] {match['query']}")
+            if not matches:
+                print("  no near-duplicates")
+        return 1 if found else 0
+
+    if not args.input:
+        parser.error("scan needs --input")
+    index = DedupIndex(None, threshold=args.threshold)
+    pairs = 0
+    for line_no, query in enumerate(load_queries(args.input), 1):
+        for match in index.find(query):
+            pairs += 1
+            print(f"{match['similarity']:.2f}  #{line_no} {query}  ~  #{match['row_id']} {match['query']}")
+        index.add(query, line_no)
+    print(f"\n{pairs} near-duplicate pairs in {len(index)} queries")
+    return 1 if pairs else 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,452 @@
+#!/usr/bin/env python3
+"""
+BM25 search over a knowledge-base directory.
+
+Documents are split into passages of about --chunk-words words and stored,
+together with an inverted index of their terms, in a local SQLite file. The
+index is refreshed incrementally: files whose size and mtime are unchanged are
+skipped, touched files are re-hashed and only re-chunked if their content
+changed, and deleted files are dropped. Searching returns the top-k passages
+with their file and page, so the expected answer can be read from the passage
+instead of the whole document.
+
+Supported files: .txt, .md, .csv, .tsv, .json, .html, .docx, .xlsx (openpyxl)
+and .pdf (pypdf).
+
+Usage:
+    python kb_index.py search --kb /path/to/knowledge-base \
+        --query "¿Cuántos sueldos cubre el Vida Ley?" --top-k 5
+
+    # Refresh the index only (first run chunks every file)
+    python kb_index.py build --kb /path/to/knowledge-base
+
+    python kb_index.py stats
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import re
+import sqlite3
+import time
+import zipfile
+from collections import Counter
+from contextlib import closing
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Optional
+from xml.etree import ElementTree
+
+try:
+    from pypdf import PdfReader
+    HAS_PYPDF = True
+except ImportError:
+    HAS_PYPDF = False
+
+try:
+    from openpyxl import load_workbook
+    HAS_OPENPYXL = True
+except ImportError:
+    HAS_OPENPYXL = False
+
+from text_terms import STOPWORDS, fold, stem
+
+
+DEFAULT_INDEX_PATH = ".kb_index.sqlite"
+DEFAULT_CHUNK_WORDS = 150
+DEFAULT_OVERLAP_WORDS = 30
+DEFAULT_TOP_K = 5
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+TEXT_SUFFIXES = {".txt", ".md", ".markdown", ".csv", ".tsv", ".json", ".yaml", ".yml"}
+HTML_SUFFIXES = {".html", ".htm"}
+SUPPORTED_SUFFIXES = TEXT_SUFFIXES | HTML_SUFFIXES | {".docx", ".xlsx", ".pdf"}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    sha256 TEXT NOT NULL,
+    chunks INTEGER NOT NULL,
+    indexed_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS chunks (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL,
+    ordinal INTEGER NOT NULL,
+    page INTEGER,
+    length INTEGER NOT NULL,
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_chunks_path ON chunks (path);
+CREATE TABLE IF NOT EXISTS postings (
+    term TEXT NOT NULL,
+    chunk_id INTEGER NOT NULL,
+    tf INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_postings_term ON postings (term);
+CREATE INDEX IF NOT EXISTS idx_postings_chunk ON postings (chunk_id);
+"""
+
+
+def tokenize(text: str) -> list[str]:
+    """Accent- and case-insensitive terms of a text, without stopwords."""
+    return [stem(t) for t in re.findall(r"\w+", fold(text)) if t not in STOPWORDS and (len(t) > 1 or t.isdigit())]
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class _HTMLText(HTMLParser):
+    def __init__(self):
+        super().__init__()
+        self.parts = []
+        self._skip = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in ("script", "style"):
+            self._skip += 1
+        elif tag in ("p", "div", "br", "li", "tr", "h1", "h2", "h3", "h4", "h5", "h6"):
+            self.parts.append("\n\n")
+
+    def handle_endtag(self, tag):
+        if tag in ("script", "style") and self._skip:
+            self._skip -= 1
+
+    def handle_data(self, data):
+        if not self._skip:
+            self.parts.append(data)
+
+
+def extract_pages(path: Path) -> list[tuple[Optional[int], str]]:
+    """
+    Text of a document as (page, text) sections.
+
+    Page is the PDF page or XLSX sheet number, None for single-section files.
+    Raises ImportError when the optional reader for the format is missing.
+    """
+    suffix = path.suffix.lower()
+    if suffix in TEXT_SUFFIXES:
+        return [(None, path.read_text(encoding="utf-8", errors="replace"))]
+
+    if suffix in HTML_SUFFIXES:
+        parser = _HTMLText()
+        parser.feed(path.read_text(encoding="utf-8", errors="replace"))
+        return [(None, "".join(parser.parts))]
+
+    if suffix == ".docx":
+        ns = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+        with zipfile.ZipFile(path) as docx:
+            root = ElementTree.fromstring(docx.read("word/document.xml"))
+        paragraphs = ["".join(t.text or "" for t in p.iter(f"{ns}t")) for p in root.iter(f"{ns}p")]
+        return [(None, "\n\n".join(p for p in paragraphs if p.strip()))]
+
+    if suffix == ".xlsx":
+        if not HAS_OPENPYXL:
+            raise ImportError("openpyxl is required for .xlsx files. Install with: pip install openpyxl")
+        workbook = load_workbook(path, read_only=True, data_only=True)
+        try:
+            return [
+                (number, "\n\n".join(
+                    " | ".join(str(v) for v in row if v not in (None, ""))
+                    for row in sheet.iter_rows(values_only=True)
+                ))
+                for number, sheet in enumerate(workbook.worksheets, 1)
+            ]
+        finally:
+            workbook.close()
+
+    if suffix == ".pdf":
+        if not HAS_PYPDF:
+            raise ImportError("pypdf is required for .pdf files. Install with: pip install pypdf")
+        return [(number, page.extract_text() or "") for number, page in enumerate(PdfReader(path).pages, 1)]
+
+    raise ValueError(f"Unsupported file type: {path.suffix}")
+
+
+def chunk_text(
+    text: str,
+    chunk_words: int = DEFAULT_CHUNK_WORDS,
+    overlap_words: int = DEFAULT_OVERLAP_WORDS
+) -> list[str]:
+    """
+    Split text into passages of about chunk_words words.
+
+    Paragraphs (blank-line separated) are kept together where they fit;
+    longer paragraphs are split into overlapping windows.
+    """
+    chunks, current = [], []
+    for paragraph in re.split(r"\n\s*\n", text):
+        words = paragraph.split()
+        if not words:
+            continue
+        if current and len(current) + len(words) > chunk_words:
+            chunks.append(" ".join(current))
+            current = []
+        if len(words) <= chunk_words:
+            current.extend(words)
+            continue
+        step = max(1, chunk_words - overlap_words)
+        for start in range(0, len(words), step):
+            window = words[start:start + chunk_words]
+            if start and len(window) <= overlap_words:
+                break
+            chunks.append(" ".join(window))
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+
+class KnowledgeBaseIndex:
+    """
+    Persistent BM25 index of a knowledge-base directory.
+
+    Args:
+        kb_path: Knowledge-base root directory
+        index_path: SQLite file holding chunks and postings
+        chunk_words: Target passage length in words
+        overlap_words: Overlap between windows of long paragraphs
+    """
+
+    def __init__(
+        self,
+        kb_path: str,
+        index_path: str = DEFAULT_INDEX_PATH,
+        chunk_words: int = DEFAULT_CHUNK_WORDS,
+        overlap_words: int = DEFAULT_OVERLAP_WORDS
+    ):
+        self.root = Path(kb_path).resolve()
+        self.index_path = index_path
+        self.chunk_words = chunk_words
+        self.overlap_words = overlap_words
+        self.conn = sqlite3.connect(index_path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(_SCHEMA)
+        self._check_settings()
+
+    def __enter__(self) -> "KnowledgeBaseIndex":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def _check_settings(self) -> None:
+        """Drop the index when it was built for another root or chunking."""
+        settings = json.dumps({"root": str(self.root), "chunk_words": self.chunk_words,
+                               "overlap_words": self.overlap_words})
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'settings'").fetchone()
+        if row and row[0] == settings:
+            return
+        with self.conn:
+            if row:
+                print("Index was built for another knowledge base or chunk size; rebuilding")
+            self.conn.execute("DELETE FROM postings")
+            self.conn.execute("DELETE FROM chunks")
+            self.conn.execute("DELETE FROM files")
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('settings', ?)", (settings,))
+
+    def _files(self) -> dict[str, Path]:
+        return {
+            path.relative_to(self.root).as_posix(): path
+            for path in sorted(self.root.rglob("*"))
+            if path.is_file() and path.suffix.lower() in SUPPORTED_SUFFIXES
+            and not any(part.startswith(".") for part in path.relative_to(self.root).parts)
+        }
+
+    def _remove(self, rel_path: str) -> None:
+        self.conn.execute(
+            "DELETE FROM postings WHERE chunk_id IN (SELECT id FROM chunks WHERE path = ?)", (rel_path,)
+        )
+        self.conn.execute("DELETE FROM chunks WHERE path = ?", (rel_path,))
+        self.conn.execute("DELETE FROM files WHERE path = ?", (rel_path,))
+
+    def _add(self, rel_path: str, path: Path, stat, sha256: str) -> int:
+        ordinal = 0
+        for page, text in extract_pages(path):
+            for passage in chunk_text(text, self.chunk_words, self.overlap_words):
+                terms = tokenize(passage)
+                if not terms:
+                    continue
+                chunk_id = self.conn.execute(
+                    "INSERT INTO chunks (path, ordinal, page, length, text) VALUES (?, ?, ?, ?, ?)",
+                    (rel_path, ordinal, page, len(terms), passage)
+                ).lastrowid
+                self.conn.executemany(
+                    "INSERT INTO postings (term, chunk_id, tf) VALUES (?, ?, ?)",
+                    [(term, chunk_id, tf) for term, tf in Counter(terms).items()]
+                )
+                ordinal += 1
+        self.conn.execute(
+            "INSERT INTO files (path, size, mtime, sha256, chunks, indexed_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (rel_path, stat.st_size, stat.st_mtime, sha256, ordinal, time.time())
+        )
+        return ordinal
+
+    def refresh(self, verbose: bool = True) -> dict:
+        """
+        Bring the index up to date with the knowledge-base directory.
+
+        Returns:
+            Counts of added, updated, unchanged, removed and skipped files
+        """
+        known = {
+            path: (size, mtime, sha256)
+            for path, size, mtime, sha256 in self.conn.execute("SELECT path, size, mtime, sha256 FROM files")
+        }
+        files = self._files()
+        counts = {"added": 0, "updated": 0, "unchanged": 0, "removed": 0, "skipped": 0}
+
+        for rel_path in sorted(set(known) - set(files)):
+            with self.conn:
+                self._remove(rel_path)
+            counts["removed"] += 1
+
+        for rel_path, path in files.items():
+            stat = path.stat()
+            previous = known.get(rel_path)
+            if previous and previous[0] == stat.st_size and previous[1] == stat.st_mtime:
+                counts["unchanged"] += 1
+                continue
+
+            sha256 = file_sha256(path)
+            if previous and previous[2] == sha256:
+                with self.conn:
+                    self.conn.execute("UPDATE files SET size = ?, mtime = ? WHERE path = ?",
+                                      (stat.st_size, stat.st_mtime, rel_path))
+                counts["unchanged"] += 1
+                continue
+
+            try:
+                with self.conn:
+                    if previous:
+                        self._remove(rel_path)
+                    chunks = self._add(rel_path, path, stat, sha256)
+            except (ImportError, ValueError, OSError, zipfile.BadZipFile, ElementTree.ParseError) as e:
+                print(f"  Skipping {rel_path}: {e}")
+                counts["skipped"] += 1
+                continue
+            counts["updated" if previous else "added"] += 1
+            if verbose:
+                print(f"  {'Updated' if previous else 'Indexed'} {rel_path} ({chunks} passages)")
+
+        return counts
+
+    def search(self, query: str, top_k: int = DEFAULT_TOP_K) -> list[dict]:
+        """
+        Top-k passages for a query by BM25 score.
+
+        Returns:
+            List of {"score", "path", "page", "ordinal", "text"}, best first
+        """
+        terms = Counter(tokenize(query))
+        if not terms:
+            return []
+        total, avg_length = self.conn.execute("SELECT COUNT(*), AVG(length) FROM chunks").fetchone()
+        if not total:
+            return []
+
+        postings = self.conn.execute(
+            f"SELECT p.term, p.chunk_id, p.tf, c.length FROM postings p JOIN chunks c ON c.id = p.chunk_id "
+            f"WHERE p.term IN ({','.join('?' * len(terms))})",
+            list(terms)
+        ).fetchall()
+        doc_freq = Counter(term for term, _, _, _ in postings)
+
+        scores = Counter()
+        for term, chunk_id, tf, length in postings:
+            idf = math.log(1 + (total - doc_freq[term] + 0.5) / (doc_freq[term] + 0.5))
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * length / avg_length)
+            scores[chunk_id] += terms[term] * idf * tf * (BM25_K1 + 1) / (tf + norm)
+
+        results = []
+        for chunk_id, score in scores.most_common(top_k):
+            path, ordinal, page, text = self.conn.execute(
+                "SELECT path, ordinal, page, text FROM chunks WHERE id = ?", (chunk_id,)
+            ).fetchone()
+            results.append({"score": round(score, 4), "path": path, "page": page, "ordinal": ordinal, "text": text})
+        return results
+
+    def stats(self) -> dict:
+        files, chunks = self.conn.execute(
+            "SELECT (SELECT COUNT(*) FROM files), (SELECT COUNT(*) FROM chunks)"
+        ).fetchone()
+        terms = self.conn.execute("SELECT COUNT(DISTINCT term) FROM postings").fetchone()[0]
+        return {"root": str(self.root), "index": self.index_path, "files": files, "passages": chunks, "terms": terms}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="BM25 passage search over a knowledge base")
+    parser.add_argument("command", choices=["search", "build", "stats"])
+    parser.add_argument("--kb", help="Knowledge-base directory (search/build)")
+    parser.add_argument("--index", default=DEFAULT_INDEX_PATH, help=f"Index file (default: {DEFAULT_INDEX_PATH})")
+    parser.add_argument("--query", "-q", action="append", default=[], help="search: query (repeatable)")
+    parser.add_argument("--top-k", "-k", type=int, default=DEFAULT_TOP_K,
+                        help=f"search: passages per query (default: {DEFAULT_TOP_K})")
+    parser.add_argument("--no-refresh", action="store_true", help="search: skip the incremental refresh")
+    parser.add_argument("--json", action="store_true", help="search: print results as JSON")
+    parser.add_argument("--chunk-words", type=int, default=DEFAULT_CHUNK_WORDS,
+                        help=f"Passage length in words (default: {DEFAULT_CHUNK_WORDS})")
+    parser.add_argument("--overlap-words", type=int, default=DEFAULT_OVERLAP_WORDS,
+                        help=f"Overlap between windows of long paragraphs (default: {DEFAULT_OVERLAP_WORDS})")
+    args = parser.parse_args()
+
+    if args.command == "stats":
+        with closing(sqlite3.connect(args.index)) as conn:
+            conn.executescript(_SCHEMA)
+            row = conn.execute("SELECT value FROM meta WHERE key = 'settings'").fetchone()
+        if not row:
+            parser.error(f"No index at {args.index}")
+        settings = json.loads(row[0])
+        with KnowledgeBaseIndex(settings["root"], args.index, settings["chunk_words"], settings["overlap_words"]) as index:
+            print(json.dumps(index.stats(), ensure_ascii=False, indent=2))
+        return 0
+
+    if not args.kb:
+        parser.error(f"{args.command} needs --kb")
+    if not Path(args.kb).is_dir():
+        parser.error(f"Knowledge base not found: {args.kb}")
+    if args.command == "search" and not args.query:
+        parser.error("search needs --query")
+
+    with KnowledgeBaseIndex(args.kb, args.index, args.chunk_words, args.overlap_words) as index:
+        if args.command == "build" or not args.no_refresh:
+            start = time.perf_counter()
+            counts = index.refresh(verbose=args.command == "build")
+            if args.command == "build" or any(counts[k] for k in ("added", "updated", "removed")):
+                print(f"Index refreshed in {time.perf_counter() - start:.2f}s: "
+                      + ", ".join(f"{n} {k}" for k, n in counts.items()))
+        if args.command == "build":
+            return 0
+
+        output = []
+        for query in args.query:
+            start = time.perf_counter()
+            results = index.search(query, args.top_k)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            output.append({"query": query, "elapsed_ms": round(elapsed_ms, 2), "results": results})
+            if args.json:
+                continue
+            print(f"\n{query}  ({len(results)} passages, {elapsed_ms:.1f} ms)")
+            for rank, result in enumerate(results, 1):
+                location = result["path"] + (f" p.{result['page']}" if result["page"] else "")
+                print(f"\n[{rank}] {result['score']:.2f}  {location}")
+                print(f"    {result['text']}")
+        if args.json:
+            print(json.dumps(output if len(output) > 1 else output[0], ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
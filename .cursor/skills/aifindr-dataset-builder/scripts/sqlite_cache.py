@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+SQLite cache of JSON payloads with TTL and least-recently-used eviction.
+
+Base of variant_cache.py (generated query variants) and of the evaluator's
+response_cache.py (agent responses). A subclass names its table, payload
+column and descriptive columns, and builds keys with content_key(); storage,
+expiry, eviction, stats and the stats|evict|clear CLI live here.
+
+Usage:
+    class VariantCache(SQLiteCache):
+        TABLE = "variants"
+        COLUMNS = (("query", "TEXT"), ("model", "TEXT"))
+        GROUP_BY = ("by_model", ("model",))
+
+    cache = VariantCache(".variant_cache.sqlite", max_entries=50_000)
+    cache.put_payload(content_key(query, model), ["a", "b"], query=query, model=model)
+"""
+
+import argparse
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import unicodedata
+from typing import Any, Callable, Optional
+
+
+def normalize_query(query: str) -> str:
+    """Normalize a query for cache lookups (Unicode NFC, case, whitespace)."""
+    return " ".join(unicodedata.normalize("NFC", query).casefold().split())
+
+
+def content_key(*parts: Any) -> str:
+    """SHA-256 content address of JSON-serializable key parts."""
+    raw = json.dumps(list(parts), ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class SQLiteCache:
+    """
+    One SQLite table of JSON payloads, safe to share between worker threads.
+
+    Subclasses set TABLE, PAYLOAD_COLUMN, COLUMNS ((name, SQL type) of the
+    descriptive columns stored next to each payload) and GROUP_BY (stats
+    key and the columns entries are counted by).
+
+    Args:
+        path: SQLite file (created if missing)
+        ttl_s: Entries older than this many seconds are ignored and evicted
+        max_entries: Keep at most this many entries (least recently used
+            entries are evicted first)
+    """
+
+    TABLE = "entries"
+    PAYLOAD_COLUMN = "payload"
+    COLUMNS: tuple = ()
+    GROUP_BY: Optional[tuple] = None
+
+    def __init__(self, path: str, ttl_s: Optional[float] = None, max_entries: Optional[int] = None):
+        self.path = path
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(self._schema())
+
+    def _schema(self) -> str:
+        columns = "".join(f"    {name} {kind} NOT NULL,\n" for name, kind in self.COLUMNS)
+        return (
+            f"CREATE TABLE IF NOT EXISTS {self.TABLE} (\n"
+            f"    key TEXT PRIMARY KEY,\n{columns}"
+            f"    {self.PAYLOAD_COLUMN} TEXT NOT NULL,\n"
+            f"    created_at REAL NOT NULL,\n"
+            f"    accessed_at REAL NOT NULL\n);\n"
+            f"CREATE INDEX IF NOT EXISTS idx_{self.TABLE}_accessed ON {self.TABLE} (accessed_at);\n"
+            f"CREATE INDEX IF NOT EXISTS idx_{self.TABLE}_created ON {self.TABLE} (created_at);\n"
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def get_payload(self, key: str) -> Any:
+        """The cached payload, or None on a miss or expired entry."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {self.PAYLOAD_COLUMN}, created_at FROM {self.TABLE} WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            payload, created_at = row
+            if self.ttl_s is not None and now - created_at > self.ttl_s:
+                self._conn.execute(f"DELETE FROM {self.TABLE} WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute(f"UPDATE {self.TABLE} SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+        return json.loads(payload)
+
+    def put_payload(self, key: str, payload: Any, **columns: Any) -> None:
+        """Store (or replace) a payload with its COLUMNS values, then apply size-based eviction."""
+        names = [name for name, _ in self.COLUMNS]
+        now = time.time()
+        values = [key] + [columns[name] for name in names] + [json.dumps(payload, ensure_ascii=False), now, now]
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.TABLE} "
+                f"(key, {''.join(f'{name}, ' for name in names)}{self.PAYLOAD_COLUMN}, created_at, accessed_at) "
+                f"VALUES ({', '.join('?' * len(values))})",
+                values
+            )
+            self._evict_locked(expired=False)
+            self._conn.commit()
+
+    def evict(self) -> int:
+        """Drop expired entries and trim to max_entries. Returns rows removed."""
+        with self._lock:
+            removed = self._evict_locked(expired=True)
+            self._conn.commit()
+        return removed
+
+    def clear(self) -> int:
+        """Remove every entry. Returns rows removed."""
+        with self._lock:
+            removed = self._conn.execute(f"DELETE FROM {self.TABLE}").rowcount
+            self._conn.commit()
+        return removed
+
+    def stats(self) -> dict:
+        """Entry count, age range and entries per GROUP_BY columns."""
+        with self._lock:
+            count, oldest, newest = self._conn.execute(
+                f"SELECT COUNT(*), MIN(created_at), MAX(created_at) FROM {self.TABLE}"
+            ).fetchone()
+            groups = None
+            if self.GROUP_BY:
+                columns = ", ".join(self.GROUP_BY[1])
+                groups = self._conn.execute(
+                    f"SELECT {columns}, COUNT(*) FROM {self.TABLE} GROUP BY {columns} ORDER BY {columns}"
+                ).fetchall()
+        stats = {"path": self.path, "entries": count, "oldest": _format_ts(oldest), "newest": _format_ts(newest)}
+        if self.GROUP_BY:
+            stats[self.GROUP_BY[0]] = [
+                {**dict(zip(self.GROUP_BY[1], row[:-1])), "entries": row[-1]} for row in groups
+            ]
+        return stats
+
+    def _evict_locked(self, expired: bool) -> int:
+        removed = 0
+        if expired and self.ttl_s is not None:
+            removed += self._conn.execute(
+                f"DELETE FROM {self.TABLE} WHERE created_at < ?", (time.time() - self.ttl_s,)
+            ).rowcount
+        if self.max_entries is not None:
+            removed += self._conn.execute(
+                f"DELETE FROM {self.TABLE} WHERE key IN ("
+                f"SELECT key FROM {self.TABLE} ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            ).rowcount
+        return removed
+
+
+def _format_ts(ts: Optional[float]) -> Optional[str]:
+    return time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(ts)) if ts else None
+
+
+def cache_cli(
+    open_cache: Callable[..., SQLiteCache],
+    description: str,
+    default_path: str,
+    default_max_entries: Optional[int] = None
+) -> None:
+    """
+    stats|evict|clear command line for a cache.
+
+    Args:
+        open_cache: Called as open_cache(path, ttl_s=..., max_entries=...)
+        description: argparse description
+        default_path: Default --cache file
+        default_max_entries: Default --max-entries (None: unbounded)
+    """
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("command", choices=["stats", "evict", "clear"])
+    parser.add_argument("--cache", default=default_path, help=f"Cache file (default: {default_path})")
+    parser.add_argument("--ttl-hours", type=float, help="Evict entries older than this")
+    parser.add_argument("--max-entries", type=int, default=default_max_entries,
+                        help="Keep at most this many entries"
+                        + (f" (default: {default_max_entries})" if default_max_entries else ""))
+    args = parser.parse_args()
+
+    ttl_s = args.ttl_hours * 3600 if args.ttl_hours is not None else None
+    with open_cache(args.cache, ttl_s=ttl_s, max_entries=args.max_entries) as cache:
+        if args.command == "stats":
+            print(json.dumps(cache.stats(), ensure_ascii=False, indent=2))
+        elif args.command == "evict":
+            print(f"Evicted {cache.evict()} entries")
+        else:
+            print(f"Removed {cache.clear()} entries")
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the OpenAI chat client, for offline variant generation.
+
+StubOpenAI answers chat.completions.create() the way the variant prompts ask
+(a JSON array of 3 variants, or a JSON object keyed by query for batched
+prompts) without network access or an API key, and counts the requests it
+served. Every answer carries the number of the request that produced it, so
+an answer served from the variant cache is told apart from a fresh one.
+
+Run as a script, it checks the variant cache and --reuse-variants end to end:
+a first run generates and stores variants, a reuse run must serve the same
+variants without a single request, and a run with another temperature or
+prompt version must miss the cache.
+
+Usage:
+    python stub_openai.py --queries 50 --batch-size 5
+
+Or use programmatically:
+    from stub_openai import StubOpenAI
+    client = StubOpenAI()
+    generator = VariantGenerator(client, cache=VariantCache(path), reuse=True)
+    generator.generate("¿Qué es el SCTR?")
+    assert client.requests == 0
+"""
+
+import argparse
+import json
+import tempfile
+import threading
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Optional
+
+from variant_cache import VariantCache
+from variant_generator import DEFAULT_MODEL, DEFAULT_TEMPERATURE, NUM_VARIANTS, VariantGenerator
+
+
+class StubOpenAI:
+    """
+    Offline chat client answering the variant prompts.
+
+    Args:
+        fail_queries: Queries answered with invalid JSON (exercises retries
+            and failure reporting)
+    """
+
+    def __init__(self, fail_queries: Optional[set[str]] = None):
+        self.fail_queries = fail_queries or set()
+        self.requests = 0
+        self._lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, model: str, messages: list[dict], temperature: float = 1.0, max_tokens: int = 0, **_):
+        with self._lock:
+            self.requests += 1
+            number = self.requests
+        prompt = messages[-1]["content"]
+        batched = [line[3:-1] for line in prompt.splitlines() if line.startswith('- "') and line.endswith('"')]
+        if batched:
+            content = json.dumps(
+                {q: self._variants(q, number) for q in batched if q not in self.fail_queries},
+                ensure_ascii=False
+            )
+        else:
+            query = prompt.splitlines()[2].strip('"')
+            content = "not json" if query in self.fail_queries else json.dumps(
+                self._variants(query, number), ensure_ascii=False
+            )
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+            usage=SimpleNamespace(total_tokens=len(prompt) // 4 + len(content) // 4),
+        )
+
+    @staticmethod
+    def _variants(query: str, number: int) -> list[str]:
+        return [f"{query} (variante {i + 1}, petición {number})" for i in range(NUM_VARIANTS)]
+
+
+def check(label: str, ok: bool) -> bool:
+    print(f"  [{'ok' if ok else 'FAIL'}] {label}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the variant cache and --reuse-variants against a stub client")
+    parser.add_argument("--queries", type=int, default=20, help="Queries to generate variants for (default: 20)")
+    parser.add_argument("--batch-size", type=int, default=1, help="Queries per prompt (default: 1)")
+    args = parser.parse_args()
+
+    queries = [f"¿Cuál es el plazo número {i} para presentar la declaración?" for i in range(args.queries)]
+    failing = queries[0]
+    ok = True
+    with tempfile.TemporaryDirectory() as workdir:
+        cache_path = str(Path(workdir) / "variants.sqlite")
+
+        def run(client: StubOpenAI, reuse: bool, **options) -> tuple[list[list[str]], dict[int, str]]:
+            with VariantCache(cache_path) as cache:
+                generator = VariantGenerator(client, cache=cache, reuse=reuse, batch_size=args.batch_size,
+                                             max_retries=0, **options)
+                return generator.generate_many(queries, progress=False)
+
+        print("First run (empty cache):")
+        client = StubOpenAI(fail_queries={failing})
+        first, failures = run(client, reuse=False)
+        ok &= check(f"{client.requests} requests for {len(queries)} queries",
+                    client.requests >= len(queries) / args.batch_size)
+        ok &= check("the query answered with invalid JSON is reported, not cached", list(failures) == [0])
+
+        print("Reuse run:")
+        client = StubOpenAI()
+        reused, failures = run(client, reuse=True)
+        ok &= check("cached variants served unchanged", reused[1:] == first[1:])
+        ok &= check(f"only the uncached query reached the API ({client.requests} request)", client.requests == 1)
+        ok &= check("the uncached query got variants", not failures and len(reused[0]) == NUM_VARIANTS)
+
+        print("Reuse run, again:")
+        client = StubOpenAI()
+        again, _ = run(client, reuse=True)
+        ok &= check("no requests", client.requests == 0)
+        ok &= check("same variants as the previous run", again == reused)
+
+        print("Reuse run with another temperature:")
+        client = StubOpenAI()
+        run(client, reuse=True, temperature=0.2)
+        ok &= check("every query misses the cache", client.requests >= len(queries) / args.batch_size)
+
+        print("Reuse run with another prompt version:")
+        with VariantCache(cache_path) as cache:
+            hits = sum(cache.get(q, DEFAULT_MODEL, "0" * 16, DEFAULT_TEMPERATURE) is not None for q in queries)
+        ok &= check("every query misses the cache", hits == 0)
+
+    print("All checks passed" if ok else "Some checks failed")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    exit(main())
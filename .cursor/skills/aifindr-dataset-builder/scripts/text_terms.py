@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Term normalization shared by the text-matching scripts.
+
+kb_index.py (BM25 passages), dedup_index.py (near-duplicate shingles) and the
+evaluator's score_verdicts.py all compare Spanish and English text accent-
+and case-insensitively; they share these helpers so their terms match.
+
+Usage:
+    from text_terms import STOPWORDS, fold, stem
+    terms = [stem(t) for t in fold(text).split() if t not in STOPWORDS]
+"""
+
+import unicodedata
+
+
+STOPWORDS = set("""
+a al algo algun alguna algunas alguno algunos ante antes como con contra cual cuales cuando de del desde
+donde durante e el ella ellas ellos en entre era es esa esas ese eso esos esta estan estas este esto estos
+fue fueron ha han hasta hay la las le les lo los mas me mi mis muy nada ni no nos o otra otras otro otros
+para pero poco por porque que quien se sea ser si sin sobre son su sus tambien te tiene tienen todo todos
+tu un una unas uno unos y ya yo
+the of and or to in is are for on with by an be this that it as at from
+""".split())
+
+
+def fold(text: str) -> str:
+    """Casefold and strip accents."""
+    text = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in text if not unicodedata.combining(c)).casefold()
+
+
+def stem(token: str) -> str:
+    """Minimal Spanish plural stemming (remuneraciones -> remuneracion, sueldos -> sueldo)."""
+    if len(token) > 4 and token.endswith("es") and token[-3] in "lnrdzj":
+        return token[:-2]
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
@@ -15,89 +15,325 @@ Usage:
         --expected "El SCTR es..." \
         --no-variants
 
+    # Bulk import: one dataset round trip for a whole CSV/JSONL file
+    python upload_query.py \
+        --input queries.csv \
+        --dataset dataset_feedback_variants \
+        --project entity/project-name
+
     # Dry run (preview without uploading)
     python upload_query.py \
         --query "..." \
         --expected "..." \
         --dry-run
 
+New rows are appended to the latest dataset version (Dataset.add_rows), so
+only the new rows are sent. The dataset's max id and row count are kept in a
+local state file (--state-file) and reused while the dataset digest is
+unchanged, so existing rows are not re-read on every upload.
+
+Queries and variants that are near-duplicates of existing rows (or of each
+other) are rejected before publishing (--dedup, see dedup_index.py).
+
 Required environment variables:
     WEAVE_API_KEY or WANDB_API_KEY: W&B API key
     OPENAI_API_KEY: OpenAI API key (for variant generation)
 """
 
 import argparse
+import csv
 import json
 import os
 from datetime import datetime
+from pathlib import Path
+from typing import Optional
 
 import weave
 from openai import OpenAI
 
+from dataset_rows import scan_rows
+from dedup_index import DEFAULT_INDEX_PATH as DEFAULT_DEDUP_INDEX_PATH, DEFAULT_THRESHOLD, DedupIndex
+from variant_cache import DEFAULT_CACHE_PATH as DEFAULT_VARIANT_CACHE_PATH, DEFAULT_MAX_ENTRIES, VariantCache
+from variant_generator import (
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_RPM,
+    DEFAULT_TPM,
+    VariantGenerationError,
+    VariantGenerator,
+)
 
-SYSTEM_PROMPT = """Eres un experto en parafrasear preguntas en español.
 
-Tu tarea es generar exactamente 3 variantes de la pregunta dada. Cada variante debe:
-1. Mantener EXACTAMENTE el mismo significado e intención
-2. Usar palabras diferentes o estructura gramatical diferente
-3. Ser natural y fluida en español
-4. Mantener el mismo nivel de formalidad
-5. Si la pregunta menciona un producto o término específico, DEBE mantenerlo
+DEFAULT_STATE_PATH = ".weave_dataset_state.json"
+DEFAULT_VARIANT_CONCURRENCY = 8
+DEDUP_MODES = ("reject", "flag", "off")
 
-IMPORTANTE:
-- NO cambies el significado de la pregunta
-- NO agregues información nueva
-- NO quites información relevante
-- Mantén los términos técnicos o nombres de productos exactamente igual
 
-Responde SOLO con un JSON array de 3 strings, sin explicaciones adicionales."""
+def generate_variants(
+    client: OpenAI,
+    query: str,
+    cache: Optional[VariantCache] = None,
+    reuse: bool = False
+) -> list[str]:
+    """
+    Generate 3 variants of a query using OpenAI (rate limits and transient errors are retried).
+
+    With a cache, generated variants are stored in it; with reuse, cached
+    variants are returned without calling the API.
+    """
+    try:
+        return VariantGenerator(client, cache=cache, reuse=reuse).generate(query)
+    except VariantGenerationError as e:
+        print(f"Error generating variants: {e}")
+        return []
 
-USER_PROMPT_TEMPLATE = """Genera 3 variantes de esta pregunta:
 
-"{query}"
+def open_variant_cache(
+    path: Optional[str],
+    reuse: bool = False,
+    max_entries: int = DEFAULT_MAX_ENTRIES
+) -> Optional[VariantCache]:
+    """Open the variant cache (--reuse-variants implies the default path)."""
+    path = path or (DEFAULT_VARIANT_CACHE_PATH if reuse else None)
+    return VariantCache(path, max_entries=max_entries) if path else None
 
-Responde solo con un JSON array de 3 strings."""
 
+def dataset_digest(dataset) -> Optional[str]:
+    """Digest of a fetched dataset version, or None if it cannot be determined."""
+    for ref in (getattr(dataset, "ref", None), getattr(getattr(dataset, "rows", None), "table_ref", None)):
+        digest = getattr(ref, "digest", None)
+        if digest and digest != "latest":
+            return digest
+    return None
 
-def generate_variants(client: OpenAI, query: str) -> list[str]:
-    """Generate 3 variants of a query using OpenAI."""
+
+def load_state(path: str) -> dict:
+    """Load the local dataset state file ({} if missing or unreadable)."""
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": SYSTEM_PROMPT},
-                {"role": "user", "content": USER_PROMPT_TEMPLATE.format(query=query)},
-            ],
-            temperature=0.7,
-            max_tokens=500,
-        )
+        return json.loads(Path(path).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
 
-        content = response.choices[0].message.content.strip()
-        # Parse JSON response
-        if content.startswith("```"):
-            content = content.split("```")[1]
-            if content.startswith("json"):
-                content = content[4:]
 
-        variants = json.loads(content)
-        if isinstance(variants, list) and len(variants) >= 3:
-            return variants[:3]
-        return []
+def save_state(path: str, state: dict) -> None:
+    """Write the local dataset state file atomically."""
+    tmp_path = f"{path}.tmp"
+    Path(tmp_path).write_text(json.dumps(state, ensure_ascii=False, indent=2), encoding="utf-8")
+    os.replace(tmp_path, path)
+
+
+def fetch_dataset(dataset_name: str):
+    """Fetch the latest version of a dataset, or None if it does not exist yet."""
+    print(f"Fetching dataset: {dataset_name}")
+    try:
+        return weave.ref(f"{dataset_name}:latest").get()
     except Exception as e:
-        print(f"Error generating variants: {e}")
-        return []
+        print(f"Could not fetch existing dataset ({e}), will create new one")
+        return None
+
+
+def dataset_stats(
+    dataset,
+    state: dict,
+    rescan: bool = False,
+    index: Optional[DedupIndex] = None
+) -> tuple[int, int]:
+    """
+    Max meta.id and row count of a dataset version.
+
+    Served from the local state when it was recorded for the same digest;
+    otherwise the rows are scanned once and the state is refreshed. With an
+    index, the rows are always scanned and their queries indexed in the same pass.
+    """
+    if dataset is None:
+        return 0, 0
+
+    digest = dataset_digest(dataset)
+    if index is None and not rescan and digest and state.get("digest") == digest:
+        print(f"Found {state['row_count']} existing rows (cached state, digest {digest[:12]})")
+        return state["max_id"], state["row_count"]
+
+    max_id, row_count = scan_rows(dataset.rows if index is None else index.ingest(dataset.rows))
+    print(f"Found {row_count} existing rows")
+    state.update({"digest": digest, "max_id": max_id, "row_count": row_count})
+    return max_id, row_count
+
+
+def publish_rows(dataset_name: str, dataset, new_rows: list[dict]) -> tuple[object, str]:
+    """
+    Publish new rows as a new dataset version.
+
+    Appends to the fetched version with Dataset.add_rows when available (only
+    the new rows are sent). Creates the dataset, or falls back to republishing
+    every row on Weave versions without add_rows.
+
+    Returns:
+        (published dataset ref, "append" | "full")
+    """
+    if dataset is None:
+        return weave.publish(weave.Dataset(name=dataset_name, rows=new_rows)), "full"
+
+    if hasattr(dataset, "add_rows"):
+        updated = dataset.add_rows(new_rows)
+        ref = getattr(updated, "ref", None) or weave.ref(f"{dataset_name}:latest")
+        return ref, "append"
 
+    all_rows = list(dataset.rows) + new_rows
+    return weave.publish(weave.Dataset(name=dataset_name, rows=all_rows)), "full"
 
-def get_next_id(existing_rows: list) -> int:
-    """Get the next available ID from existing rows."""
-    max_id = 0
-    for row in existing_rows:
-        meta_id = row.get('meta.id', 0)
-        if isinstance(meta_id, int) and meta_id > max_id:
-            max_id = meta_id
-        elif isinstance(meta_id, str) and meta_id.isdigit():
-            max_id = max(max_id, int(meta_id))
-    return max_id + 1
+
+def build_rows(
+    query: str,
+    expected: str,
+    row_id: int,
+    date_str: str,
+    product: str = "",
+    feedback_type: str = "test",
+    variants: list[str] = ()
+) -> list[dict]:
+    """Dataset rows for one query: the original plus one row per variant, sharing row_id."""
+    rows = []
+    for variant_type, text in [("original", query)] + [(f"variant_{i+1}", v) for i, v in enumerate(variants)]:
+        row = {
+            "query": text,
+            "expected_response": expected,
+            "meta.id": row_id,
+            "meta.date": date_str,
+            "meta.feedback_type": feedback_type,
+            "variant_type": variant_type,
+            "variant_group": row_id,
+        }
+        if product:
+            row["meta.product"] = product
+        rows.append(row)
+    return rows
+
+
+def open_dataset(
+    project: str,
+    dataset_name: str,
+    state_path: str = DEFAULT_STATE_PATH,
+    rescan: bool = False,
+    dedup_path: Optional[str] = None,
+    dedup_threshold: float = DEFAULT_THRESHOLD
+) -> dict:
+    """
+    Initialize Weave and fetch the latest dataset version with its max id and row count.
+
+    Max id and row count come from the local state while the latest version
+    is the one it was recorded for. With dedup_path, the near-duplicate index
+    of the dataset's queries is loaded too (rebuilt from the rows if it was
+    built from another version).
+
+    Returns:
+        Target dict passed to append_rows
+    """
+    # Initialize Weave
+    os.environ.setdefault("WANDB_API_KEY", os.environ.get("WEAVE_API_KEY", ""))
+    weave.init(project)
+
+    states = load_state(state_path)
+    state_key = f"{project}/{dataset_name}"
+    state = states.get(state_key, {})
+    dataset = fetch_dataset(dataset_name)
+
+    dedup = None
+    stale_index = False
+    if dedup_path:
+        dedup = DedupIndex(dedup_path, state_key, dedup_threshold)
+        digest = dataset_digest(dataset) if dataset is not None else None
+        stale_index = dataset is not None and (rescan or not digest or dedup.digest != digest)
+        if stale_index or dataset is None:
+            dedup.reset()
+
+    max_id, row_count = dataset_stats(dataset, state, rescan=rescan, index=dedup if stale_index else None)
+    if dataset is not None and state.get("digest"):
+        states[state_key] = state
+        save_state(state_path, states)
+    if stale_index:
+        print(f"Indexed {len(dedup)} queries for near-duplicate detection")
+        dedup.save(state.get("digest"))
+
+    return {
+        "name": dataset_name,
+        "dataset": dataset,
+        "max_id": max_id,
+        "row_count": row_count,
+        "states": states,
+        "state_key": state_key,
+        "state_path": state_path,
+        "dedup": dedup,
+    }
+
+
+def append_rows(target: dict, new_rows: list[dict]) -> dict:
+    """Publish new rows to the target dataset (see open_dataset) and record the new state."""
+    total_rows = target["row_count"] + len(new_rows)
+    print(f"\nPublishing {len(new_rows)} new rows ({total_rows} total)...")
+
+    ref, mode = publish_rows(target["name"], target["dataset"], new_rows)
+
+    digest = getattr(ref, "digest", None)
+    max_id = max([target["max_id"]] + [row["meta.id"] for row in new_rows])
+    states = target["states"]
+    states[target["state_key"]] = {
+        "digest": digest if digest != "latest" else None,
+        "max_id": max_id,
+        "row_count": total_rows,
+        "updated_at": datetime.now().isoformat(timespec="seconds"),
+    }
+    save_state(target["state_path"], states)
+    if target.get("dedup"):
+        target["dedup"].save(states[target["state_key"]]["digest"])
+
+    print(f"\nDataset published successfully! ({mode})")
+    print(f"Reference: {ref}")
+    print(f"New rows added: {len(new_rows)}")
+    print(f"Total rows: {total_rows}")
+
+    return {
+        "status": "success",
+        "reference": str(ref),
+        "new_rows": len(new_rows),
+        "total_rows": total_rows,
+        "publish_mode": mode,
+    }
+
+
+def screen_duplicates(
+    index: Optional[DedupIndex],
+    texts: list[str],
+    row_id: int,
+    reject: bool = True
+) -> tuple[list[str], list[dict]]:
+    """
+    Check texts against the near-duplicate index (and each other), indexing
+    the ones that are kept.
+
+    Returns:
+        (kept texts, near-duplicates found as {"id", "query", "duplicate_of",
+        "match", "similarity"}); with reject=False every text is kept
+    """
+    if index is None:
+        return list(texts), []
+
+    kept, duplicates = [], []
+    for text in texts:
+        matches = index.find(text, limit=1)
+        if matches:
+            duplicates.append({
+                "id": row_id,
+                "query": text,
+                "duplicate_of": matches[0]["row_id"],
+                "match": matches[0]["query"],
+                "similarity": matches[0]["similarity"],
+            })
+            print(f"  Near-duplicate ({matches[0]['similarity']:.2f}) of ID {matches[0]['row_id']}: "
+                  f"{text[:50]} ~ {matches[0]['query'][:50]}{'' if reject else ' (flagged)'}")
+            if reject:
+                continue
+        index.add(text, row_id)
+        kept.append(text)
+    return kept, duplicates
 
 
 def upload_query(
@@ -108,7 +344,14 @@ def upload_query(
     product: str = "",
     feedback_type: str = "test",
     generate_variants_flag: bool = True,
-    dry_run: bool = False
+    dry_run: bool = False,
+    state_path: str = DEFAULT_STATE_PATH,
+    rescan: bool = False,
+    variant_cache: Optional[VariantCache] = None,
+    reuse_variants: bool = False,
+    dedup: str = "reject",
+    dedup_index_path: str = DEFAULT_DEDUP_INDEX_PATH,
+    dedup_threshold: float = DEFAULT_THRESHOLD
 ) -> dict:
     """
     Upload a query with variants to a W&B Weave dataset.
@@ -122,72 +365,53 @@ def upload_query(
         feedback_type: Feedback type (default: test)
         generate_variants_flag: Whether to generate variants
         dry_run: If True, only preview without uploading
+        state_path: Local file caching each dataset's digest, max id and row count
+        rescan: Ignore the cached state and re-read the existing rows
+        variant_cache: Optional VariantCache storing generated variants
+        reuse_variants: Serve variants from variant_cache instead of calling OpenAI
+        dedup: "reject" near-duplicates of existing rows, only "flag" them, or "off"
+        dedup_index_path: Local near-duplicate index file
+        dedup_threshold: Character 3-gram Jaccard similarity counted as a near-duplicate
 
     Returns:
         Dict with upload results
     """
-    # Initialize Weave
-    os.environ.setdefault("WANDB_API_KEY", os.environ.get("WEAVE_API_KEY", ""))
-    weave.init(project)
-
-    # Fetch existing dataset
-    print(f"Fetching dataset: {dataset_name}")
-    try:
-        existing_ref = weave.ref(f"{dataset_name}:latest")
-        existing_dataset = existing_ref.get()
-        existing_rows = list(existing_dataset.rows)
-        print(f"Found {len(existing_rows)} existing rows")
-    except Exception as e:
-        print(f"Could not fetch existing dataset ({e}), will create new one")
-        existing_rows = []
+    target = open_dataset(
+        project, dataset_name, state_path, rescan,
+        dedup_path=None if dedup == "off" else dedup_index_path, dedup_threshold=dedup_threshold
+    )
+    reject = dedup == "reject"
 
     # Get next ID
-    next_id = get_next_id(existing_rows)
+    next_id = target["max_id"] + 1
     print(f"Next ID: {next_id}")
 
-    # Build rows to add
-    new_rows = []
-    date_str = datetime.now().strftime("%Y-%m-%d")
-
-    # Original query
-    original_row = {
-        "query": query,
-        "expected_response": expected,
-        "meta.id": next_id,
-        "meta.date": date_str,
-        "meta.feedback_type": feedback_type,
-        "variant_type": "original",
-        "variant_group": next_id,
-    }
-    if product:
-        original_row["meta.product"] = product
-    new_rows.append(original_row)
+    # Check for near-duplicates before paying for variants
+    kept, duplicates = screen_duplicates(target["dedup"], [query], next_id, reject)
+    if not kept:
+        print("\nQuery is a near-duplicate of an existing row; not uploading (use --dedup flag to force)")
+        return {"status": "duplicate", "new_rows": 0, "duplicates": duplicates}
 
     # Generate variants
+    variants = []
     if generate_variants_flag:
         print(f"\nGenerating variants for: {query[:50]}...")
         openai_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-        variants = generate_variants(openai_client, query)
+        variants = generate_variants(openai_client, query, cache=variant_cache, reuse=reuse_variants)
+        variants, variant_duplicates = screen_duplicates(target["dedup"], variants, next_id, reject)
+        duplicates.extend(variant_duplicates)
 
         if variants:
             print(f"Generated {len(variants)} variants:")
             for i, variant in enumerate(variants):
                 print(f"  {i+1}. {variant}")
-                variant_row = {
-                    "query": variant,
-                    "expected_response": expected,
-                    "meta.id": next_id,
-                    "meta.date": date_str,
-                    "meta.feedback_type": feedback_type,
-                    "variant_type": f"variant_{i+1}",
-                    "variant_group": next_id,
-                }
-                if product:
-                    variant_row["meta.product"] = product
-                new_rows.append(variant_row)
         else:
             print("No variants generated")
 
+    # Build rows to add
+    date_str = datetime.now().strftime("%Y-%m-%d")
+    new_rows = build_rows(query, expected, next_id, date_str, product, feedback_type, variants)
+
     # Print summary
     print(f"\nRows to add: {len(new_rows)}")
     for row in new_rows:
@@ -199,56 +423,298 @@ def upload_query(
             "status": "dry_run",
             "rows": new_rows,
             "next_id": next_id,
+            "duplicates": duplicates,
         }
 
-    # Combine and publish
-    all_rows = existing_rows + new_rows
-    print(f"\nPublishing dataset with {len(all_rows)} total rows...")
+    return {**append_rows(target, new_rows), "next_id": next_id, "duplicates": duplicates}
 
-    dataset = weave.Dataset(name=dataset_name, rows=all_rows)
-    ref = weave.publish(dataset)
 
-    print(f"\nDataset published successfully!")
-    print(f"Reference: {ref}")
-    print(f"New rows added: {len(new_rows)}")
-    print(f"Total rows: {len(all_rows)}")
+def load_bulk_file(path: str) -> list[dict]:
+    """
+    Read bulk import rows from a CSV (with a header row) or JSONL file.
+
+    Each row needs "query" and "expected" ("expected_response" is accepted
+    too); "product" and "feedback_type" are optional.
+    """
+    if Path(path).suffix.lower() == ".csv":
+        with open(path, "r", encoding="utf-8-sig", newline="") as f:
+            records = list(csv.DictReader(f))
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            records = [json.loads(line) for line in f if line.strip()]
+
+    rows = []
+    for line_no, record in enumerate(records, 1):
+        query = (record.get("query") or "").strip()
+        expected = (record.get("expected") or record.get("expected_response") or "").strip()
+        if not query and not expected:
+            continue
+        if not query or not expected:
+            raise ValueError(f"{path}: row {line_no} needs both query and expected")
+        rows.append({
+            "query": query,
+            "expected": expected,
+            "product": (record.get("product") or "").strip(),
+            "feedback_type": (record.get("feedback_type") or "").strip(),
+        })
+    return rows
+
+
+def generate_variants_bulk(
+    queries: list[str],
+    concurrency: int = DEFAULT_VARIANT_CONCURRENCY,
+    rpm: int = DEFAULT_RPM,
+    tpm: int = DEFAULT_TPM,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    cache: Optional[VariantCache] = None,
+    reuse: bool = False
+) -> tuple[list[list[str]], dict[int, str]]:
+    """
+    Generate variants for many queries concurrently under RPM/TPM budgets
+    (with reuse, cached variants are served without calling the API).
+
+    Returns:
+        (variants in input order, {index: error} for queries that failed)
+    """
+    generator = VariantGenerator(
+        OpenAI(api_key=os.getenv("OPENAI_API_KEY")),
+        rpm=rpm, tpm=tpm, concurrency=concurrency, batch_size=batch_size, cache=cache, reuse=reuse,
+    )
+    variants, failures = generator.generate_many(queries)
+    stats = generator.stats
+    print(f"Variants: {len(queries) - len(failures)}/{len(queries)} queries "
+          f"({stats['cache_hits']} cached, {stats['requests']} requests, {stats['retries']} retries, "
+          f"{stats['rate_limited']} rate limited)")
+    return variants, failures
+
+
+def upload_bulk(
+    input_path: str,
+    dataset_name: str,
+    project: str,
+    product: str = "",
+    feedback_type: str = "test",
+    generate_variants_flag: bool = True,
+    dry_run: bool = False,
+    state_path: str = DEFAULT_STATE_PATH,
+    rescan: bool = False,
+    concurrency: int = DEFAULT_VARIANT_CONCURRENCY,
+    rpm: int = DEFAULT_RPM,
+    tpm: int = DEFAULT_TPM,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    allow_missing_variants: bool = False,
+    variant_cache: Optional[VariantCache] = None,
+    reuse_variants: bool = False,
+    dedup: str = "reject",
+    dedup_index_path: str = DEFAULT_DEDUP_INDEX_PATH,
+    dedup_threshold: float = DEFAULT_THRESHOLD
+) -> dict:
+    """
+    Upload many queries (with variants) in one dataset round trip.
+
+    Ids are assigned in one consecutive block after the dataset's max id,
+    variants are generated concurrently, and all rows are published once.
+    Near-duplicates of existing rows or of earlier rows in the file are
+    skipped before variant generation.
+
+    Args:
+        input_path: CSV or JSONL file of query/expected/product/feedback_type rows
+        dataset_name: W&B dataset name
+        project: W&B project (entity/project-name)
+        product: Default product for rows without one
+        feedback_type: Default feedback type for rows without one
+        generate_variants_flag: Whether to generate variants
+        dry_run: If True, only preview without uploading
+        state_path: Local file caching each dataset's digest, max id and row count
+        rescan: Ignore the cached state and re-read the existing rows
+        concurrency: Variant generation requests in flight
+        rpm: Variant generation requests-per-minute budget
+        tpm: Variant generation tokens-per-minute budget
+        batch_size: Queries packed into one variant generation prompt
+        allow_missing_variants: Publish even if some queries got no variants
+            (by default nothing is published and the failures are returned)
+        variant_cache: Optional VariantCache storing generated variants
+        reuse_variants: Serve variants from variant_cache instead of calling OpenAI
+        dedup: "reject" near-duplicates of existing rows, only "flag" them, or "off"
+        dedup_index_path: Local near-duplicate index file
+        dedup_threshold: Character 3-gram Jaccard similarity counted as a near-duplicate
+
+    Returns:
+        Dict with upload results (first_id and last_id of the block,
+        variant_failures and duplicates)
+    """
+    items = load_bulk_file(input_path)
+    print(f"Loaded {len(items)} queries from {input_path}")
+    if not items:
+        return {"status": "empty", "rows": [], "new_rows": 0}
+
+    target = open_dataset(
+        project, dataset_name, state_path, rescan,
+        dedup_path=None if dedup == "off" else dedup_index_path, dedup_threshold=dedup_threshold
+    )
+    reject = dedup == "reject"
+    first_id = target["max_id"] + 1
+
+    duplicates = []
+    kept_items = []
+    for line_no, item in enumerate(items, 1):
+        kept, item_duplicates = screen_duplicates(target["dedup"], [item["query"]], first_id + len(kept_items), reject)
+        if kept:
+            kept_items.append(item)
+        else:
+            for duplicate in item_duplicates:
+                duplicate.update(id=None, line=line_no)
+        duplicates.extend(item_duplicates)
+    if len(kept_items) < len(items):
+        print(f"Skipping {len(items) - len(kept_items)} near-duplicate queries")
+    items = kept_items
+    if not items:
+        return {"status": "empty", "rows": [], "new_rows": 0, "duplicates": duplicates}
+
+    last_id = first_id + len(items) - 1
+    print(f"IDs: {first_id}-{last_id}")
+
+    variants = [[] for _ in items]
+    variant_failures = []
+    if generate_variants_flag:
+        variants, failures = generate_variants_bulk(
+            [item["query"] for item in items], concurrency, rpm, tpm, batch_size,
+            cache=variant_cache, reuse=reuse_variants
+        )
+        variant_failures = [
+            {"id": first_id + i, "query": items[i]["query"], "error": error}
+            for i, error in sorted(failures.items())
+        ]
+        for failure in variant_failures:
+            print(f"  No variants for ID {failure['id']} ({failure['query'][:50]}): {failure['error']}")
+        for i, item_variants in enumerate(variants):
+            variants[i], variant_duplicates = screen_duplicates(target["dedup"], item_variants, first_id + i, reject)
+            duplicates.extend(variant_duplicates)
+
+    date_str = datetime.now().strftime("%Y-%m-%d")
+    new_rows = []
+    for row_id, item, item_variants in zip(range(first_id, last_id + 1), items, variants):
+        new_rows.extend(build_rows(
+            item["query"], item["expected"], row_id, date_str,
+            item["product"] or product, item["feedback_type"] or feedback_type, item_variants
+        ))
+
+    print(f"\nRows to add: {len(new_rows)} ({len(items)} queries)")
+
+    if dry_run:
+        print("\n[DRY RUN] Not uploading to W&B")
+        return {
+            "status": "dry_run",
+            "rows": new_rows,
+            "first_id": first_id,
+            "last_id": last_id,
+            "variant_failures": variant_failures,
+            "duplicates": duplicates,
+        }
+
+    if variant_failures and not allow_missing_variants:
+        print(f"\n{len(variant_failures)} queries got no variants; not publishing. "
+              "Rerun, or pass --allow-missing-variants to publish them without variants.")
+        return {
+            "status": "variant_failures",
+            "new_rows": 0,
+            "first_id": first_id,
+            "last_id": last_id,
+            "variant_failures": variant_failures,
+            "duplicates": duplicates,
+        }
 
     return {
-        "status": "success",
-        "reference": str(ref),
-        "new_rows": len(new_rows),
-        "total_rows": len(all_rows),
-        "next_id": next_id,
+        **append_rows(target, new_rows),
+        "first_id": first_id,
+        "last_id": last_id,
+        "variant_failures": variant_failures,
+        "duplicates": duplicates,
     }
 
 
 def main():
     parser = argparse.ArgumentParser(description="Upload query with variants to W&B dataset")
-    parser.add_argument("--query", "-q", required=True, help="The query to add")
-    parser.add_argument("--expected", "-e", required=True, help="Expected response")
+    parser.add_argument("--query", "-q", help="The query to add")
+    parser.add_argument("--expected", "-e", help="Expected response")
+    parser.add_argument("--input", "-i",
+                        help="Bulk mode: CSV/JSONL of query, expected, product, feedback_type rows")
+    parser.add_argument("--concurrency", "-c", type=int, default=DEFAULT_VARIANT_CONCURRENCY,
+                        help=f"Bulk mode: variant requests in flight (default: {DEFAULT_VARIANT_CONCURRENCY})")
+    parser.add_argument("--rpm", type=int, default=DEFAULT_RPM,
+                        help=f"Bulk mode: OpenAI requests per minute (default: {DEFAULT_RPM})")
+    parser.add_argument("--tpm", type=int, default=DEFAULT_TPM,
+                        help=f"Bulk mode: OpenAI tokens per minute (default: {DEFAULT_TPM})")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                        help=f"Bulk mode: queries per variant prompt (default: {DEFAULT_BATCH_SIZE})")
+    parser.add_argument("--allow-missing-variants", action="store_true",
+                        help="Bulk mode: publish even if some queries got no variants")
+    parser.add_argument("--variant-cache", nargs="?", const=DEFAULT_VARIANT_CACHE_PATH,
+                        help=f"Store generated variants in a cache file (default: {DEFAULT_VARIANT_CACHE_PATH})")
+    parser.add_argument("--reuse-variants", action="store_true",
+                        help="Serve cached variants instead of calling OpenAI (implies --variant-cache)")
+    parser.add_argument("--variant-cache-max-entries", type=int, default=DEFAULT_MAX_ENTRIES,
+                        help=f"Variant cache size, least recently used evicted (default: {DEFAULT_MAX_ENTRIES})")
     parser.add_argument("--dataset", "-d", required=True, help="W&B dataset name")
     parser.add_argument("--project", "-p", required=True, help="W&B project (entity/project-name)")
     parser.add_argument("--product", default="", help="Product name")
     parser.add_argument("--feedback-type", default="test", help="Feedback type (default: test)")
     parser.add_argument("--no-variants", action="store_true", help="Skip variant generation")
     parser.add_argument("--dry-run", action="store_true", help="Preview without uploading")
+    parser.add_argument("--state-file", default=DEFAULT_STATE_PATH,
+                        help=f"Local cache of dataset max id and row count (default: {DEFAULT_STATE_PATH})")
+    parser.add_argument("--rescan", action="store_true", help="Ignore the cached state and re-read existing rows")
+    parser.add_argument("--dedup", choices=DEDUP_MODES, default="reject",
+                        help="Near-duplicate queries/variants: reject (default), flag only, or off")
+    parser.add_argument("--dedup-index", default=DEFAULT_DEDUP_INDEX_PATH,
+                        help=f"Local near-duplicate index (default: {DEFAULT_DEDUP_INDEX_PATH})")
+    parser.add_argument("--dedup-threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help=f"Character 3-gram Jaccard similarity of a near-duplicate (default: {DEFAULT_THRESHOLD})")
     args = parser.parse_args()
 
-    result = upload_query(
-        query=args.query,
-        expected=args.expected,
+    if args.input and (args.query or args.expected):
+        parser.error("--input cannot be combined with --query/--expected")
+    if not args.input and (not args.query or not args.expected):
+        parser.error("--query and --expected are required (or use --input for bulk mode)")
+
+    common = dict(
         dataset_name=args.dataset,
         project=args.project,
         product=args.product,
         feedback_type=args.feedback_type,
         generate_variants_flag=not args.no_variants,
         dry_run=args.dry_run,
+        state_path=args.state_file,
+        rescan=args.rescan,
+        reuse_variants=args.reuse_variants,
+        dedup=args.dedup,
+        dedup_index_path=args.dedup_index,
+        dedup_threshold=args.dedup_threshold,
     )
+    variant_cache = open_variant_cache(args.variant_cache, args.reuse_variants, args.variant_cache_max_entries)
+    try:
+        if args.input:
+            result = upload_bulk(
+                input_path=args.input,
+                concurrency=args.concurrency,
+                rpm=args.rpm,
+                tpm=args.tpm,
+                batch_size=args.batch_size,
+                allow_missing_variants=args.allow_missing_variants,
+                variant_cache=variant_cache,
+                **common,
+            )
+        else:
+            result = upload_query(query=args.query, expected=args.expected, variant_cache=variant_cache, **common)
+    finally:
+        if variant_cache:
+            variant_cache.close()
 
-    if args.dry_run:
+    if args.dry_run and result.get("rows"):
         print("\nRows that would be added:")
         print(json.dumps(result["rows"], ensure_ascii=False, indent=2))
+    return 1 if result.get("variant_failures") or result["status"] == "duplicate" else 0
 
 
 if __name__ == "__main__":
-    main()
+    exit(main())
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+On-disk cache of generated query variants.
+
+Keyed by (normalized query, model, prompt hash, temperature), so a prompt or
+model change never serves stale paraphrases. Used by variant_generator.py and
+upload_query.py (--reuse-variants) to make dataset rebuilds and --dry-run
+previews fast and reproducible. Storage and eviction come from
+sqlite_cache.py; the least recently used entries are evicted beyond
+--max-entries.
+
+Usage:
+    python variant_cache.py stats --cache .variant_cache.sqlite
+    python variant_cache.py evict --cache .variant_cache.sqlite --max-entries 20000
+    python variant_cache.py clear --cache .variant_cache.sqlite
+"""
+
+import hashlib
+import json
+from typing import Optional
+
+from sqlite_cache import SQLiteCache, cache_cli, normalize_query
+
+
+DEFAULT_CACHE_PATH = ".variant_cache.sqlite"
+DEFAULT_MAX_ENTRIES = 50_000
+
+
+def prompt_hash(*prompts: str) -> str:
+    """Short content hash identifying a prompt version."""
+    return hashlib.sha256("\x00".join(prompts).encode("utf-8")).hexdigest()[:16]
+
+
+def cache_key(query: str, model: str, prompt_digest: str, temperature: float) -> str:
+    # ASCII-escaped JSON, as the keys of existing cache files were built
+    raw = json.dumps([normalize_query(query), model, prompt_digest, round(float(temperature), 4)])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class VariantCache(SQLiteCache):
+    """
+    SQLite-backed variant cache, safe to share between worker threads.
+
+    Args:
+        path: SQLite file (created if missing)
+        max_entries: Keep at most this many entries (least recently used
+            entries are evicted first)
+        ttl_s: Entries older than this many seconds are ignored and evicted
+    """
+
+    TABLE = "variants"
+    PAYLOAD_COLUMN = "variants"
+    COLUMNS = (("query", "TEXT"), ("model", "TEXT"), ("prompt_hash", "TEXT"), ("temperature", "REAL"))
+    GROUP_BY = ("by_prompt", ("model", "prompt_hash", "temperature"))
+
+    def __init__(
+        self,
+        path: str = DEFAULT_CACHE_PATH,
+        max_entries: Optional[int] = DEFAULT_MAX_ENTRIES,
+        ttl_s: Optional[float] = None
+    ):
+        super().__init__(path, ttl_s=ttl_s, max_entries=max_entries)
+
+    def get(self, query: str, model: str, prompt_digest: str, temperature: float) -> Optional[list[str]]:
+        """Cached variants, or None on a miss."""
+        return self.get_payload(cache_key(query, model, prompt_digest, temperature))
+
+    def put(self, query: str, model: str, prompt_digest: str, temperature: float, variants: list[str]) -> None:
+        """Store (or replace) variants, then apply size-based eviction."""
+        self.put_payload(
+            cache_key(query, model, prompt_digest, temperature), variants,
+            query=query, model=model, prompt_hash=prompt_digest, temperature=float(temperature)
+        )
+
+
+def main():
+    cache_cli(VariantCache, "Inspect or maintain the variant cache", DEFAULT_CACHE_PATH, DEFAULT_MAX_ENTRIES)
+
+
+if __name__ == "__main__":
+    main()
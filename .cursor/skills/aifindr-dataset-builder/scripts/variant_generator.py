@@ -0,0 +1,474 @@
+#!/usr/bin/env python3
+"""
+Concurrent, rate-limit-aware paraphrase (variant) generation.
+
+Requests run on a thread pool and share one requests-per-minute and one
+tokens-per-minute budget. Rate-limited (429) and transient errors are retried
+with backoff, honouring Retry-After. Queries that still fail are reported
+instead of silently getting no variants. Optionally several queries are packed
+into one prompt (--batch-size); any query missing from a batched answer is
+retried on its own.
+
+Usage:
+    python variant_generator.py --input queries.jsonl --output variants.jsonl \
+        --concurrency 16 --rpm 500 --tpm 200000 --batch-size 5
+
+Or use programmatically:
+    from variant_generator import VariantGenerator
+    generator = VariantGenerator(OpenAI(), rpm=500, tpm=200_000)
+    variants, failures = generator.generate_many(queries)
+
+    # Rebuilds: reuse stored paraphrases instead of calling the API
+    generator = VariantGenerator(OpenAI(), cache=VariantCache(), reuse=True)
+
+Required environment variables:
+    OPENAI_API_KEY: OpenAI API key
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Optional
+
+try:
+    from openai import OpenAI
+    HAS_OPENAI = True
+except ImportError:
+    HAS_OPENAI = False
+
+from variant_cache import DEFAULT_CACHE_PATH as DEFAULT_VARIANT_CACHE_PATH, VariantCache, prompt_hash
+
+
+DEFAULT_MODEL = "gpt-4o-mini"
+DEFAULT_TEMPERATURE = 0.7
+DEFAULT_MAX_TOKENS = 500
+DEFAULT_RPM = 500
+DEFAULT_TPM = 200_000
+DEFAULT_CONCURRENCY = 8
+DEFAULT_MAX_RETRIES = 6
+DEFAULT_BATCH_SIZE = 1
+NUM_VARIANTS = 3
+
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+SYSTEM_PROMPT = """Eres un experto en parafrasear preguntas en español.
+
+Tu tarea es generar exactamente 3 variantes de la pregunta dada. Cada variante debe:
+1. Mantener EXACTAMENTE el mismo significado e intención
+2. Usar palabras diferentes o estructura gramatical diferente
+3. Ser natural y fluida en español
+4. Mantener el mismo nivel de formalidad
+5. Si la pregunta menciona un producto o término específico, DEBE mantenerlo
+
+IMPORTANTE:
+- NO cambies el significado de la pregunta
+- NO agregues información nueva
+- NO quites información relevante
+- Mantén los términos técnicos o nombres de productos exactamente igual
+
+Responde SOLO con un JSON array de 3 strings, sin explicaciones adicionales."""
+
+USER_PROMPT_TEMPLATE = """Genera 3 variantes de esta pregunta:
+
+"{query}"
+
+Responde solo con un JSON array de 3 strings."""
+
+BATCH_SYSTEM_PROMPT = SYSTEM_PROMPT.replace(
+    "Tu tarea es generar exactamente 3 variantes de la pregunta dada.",
+    "Tu tarea es generar exactamente 3 variantes de cada una de las preguntas dadas.",
+).replace(
+    "Responde SOLO con un JSON array de 3 strings, sin explicaciones adicionales.",
+    "Responde SOLO con un objeto JSON cuyas claves son las preguntas exactamente como se "
+    "dieron y cuyos valores son arrays de 3 strings, sin explicaciones adicionales.",
+)
+
+BATCH_USER_PROMPT_TEMPLATE = """Genera 3 variantes de cada una de estas preguntas:
+
+{queries}
+
+Responde solo con un objeto JSON {{"pregunta": ["variante 1", "variante 2", "variante 3"], ...}}."""
+
+
+# Identifies the prompt version in variant cache keys
+PROMPT_HASH = prompt_hash(SYSTEM_PROMPT, USER_PROMPT_TEMPLATE, BATCH_SYSTEM_PROMPT, BATCH_USER_PROMPT_TEMPLATE)
+
+
+class VariantGenerationError(Exception):
+    """Variants could not be generated for a query (after retries)."""
+
+
+def strip_code_fence(content: str) -> str:
+    """Remove a ```json ... ``` fence around a model answer."""
+    content = content.strip()
+    if content.startswith("```"):
+        content = content.split("```")[1]
+        if content.startswith("json"):
+            content = content[4:]
+    return content.strip()
+
+
+def parse_variants(content: str) -> list[str]:
+    """Parse a JSON array answer into exactly NUM_VARIANTS strings."""
+    try:
+        variants = json.loads(strip_code_fence(content))
+    except ValueError as e:
+        raise VariantGenerationError(f"Invalid JSON in answer: {e}") from e
+    if not isinstance(variants, list) or len(variants) < NUM_VARIANTS:
+        raise VariantGenerationError(f"Expected a JSON array of {NUM_VARIANTS} strings")
+    return [str(v) for v in variants[:NUM_VARIANTS]]
+
+
+def parse_batch_variants(content: str, queries: list[str]) -> dict[str, list[str]]:
+    """Parse a batched JSON object answer. Queries missing or malformed in it are left out."""
+    try:
+        answer = json.loads(strip_code_fence(content))
+    except ValueError as e:
+        raise VariantGenerationError(f"Invalid JSON in batched answer: {e}") from e
+    if not isinstance(answer, dict):
+        raise VariantGenerationError("Expected a JSON object keyed by query")
+
+    normalized = {" ".join(str(k).split()).strip('"¿? ').casefold(): v for k, v in answer.items()}
+    parsed = {}
+    for query in queries:
+        variants = answer.get(query)
+        if variants is None:
+            variants = normalized.get(" ".join(query.split()).strip('"¿? ').casefold())
+        if isinstance(variants, list) and len(variants) >= NUM_VARIANTS:
+            parsed[query] = [str(v) for v in variants[:NUM_VARIANTS]]
+    return parsed
+
+
+def estimate_tokens(messages: list[dict], max_tokens: int) -> int:
+    """Rough token cost of a request (prompt chars / 4 plus the completion budget)."""
+    return sum(len(m["content"]) for m in messages) // 4 + max_tokens
+
+
+def status_code_of(error: Exception) -> Optional[int]:
+    return getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+
+
+def is_retryable(error: Exception) -> bool:
+    """429, 5xx, timeouts and connection errors are worth retrying."""
+    status = status_code_of(error)
+    if status is not None:
+        return status in RETRYABLE_STATUS_CODES
+    return type(error).__name__ in {"APIConnectionError", "APITimeoutError", "Timeout", "TimeoutError",
+                                    "ConnectionError"}
+
+
+def retry_after(error: Exception) -> Optional[float]:
+    """Delay requested by the server (retry-after-ms / retry-after headers), if any."""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except (TypeError, ValueError):
+        pass
+    return None
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously at capacity per minute."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, amount: float) -> None:
+        """Block until amount is available, then take it (amounts above capacity wait for a full bucket)."""
+        amount = min(amount, self.capacity)
+        while True:
+            with self._lock:
+                self._refill()
+                if self.level >= amount:
+                    self.level -= amount
+                    return
+                wait = (amount - self.level) / self.rate
+            time.sleep(wait)
+
+    def adjust(self, amount: float) -> None:
+        """Charge (positive) or refund (negative) after the real cost is known."""
+        with self._lock:
+            self._refill()
+            self.level = min(self.capacity, self.level - amount)
+
+    def drain(self) -> None:
+        """Empty the bucket (the server says the budget is exhausted)."""
+        with self._lock:
+            self._refill()
+            self.level = min(self.level, 0.0)
+
+
+class VariantGenerator:
+    """
+    Generates query variants under shared RPM/TPM budgets.
+
+    Args:
+        client: OpenAI client (shared by all worker threads); anything with
+            chat.completions.create() works, e.g. stub_openai.StubOpenAI
+        model: Chat model
+        temperature: Sampling temperature
+        rpm: Requests-per-minute budget
+        tpm: Tokens-per-minute budget
+        concurrency: Requests in flight
+        max_retries: Retries per request for 429/5xx/network errors and
+            unparseable answers
+        batch_size: Queries packed into one prompt (1 = one request per query)
+        cache: Optional VariantCache; every generated answer is stored in it
+        reuse: Serve cached variants instead of calling the API (needs cache)
+    """
+
+    def __init__(
+        self,
+        client: "OpenAI",
+        model: str = DEFAULT_MODEL,
+        temperature: float = DEFAULT_TEMPERATURE,
+        rpm: int = DEFAULT_RPM,
+        tpm: int = DEFAULT_TPM,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        cache: Optional[VariantCache] = None,
+        reuse: bool = False
+    ):
+        self.client = client
+        self.model = model
+        self.temperature = temperature
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.batch_size = max(1, batch_size)
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.cache = cache
+        self.reuse = reuse and cache is not None
+        self.stats = {"requests": 0, "retries": 0, "rate_limited": 0, "tokens": 0, "cache_hits": 0}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, **increments) -> None:
+        with self._stats_lock:
+            for key, value in increments.items():
+                self.stats[key] += value
+
+    def _complete(self, messages: list[dict], max_tokens: int, parse):
+        """One chat completion under the budgets, retried; returns parse(content)."""
+        estimate = estimate_tokens(messages, max_tokens)
+        attempt = 0
+        while True:
+            self.requests.acquire(1)
+            self.tokens.acquire(estimate)
+            try:
+                response = self.client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    temperature=self.temperature,
+                    max_tokens=max_tokens,
+                )
+                used = getattr(getattr(response, "usage", None), "total_tokens", None)
+                self.tokens.adjust((used or estimate) - estimate)
+                self._count(requests=1, tokens=used or estimate)
+                return parse(response.choices[0].message.content or "")
+            except VariantGenerationError:
+                if attempt >= self.max_retries:
+                    raise
+                delay = 0.0
+            except Exception as e:
+                self._count(requests=1)
+                if attempt >= self.max_retries or not is_retryable(e):
+                    raise VariantGenerationError(f"{type(e).__name__}: {e}") from e
+                if status_code_of(e) == 429:
+                    self._count(rate_limited=1)
+                    self.requests.drain()
+                    self.tokens.drain()
+                delay = retry_after(e)
+                if delay is None:
+                    delay = random.uniform(0, min(60.0, 2 ** attempt))
+            attempt += 1
+            self._count(retries=1)
+            time.sleep(delay)
+
+    def cached(self, query: str) -> Optional[list[str]]:
+        """Cached variants for a query when reusing, else None."""
+        if not self.reuse:
+            return None
+        variants = self.cache.get(query, self.model, PROMPT_HASH, self.temperature)
+        if variants is not None:
+            self._count(cache_hits=1)
+        return variants
+
+    def _store(self, query: str, variants: list[str]) -> None:
+        if self.cache is not None:
+            self.cache.put(query, self.model, PROMPT_HASH, self.temperature, variants)
+
+    def generate(self, query: str) -> list[str]:
+        """Variants for one query. Raises VariantGenerationError after the retries."""
+        variants = self.cached(query)
+        if variants is not None:
+            return variants
+        messages = [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": USER_PROMPT_TEMPLATE.format(query=query)},
+        ]
+        variants = self._complete(messages, DEFAULT_MAX_TOKENS, parse_variants)
+        self._store(query, variants)
+        return variants
+
+    def generate_batch(self, queries: list[str]) -> tuple[dict[str, list[str]], dict[str, str]]:
+        """
+        Variants for several queries from one prompt. Queries missing from the
+        answer are retried one by one.
+
+        Returns:
+            ({query: variants}, {query: error} for queries that failed)
+        """
+        unique = list(dict.fromkeys(queries))
+        messages = [
+            {"role": "system", "content": BATCH_SYSTEM_PROMPT},
+            {"role": "user", "content": BATCH_USER_PROMPT_TEMPLATE.format(
+                queries="\n".join(f'- "{q}"' for q in unique))},
+        ]
+        try:
+            parsed = self._complete(messages, DEFAULT_MAX_TOKENS * len(unique),
+                                    lambda content: parse_batch_variants(content, unique))
+        except VariantGenerationError:
+            parsed = {}
+        for query, variants in parsed.items():
+            self._store(query, variants)
+        errors = {}
+        for query in unique:
+            if query not in parsed:
+                try:
+                    parsed[query] = self.generate(query)
+                except VariantGenerationError as e:
+                    errors[query] = str(e)
+        return parsed, errors
+
+    def generate_many(self, queries: list[str], progress: bool = True) -> tuple[list[list[str]], dict[int, str]]:
+        """
+        Variants for many queries, concurrently.
+
+        Returns:
+            (variants in input order, {index: error} for queries that failed);
+            failed queries have [] as variants
+        """
+        results = [[] for _ in queries]
+        failures = {}
+
+        # Cache hits never reach the API (nor take a slot in a batched prompt)
+        pending = []
+        for i, query in enumerate(queries):
+            variants = self.cached(query)
+            if variants is not None:
+                results[i] = variants
+            else:
+                pending.append(i)
+        chunks = [pending[i:i + self.batch_size] for i in range(0, len(pending), self.batch_size)]
+
+        def run(indexes: list[int]) -> tuple[dict[str, list[str]], dict[str, str]]:
+            if len(indexes) > 1:
+                return self.generate_batch([queries[i] for i in indexes])
+            query = queries[indexes[0]]
+            try:
+                return {query: self.generate(query)}, {}
+            except VariantGenerationError as e:
+                return {}, {query: str(e)}
+
+        done = len(queries) - len(pending)
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            futures = {pool.submit(run, indexes): indexes for indexes in chunks}
+            for future in as_completed(futures):
+                indexes = futures[future]
+                by_query, errors = future.result()
+                for i in indexes:
+                    if queries[i] in by_query:
+                        results[i] = by_query[queries[i]]
+                    else:
+                        failures[i] = errors.get(queries[i], "No variants in answer")
+                done += len(indexes)
+                if progress:
+                    print(f"\rGenerating variants: {done}/{len(queries)} ({len(failures)} failed)",
+                          end="", file=sys.stderr, flush=True)
+        if progress:
+            print(file=sys.stderr)
+        return results, failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate query variants concurrently under rate limits")
+    parser.add_argument("--input", "-i", required=True, help="JSONL file with a \"query\" per line")
+    parser.add_argument("--output", "-o", required=True, help="JSONL output: query, variants (and error)")
+    parser.add_argument("--model", default=DEFAULT_MODEL, help=f"Chat model (default: {DEFAULT_MODEL})")
+    parser.add_argument("--concurrency", "-c", type=int, default=DEFAULT_CONCURRENCY,
+                        help=f"Requests in flight (default: {DEFAULT_CONCURRENCY})")
+    parser.add_argument("--rpm", type=int, default=DEFAULT_RPM, help=f"Requests per minute (default: {DEFAULT_RPM})")
+    parser.add_argument("--tpm", type=int, default=DEFAULT_TPM, help=f"Tokens per minute (default: {DEFAULT_TPM})")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                        help=f"Queries per prompt (default: {DEFAULT_BATCH_SIZE})")
+    parser.add_argument("--max-retries", type=int, default=DEFAULT_MAX_RETRIES,
+                        help=f"Retries per request (default: {DEFAULT_MAX_RETRIES})")
+    parser.add_argument("--variant-cache", nargs="?", const=DEFAULT_VARIANT_CACHE_PATH,
+                        help=f"Store generated variants in a cache file (default: {DEFAULT_VARIANT_CACHE_PATH})")
+    parser.add_argument("--reuse-variants", action="store_true",
+                        help="Serve cached variants instead of calling the API (implies --variant-cache)")
+    args = parser.parse_args()
+
+    if not HAS_OPENAI:
+        print("Error: openai is required for variant generation. Install with: pip install openai", file=sys.stderr)
+        return 1
+
+    with open(args.input, "r", encoding="utf-8") as f:
+        queries = [json.loads(line)["query"] for line in f if line.strip()]
+
+    cache_path = args.variant_cache or (DEFAULT_VARIANT_CACHE_PATH if args.reuse_variants else None)
+    cache = VariantCache(cache_path) if cache_path else None
+    generator = VariantGenerator(
+        OpenAI(api_key=os.getenv("OPENAI_API_KEY")),
+        model=args.model,
+        rpm=args.rpm,
+        tpm=args.tpm,
+        concurrency=args.concurrency,
+        max_retries=args.max_retries,
+        batch_size=args.batch_size,
+        cache=cache,
+        reuse=args.reuse_variants,
+    )
+    start = time.time()
+    try:
+        variants, failures = generator.generate_many(queries)
+    finally:
+        if cache:
+            cache.close()
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        for i, query in enumerate(queries):
+            record = {"query": query, "variants": variants[i]}
+            if i in failures:
+                record["error"] = failures[i]
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    stats = generator.stats
+    print(f"{len(queries) - len(failures)}/{len(queries)} queries in {time.time() - start:.1f}s "
+          f"({stats['requests']} requests, {stats['retries']} retries, {stats['rate_limited']} rate limited, "
+          f"{stats['tokens']} tokens, {stats['cache_hits']} cached)")
+    if failures:
+        print(f"{len(failures)} queries failed; see \"error\" in {args.output}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    exit(main())
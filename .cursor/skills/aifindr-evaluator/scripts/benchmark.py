@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+"""
+Benchmarks of the evaluation toolchain hot paths, with regression tracking.
+
+Each case runs on synthetic data at every --sizes value (rows, or events for
+the SSE case) and keeps the median of --repeat runs:
+
+- sse_parse: ask_with_sse over in-memory streams (httpx.MockTransport, no
+  network). Streams come from --recordings (sse_recorder.py), cycled until
+  the size is reached, or are generated by mock_server.MockAgent.
+- xlsx_report / markdown_report: create_xlsx_report / create_markdown_report
+- get_next_id: dataset_rows.get_next_id over existing_rows (dataset-builder)
+- jsonl_roundtrip: write responses.jsonl and read it back with iter_results
+
+Runs are appended to a history file. A case is a regression when it is
+more than --threshold percent slower than the median of its last
+--baseline-runs runs (on the same data), and by more than NOISE_FLOOR_S;
+the script then exits with status 1 and does not save the run, so a
+regression never becomes part of the baseline (--accept-regressions saves it
+anyway, for an intended slowdown).
+
+Usage:
+    python benchmark.py                          # all cases at 100, 10k and 100k rows
+    python benchmark.py --sizes 100,10000 --cases sse_parse,markdown_report --threshold 20
+
+    # Parse real traffic recorded with run_driver.py --record
+    python benchmark.py --cases sse_parse --recordings evals/project/runs/2026-01-21_14-30-45/sse_sessions.jsonl.gz
+
+    # Compare without recording the run (e.g. on a feature branch)
+    python benchmark.py --no-save
+
+    # An intended slowdown: record it as the new baseline
+    python benchmark.py --accept-regressions
+"""
+
+import argparse
+import json
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+import httpx
+
+import skill_paths  # noqa: F401  (dataset_rows lives in the dataset builder)
+from dataset_rows import get_next_id
+from fetch_response import SSEAnswerParser, ask_with_sse
+from generate_report import HAS_OPENPYXL, create_markdown_report, create_xlsx_report, iter_results
+from mock_server import MockAgent
+from sse_recorder import iter_sessions
+
+
+DEFAULT_SIZES = [100, 10_000, 100_000]
+DEFAULT_REPEAT = 3
+DEFAULT_HISTORY_PATH = ".benchmark_history.jsonl"
+DEFAULT_THRESHOLD = 25.0
+DEFAULT_BASELINE_RUNS = 5
+# Slowdowns smaller than this are timer noise, whatever the percentage
+NOISE_FLOOR_S = 0.005
+
+VERDICTS = ["PASS", "PARTIAL", "FAIL", "NO_RETRIEVAL"]
+PRODUCTS = ["SCTR", "Vida Ley", "Salud", "Vehicular"]
+
+
+class SkipCase(Exception):
+    """A case that cannot run here (missing optional dependency or input)."""
+
+
+# =============================================================================
+# Synthetic data
+# =============================================================================
+
+def synthetic_results(n: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """Evaluation results shaped like score_verdicts.py output."""
+    rng = random.Random(seed)
+    words = "seguro póliza cobertura prima siniestro beneficiario asegurado deducible plazo renta".split()
+
+    def sentence(length: int) -> str:
+        return " ".join(rng.choice(words) for _ in range(length)).capitalize() + "."
+
+    results = []
+    for i in range(1, n + 1):
+        verdict = rng.choice(VERDICTS)
+        results.append({
+            "id": i,
+            "query": f"¿{sentence(8)[:-1]}?",
+            "expected": sentence(30),
+            "response": " ".join(sentence(20) for _ in range(4)),
+            "product": rng.choice(PRODUCTS),
+            "verdict": verdict,
+            "confidence": round(rng.random(), 2),
+            "needs_review": rng.random() < 0.2,
+            "num_sources": rng.randint(0, 10),
+            "latency_s": round(rng.uniform(1, 12), 2),
+            "conversation_s": round(rng.uniform(0.05, 0.5), 3),
+            "ttfb_s": round(rng.uniform(0.1, 1), 3),
+            "retrieval_s": round(rng.uniform(0.2, 2), 3),
+            "ttft_s": round(rng.uniform(0.5, 4), 3),
+            "tokens_per_s": round(rng.uniform(20, 90), 1),
+            "notes": sentence(6) if verdict != "PASS" else "",
+        })
+    return results
+
+
+def recorded_streams(path: Optional[str]) -> Iterator[tuple[bytes, int]]:
+    """(raw /ask body, events) per session of a recordings file, or of MockAgent streams."""
+    if path:
+        sessions = list(iter_sessions(path))
+        if not sessions:
+            raise SkipCase(f"no sessions in {path}")
+        while True:
+            for session in sessions:
+                body = b"".join(
+                    f"event: {event}\ndata: {data}\n\n".encode("utf-8") for _, event, data in session["events"]
+                )
+                yield body, len(session["events"])
+
+    agent = MockAgent(num_sources=10, chunk_chars=1500, answer_chars=2000)
+    k = 0
+    while True:
+        k += 1
+        _, steps = agent.plan(f"consulta {k}")
+        chunks = [data for _, data in steps if data]
+        yield b"".join(chunks), len(chunks)
+
+
+# =============================================================================
+# Cases: each takes (size, workdir, args) and returns a zero-argument callable
+# that runs the measured work once
+# =============================================================================
+
+def case_sse_parse(size: int, workdir: Path, args) -> Callable[[], None]:
+    streams, events = [], 0
+    for body, count in recorded_streams(args.recordings):
+        streams.append(body)
+        events += count
+        if events >= size:
+            break
+
+    bodies = iter(())
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, headers={"Content-Type": "text/event-stream"}, content=next(bodies))
+
+    client = httpx.Client(transport=httpx.MockTransport(handler))
+
+    def run():
+        nonlocal bodies
+        bodies = iter(streams)
+        for _ in streams:
+            ask_with_sse(client, {}, "http://benchmark", "conv", "query", parser=SSEAnswerParser())
+
+    return run
+
+
+def case_xlsx_report(size: int, workdir: Path, args) -> Callable[[], None]:
+    if not HAS_OPENPYXL:
+        raise SkipCase("openpyxl not installed (pip install openpyxl)")
+    results = synthetic_results(size)
+    return lambda: create_xlsx_report(results, str(workdir / "results.xlsx"), {"project": "benchmark"})
+
+
+def case_markdown_report(size: int, workdir: Path, args) -> Callable[[], None]:
+    results = synthetic_results(size)
+    return lambda: create_markdown_report(results, str(workdir / "report.md"), {"project": "benchmark"})
+
+
+def case_get_next_id(size: int, workdir: Path, args) -> Callable[[], None]:
+    rows = [
+        {"meta.id": i if i % 3 else str(i), "query": f"consulta {i}", "meta.product": PRODUCTS[i % len(PRODUCTS)]}
+        for i in range(1, size + 1)
+    ]
+    return lambda: get_next_id(rows)
+
+
+def case_jsonl_roundtrip(size: int, workdir: Path, args) -> Callable[[], None]:
+    results = synthetic_results(size)
+    path = workdir / "responses.jsonl"
+
+    def run():
+        with open(path, "w", encoding="utf-8") as f:
+            for result in results:
+                f.write(json.dumps(result, ensure_ascii=False) + "\n")
+        for _ in iter_results(str(path)):
+            pass
+
+    return run
+
+
+CASES = {
+    "sse_parse": case_sse_parse,
+    "xlsx_report": case_xlsx_report,
+    "markdown_report": case_markdown_report,
+    "get_next_id": case_get_next_id,
+    "jsonl_roundtrip": case_jsonl_roundtrip,
+}
+
+
+# =============================================================================
+# Running, history and regression checks
+# =============================================================================
+
+def measure(run: Callable[[], None], repeat: int) -> float:
+    """Median wall time (seconds) of repeat runs."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def run_benchmarks(cases: List[str], sizes: List[int], args) -> List[Dict[str, Any]]:
+    """Measure every case at every size. Returns one entry per (case, size)."""
+    entries = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in cases:
+            for size in sizes:
+                entry = {"case": name, "size": size, "data": "synthetic"}
+                if name == "sse_parse" and args.recordings:
+                    entry["data"] = Path(args.recordings).name
+                try:
+                    run = CASES[name](size, Path(tmp), args)
+                except SkipCase as e:
+                    entry["skipped"] = str(e)
+                    print(f"  {name:<16} {size:>8,}  skipped: {e}", file=sys.stderr)
+                    entries.append(entry)
+                    break
+                seconds = measure(run, args.repeat)
+                entry["seconds"] = round(seconds, 6)
+                entry["per_s"] = round(size / seconds, 1) if seconds else None
+                print(f"  {name:<16} {size:>8,}  {seconds:9.4f}s  {entry['per_s'] or 0:>12,.0f}/s", file=sys.stderr)
+                entries.append(entry)
+    return entries
+
+
+def load_history(path: str) -> List[Dict[str, Any]]:
+    if not Path(path).exists():
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def find_regressions(
+    entries: List[Dict[str, Any]],
+    history: List[Dict[str, Any]],
+    threshold: float = DEFAULT_THRESHOLD,
+    baseline_runs: int = DEFAULT_BASELINE_RUNS
+) -> List[Dict[str, Any]]:
+    """
+    Compare entries against the median of the same (case, size, data) in the last runs.
+
+    Returns:
+        Each entry with a baseline, as {"case", "size", "seconds",
+        "baseline_s", "change_pct", "regression"}
+    """
+    comparisons = []
+    for entry in entries:
+        if "seconds" not in entry:
+            continue
+        past = [
+            e["seconds"] for run in history for e in run["results"]
+            if (e["case"], e["size"], e.get("data")) == (entry["case"], entry["size"], entry["data"])
+            and "seconds" in e
+        ][-baseline_runs:]
+        if not past:
+            continue
+        baseline = statistics.median(past)
+        slowdown = entry["seconds"] - baseline
+        change = slowdown / baseline * 100 if baseline else 0.0
+        comparisons.append({
+            "case": entry["case"],
+            "size": entry["size"],
+            "seconds": entry["seconds"],
+            "baseline_s": round(baseline, 6),
+            "change_pct": round(change, 1),
+            "regression": change > threshold and slowdown > NOISE_FLOOR_S,
+        })
+    return comparisons
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip() or None
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the evaluation toolchain hot paths")
+    parser.add_argument("--cases", default=",".join(CASES),
+                        help=f"Comma-separated cases (default: all of {', '.join(CASES)})")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help=f"Comma-separated sizes (default: {','.join(map(str, DEFAULT_SIZES))})")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT,
+                        help=f"Runs per case and size; the median is kept (default: {DEFAULT_REPEAT})")
+    parser.add_argument("--recordings", help="sse_parse: sse_sessions.jsonl.gz to parse instead of synthetic streams")
+    parser.add_argument("--history", default=DEFAULT_HISTORY_PATH,
+                        help=f"History file (default: {DEFAULT_HISTORY_PATH})")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help=f"Percent slowdown that counts as a regression (default: {DEFAULT_THRESHOLD:g})")
+    parser.add_argument("--baseline-runs", type=int, default=DEFAULT_BASELINE_RUNS,
+                        help=f"Past runs whose median is the baseline (default: {DEFAULT_BASELINE_RUNS})")
+    parser.add_argument("--no-save", action="store_true", help="Do not append this run to the history")
+    parser.add_argument("--accept-regressions", action="store_true",
+                        help="Append this run to the history even if it regresses (new baseline)")
+    parser.add_argument("--json", action="store_true", help="Print the run and comparisons as JSON")
+    args = parser.parse_args()
+
+    cases = [c.strip() for c in args.cases.split(",") if c.strip()]
+    unknown = [c for c in cases if c not in CASES]
+    if unknown:
+        parser.error(f"Unknown cases: {', '.join(unknown)}")
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+
+    print(f"Benchmarking {len(cases)} cases at sizes {sizes} (median of {args.repeat})", file=sys.stderr)
+    entries = run_benchmarks(cases, sizes, args)
+    history = load_history(args.history)
+    comparisons = find_regressions(entries, history, args.threshold, args.baseline_runs)
+
+    run = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "recordings": args.recordings,
+        "results": entries,
+    }
+    regressions = [c for c in comparisons if c["regression"]]
+    if not args.no_save and (not regressions or args.accept_regressions):
+        with open(args.history, "a", encoding="utf-8") as f:
+            f.write(json.dumps(run, ensure_ascii=False) + "\n")
+    if args.json:
+        print(json.dumps({"run": run, "comparisons": comparisons}, ensure_ascii=False, indent=2))
+    elif comparisons:
+        print(f"\nAgainst the median of the last {args.baseline_runs} runs in {args.history}:")
+        for c in comparisons:
+            flag = "  REGRESSION" if c["regression"] else ""
+            print(f"  {c['case']:<16} {c['size']:>8,}  {c['baseline_s']:9.4f}s -> {c['seconds']:9.4f}s "
+                  f"({c['change_pct']:+.1f}%){flag}")
+    else:
+        print(f"\nNo earlier runs in {args.history} to compare with")
+
+    if regressions:
+        print(f"\n{len(regressions)} regressions over {args.threshold:g}%", file=sys.stderr)
+        if not args.no_save and not args.accept_regressions:
+            print(f"Run not saved to {args.history} (--accept-regressions to make it the new baseline)",
+                  file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Chunk-level diff between two knowledge-base versions in Weaviate.
+
+Each publication creates a new tenant, org_<orgId>-prj_<projectId>-<versionId>,
+of the Knowledge class. This streams the objects of both tenants with the
+e2e skill's Weaviate reader (verify_weaviate.py: one cursor page of each tenant
+per request), hashes text + metadata per chunk_external_id (only the hashes
+are kept in memory) and reports the added, removed and changed chunks in
+time linear in the chunk count.
+
+Given the responses of a previous run (fetched with --show-sources or
+--full-sources), it also selects the queries worth re-evaluating: those whose
+retrieved chunks were changed or removed or, with --scope document (default),
+belong to a document (source) with any added, changed or removed chunk.
+Results without sources can't be placed and are always selected.
+
+Usage:
+    # Two latest versions of a project
+    python chunk_diff.py --prefix org_xxx-prj_yyy
+
+    # Explicit versions, full diff as JSON
+    python chunk_diff.py --old org_xxx-prj_yyy-v1 --new org_xxx-prj_yyy-v2 --json
+
+    # Queries to re-run after a publication, then re-run only those
+    python chunk_diff.py --prefix org_xxx-prj_yyy \
+        --results evals/project/runs/2026-01-21_14-30-45/responses.jsonl \
+        --queries queries.jsonl --queries-out changed_queries.jsonl
+    python run_driver.py --input changed_queries.jsonl --project prj_yyy --runs-dir evals/project/runs
+
+Environment:
+    WEAVIATE_URL  Weaviate base URL when --url is not given (default: http://localhost:9000)
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import sys
+from collections import Counter, defaultdict
+from typing import Optional
+
+import httpx
+
+import skill_paths  # noqa: F401  (verify_weaviate lives in the e2e skill)
+from generate_report import iter_results
+from retrieval_metrics import ranked_chunks
+from verify_weaviate import DEFAULT_CLASS, DEFAULT_PAGE_SIZE, DEFAULT_URL, WeaviateVerifier, latest_pair
+
+
+# Properties hashed for every chunk
+DIFF_FIELDS = (
+    "chunk_external_id source text "
+    "metadata { totalChunks chunkNumber fromLine toLine } "
+    "_additional { id }"
+)
+
+
+def chunk_hash(obj: dict) -> str:
+    """Digest of a chunk's text and metadata (key order independent)."""
+    content = json.dumps(
+        {"text": obj.get("text"), "metadata": obj.get("metadata")},
+        ensure_ascii=False, sort_keys=True, separators=(",", ":")
+    )
+    return hashlib.blake2b(content.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class ChunkIndex:
+    """chunk_external_id -> (hash, source) of one tenant, built from a stream of objects."""
+
+    def __init__(self, tenant: str):
+        self.tenant = tenant
+        self.chunks: dict[str, tuple[str, str]] = {}
+        self.duplicates = 0
+
+    def add(self, obj: dict) -> None:
+        chunk_id = str(obj.get("chunk_external_id") or obj["_additional"]["id"])
+        digest = chunk_hash(obj)
+        if chunk_id in self.chunks:
+            # Same id stored twice: the pair of digests, order independent
+            self.duplicates += 1
+            digest = "|".join(sorted((self.chunks[chunk_id][0], digest)))
+        self.chunks[chunk_id] = (digest, str(obj.get("source") or ""))
+
+    def __len__(self) -> int:
+        return len(self.chunks)
+
+
+async def read_indexes(
+    verifier: WeaviateVerifier,
+    old_tenant: Optional[str],
+    new_tenant: Optional[str],
+    prefix: Optional[str] = None
+) -> tuple[ChunkIndex, ChunkIndex]:
+    """
+    Index two tenants, streaming a cursor page of both per request.
+
+    Args:
+        verifier: Reader of the Weaviate class
+        old_tenant, new_tenant: Tenants to compare (ignored with prefix)
+        prefix: Compare the two latest tenants starting with this instead
+    """
+    async with httpx.AsyncClient(timeout=verifier.timeout) as client:
+        if prefix:
+            old_tenant, new_tenant = latest_pair(await verifier.tenants(client), prefix)
+        indexes = {old_tenant: ChunkIndex(old_tenant), new_tenant: ChunkIndex(new_tenant)}
+        async for tenant, page in verifier.pages(client, list(indexes), DIFF_FIELDS):
+            if isinstance(page, str):
+                raise RuntimeError(f"{tenant}: {page}")
+            for obj in page:
+                indexes[tenant].add(obj)
+    return indexes[old_tenant], indexes[new_tenant]
+
+
+def diff_indexes(old: ChunkIndex, new: ChunkIndex) -> dict:
+    """
+    Added, removed and changed chunk ids between two versions.
+
+    Returns:
+        Dict with the tenants, chunk counts, sorted id lists and the sources
+        of every touched chunk ("sources": source -> counts per change)
+    """
+    added, changed = [], []
+    for chunk_id, (digest, _) in new.chunks.items():
+        previous = old.chunks.get(chunk_id)
+        if previous is None:
+            added.append(chunk_id)
+        elif previous[0] != digest:
+            changed.append(chunk_id)
+    removed = [chunk_id for chunk_id in old.chunks if chunk_id not in new.chunks]
+
+    sources: dict[str, Counter] = defaultdict(Counter)
+    for kind, ids, index in (("added", added, new), ("removed", removed, old), ("changed", changed, new)):
+        for chunk_id in ids:
+            sources[index.chunks[chunk_id][1]][kind] += 1
+
+    return {
+        "old": {"tenant": old.tenant, "chunks": len(old), "duplicate_ids": old.duplicates},
+        "new": {"tenant": new.tenant, "chunks": len(new), "duplicate_ids": new.duplicates},
+        "added": sorted(added),
+        "removed": sorted(removed),
+        "changed": sorted(changed),
+        "unchanged": len(new) - len(added) - len(changed),
+        "sources": {source: dict(counts) for source, counts in sorted(sources.items())},
+    }
+
+
+def affected_results(rows, diff: dict, old: ChunkIndex, scope: str = "document") -> list[dict]:
+    """
+    Results whose retrieved chunks touch the diff.
+
+    Args:
+        rows: Results with "sources" (--show-sources) or "retrieval" (--full-sources)
+        diff: diff_indexes output
+        old: Index of the version the results were fetched against (maps
+            retrieved chunk ids to their source)
+        scope: "chunk" (retrieved chunk changed or removed) or "document"
+            (also any change in the retrieved chunk's source)
+
+    Returns:
+        The selected rows, each with a "reason" key added
+    """
+    touched = set(diff["changed"]) | set(diff["removed"])
+    touched_sources = set(diff["sources"])
+    selected = []
+    for row in rows:
+        chunk_ids = [chunk_id for chunk_id, _ in ranked_chunks(row) if chunk_id]
+        if not chunk_ids:
+            reason = "no sources"
+        elif touched.intersection(chunk_ids):
+            reason = f"{len(touched.intersection(chunk_ids))} retrieved chunks changed or removed"
+        elif scope == "document":
+            sources = {old.chunks[c][1] for c in chunk_ids if c in old.chunks} & touched_sources
+            reason = f"retrieved documents changed: {', '.join(sorted(sources))}" if sources else None
+        else:
+            reason = None
+        if reason:
+            selected.append({**row, "reason": reason})
+    return selected
+
+
+def select_queries(selected: list[dict], queries_path: Optional[str]) -> list[dict]:
+    """Original query items of the selected results (by id, else query text), or id + query from the results."""
+    if not queries_path:
+        return [{"id": r.get("id"), "query": r.get("query")} for r in selected]
+    ids = {str(r["id"]) for r in selected if r.get("id") is not None}
+    texts = {r.get("query") for r in selected}
+    items = []
+    for item in iter_results(queries_path):
+        if (str(item["id"]) in ids) if item.get("id") is not None else (item.get("query") in texts):
+            items.append(item)
+    return items
+
+
+def print_summary(diff: dict, selected: Optional[list[dict]], total: int, limit: int = 20) -> None:
+    print(f"Old: {diff['old']['tenant']} ({diff['old']['chunks']} chunks)")
+    print(f"New: {diff['new']['tenant']} ({diff['new']['chunks']} chunks)")
+    for side in ("old", "new"):
+        if diff[side]["duplicate_ids"]:
+            print(f"⚠️  {diff[side]['duplicate_ids']} duplicated chunk_external_id in {diff[side]['tenant']}")
+    print(f"\nAdded: {len(diff['added'])}  Removed: {len(diff['removed'])}  "
+          f"Changed: {len(diff['changed'])}  Unchanged: {diff['unchanged']}")
+
+    if diff["sources"]:
+        print(f"\n{'Source':<60} {'+':>6} {'-':>6} {'~':>6}")
+        ranked = sorted(diff["sources"].items(), key=lambda item: -sum(item[1].values()))
+        for source, counts in ranked[:limit]:
+            print(f"{source[:60]:<60} {counts.get('added', 0):>6} {counts.get('removed', 0):>6} "
+                  f"{counts.get('changed', 0):>6}")
+        if len(ranked) > limit:
+            print(f"... {len(ranked) - limit} more sources")
+
+    if selected is not None:
+        print(f"\nQueries to re-evaluate: {len(selected)} of {total}")
+        for row in selected[:limit]:
+            print(f"  [{row.get('id')}] {str(row.get('query', ''))[:60]}  ({row['reason']})")
+        if len(selected) > limit:
+            print(f"  ... {len(selected) - limit} more")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chunk-level diff between two Weaviate tenant versions")
+    parser.add_argument("--old", help="Tenant of the previous version")
+    parser.add_argument("--new", help="Tenant of the new version")
+    parser.add_argument("--prefix", help="Diff the two latest tenants starting with this (e.g. org_xxx-prj_yyy)")
+    parser.add_argument("--url", help=f"Weaviate URL (default: $WEAVIATE_URL or {DEFAULT_URL})")
+    parser.add_argument("--class-name", default=DEFAULT_CLASS, help=f"Class (default: {DEFAULT_CLASS})")
+    parser.add_argument("--page-size", type=int, default=DEFAULT_PAGE_SIZE,
+                        help=f"Objects per cursor page (default: {DEFAULT_PAGE_SIZE})")
+    parser.add_argument("--results", "-r", help="responses.jsonl of a run against the old version (with sources)")
+    parser.add_argument("--scope", choices=["chunk", "document"], default="document",
+                        help="Select queries whose retrieved chunks (chunk) or their documents (document) changed")
+    parser.add_argument("--queries", help="Original queries file, to copy the selected items from")
+    parser.add_argument("--queries-out", help="Write the queries to re-evaluate here (JSONL)")
+    parser.add_argument("--json", action="store_true", help="Print the diff (and selection) as JSON")
+    args = parser.parse_args()
+
+    if not args.prefix and not (args.old and args.new):
+        parser.error("--old and --new, or --prefix, are required")
+    if args.queries_out and not args.results:
+        parser.error("--queries-out needs --results")
+
+    verifier = WeaviateVerifier(args.url, args.class_name, args.page_size)
+    try:
+        old, new = asyncio.run(read_indexes(verifier, args.old, args.new, args.prefix))
+    except (httpx.HTTPError, RuntimeError, ValueError) as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        return 1
+
+    diff = diff_indexes(old, new)
+    selected, total = None, 0
+    if args.results:
+        rows = list(iter_results(args.results))
+        total = len(rows)
+        selected = affected_results(rows, diff, old, args.scope)
+
+    if args.queries_out:
+        items = select_queries(selected, args.queries)
+        with open(args.queries_out, "w", encoding="utf-8") as f:
+            for item in items:
+                f.write(json.dumps(item, ensure_ascii=False) + "\n")
+        print(f"Wrote {len(items)} queries to {args.queries_out}", file=sys.stderr)
+
+    if args.json:
+        if selected is not None:
+            diff["queries"] = [{"id": r.get("id"), "query": r.get("query"), "reason": r["reason"]} for r in selected]
+        print(json.dumps(diff, ensure_ascii=False, indent=2))
+    else:
+        print_summary(diff, selected, total)
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
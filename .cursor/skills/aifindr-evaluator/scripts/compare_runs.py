@@ -0,0 +1,468 @@
+#!/usr/bin/env python3
+"""
+Compare evaluation runs: verdict changes and latency regressions.
+
+Runs are joined by query id. The first run is the baseline and every other run
+is compared against it: verdict transitions (PASS→FAIL, ...), per-query latency
+deltas, and a Mann-Whitney U test on the latency distributions. A run is flagged
+as a performance regression when a latency percentile grows by more than
+--threshold percent and the difference is significant at --alpha.
+
+Usage:
+    python compare_runs.py evals/project/runs/2026-01-20_10-00-00 evals/project/runs/2026-01-21_14-30-45
+    python compare_runs.py runs/A runs/B runs/C --output comparison.md --json comparison.json \
+        --metric ttft_s --threshold 15 --fail-on-regression
+
+A run is a run folder or a results file. In a folder, verdicts are read from
+results.jsonl, results.json or results.xlsx (in that order) and merged by id
+with the timings in responses.jsonl.
+"""
+
+import argparse
+import json
+import math
+from collections import Counter
+from pathlib import Path
+
+from generate_report import TIMING_FIELDS, VERDICTS, iter_results, percentile
+
+try:
+    import openpyxl
+    HAS_OPENPYXL = True
+except ImportError:
+    HAS_OPENPYXL = False
+
+
+RESULT_FILES = ["results.jsonl", "results.json", "results.xlsx"]
+RESPONSES_FILE = "responses.jsonl"
+
+DEFAULT_METRIC = "latency_s"
+DEFAULT_THRESHOLD_PCT = 10.0
+DEFAULT_ALPHA = 0.05
+DEFAULT_TOP = 20
+
+# Higher is better; used to tell regressions from improvements
+VERDICT_RANK = {"PASS": 2, "PARTIAL": 1, "FAIL": 0, "NO_RETRIEVAL": 0}
+
+
+# =============================================================================
+# Loading runs
+# =============================================================================
+
+def iter_xlsx_results(path: str):
+    """Yield result dicts from the "Evaluation Results" sheet of a results.xlsx."""
+    if not HAS_OPENPYXL:
+        raise ImportError("openpyxl is required to read results.xlsx. Install with: pip install openpyxl")
+    wb = openpyxl.load_workbook(path, read_only=True)
+    try:
+        rows = wb["Evaluation Results"].iter_rows(values_only=True)
+        headers = [str(h).lower() for h in next(rows, ())]
+        for row in rows:
+            yield {h: v for h, v in zip(headers, row) if v is not None}
+    finally:
+        wb.close()
+
+
+def index_by_id(results) -> dict:
+    """Index results by str(id); results without an id are skipped."""
+    return {str(r["id"]): r for r in results if r.get("id") not in (None, "")}
+
+
+def load_run(path: str) -> dict:
+    """
+    Load one run as {id: result}.
+
+    Args:
+        path: Run folder, or a results .json/.jsonl/.xlsx file
+
+    Returns:
+        Dict of str(id) -> result dict (verdicts merged over responses.jsonl timings)
+    """
+    run_path = Path(path)
+    if run_path.is_file():
+        results = iter_xlsx_results(path) if run_path.suffix == ".xlsx" else iter_results(path)
+        return index_by_id(results)
+
+    if not run_path.is_dir():
+        raise FileNotFoundError(f"Run not found: {path}")
+
+    run = {}
+    responses = run_path / RESPONSES_FILE
+    if responses.exists():
+        run = index_by_id(r for r in iter_results(str(responses)) if "error" not in r)
+
+    for name in RESULT_FILES:
+        results_path = run_path / name
+        if results_path.exists():
+            results = iter_xlsx_results(str(results_path)) if name.endswith(".xlsx") else iter_results(str(results_path))
+            for rid, result in index_by_id(results).items():
+                run[rid] = {**run.get(rid, {}), **result}
+            break
+
+    if not run:
+        raise FileNotFoundError(f"No {RESPONSES_FILE} or results file in {path}")
+    return run
+
+
+def verdict_of(result: dict) -> str:
+    return str(result.get("verdict") or "").upper()
+
+
+def metric_of(result: dict, metric: str):
+    # Cached results replay the timings of the original fetch
+    if result.get("cached"):
+        return None
+    value = result.get(metric)
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    return None
+
+
+# =============================================================================
+# Statistics
+# =============================================================================
+
+def mann_whitney_u(baseline: list[float], other: list[float]) -> dict:
+    """
+    Two-sided Mann-Whitney U test (normal approximation, tie and continuity
+    corrected).
+
+    Returns:
+        Dict with u (for `other`), z, p_value and prob_greater, the probability
+        that a value from `other` exceeds one from `baseline` (0.5 = no shift).
+        p_value is None when either sample has fewer than 2 values.
+    """
+    n1, n2 = len(baseline), len(other)
+    if n1 < 2 or n2 < 2:
+        return {"u": None, "z": None, "p_value": None, "prob_greater": None}
+
+    combined = sorted([(v, 0) for v in baseline] + [(v, 1) for v in other])
+    n = n1 + n2
+    rank_sum_other = 0.0
+    tie_term = 0.0
+    i = 0
+    while i < n:
+        j = i
+        while j + 1 < n and combined[j + 1][0] == combined[i][0]:
+            j += 1
+        avg_rank = (i + j) / 2 + 1
+        ties = j - i + 1
+        tie_term += ties ** 3 - ties
+        rank_sum_other += avg_rank * sum(1 for k in range(i, j + 1) if combined[k][1] == 1)
+        i = j + 1
+
+    u = rank_sum_other - n2 * (n2 + 1) / 2
+    mean = n1 * n2 / 2
+    variance = n1 * n2 / 12 * ((n + 1) - tie_term / (n * (n - 1)))
+    if variance <= 0:
+        return {"u": u, "z": 0.0, "p_value": 1.0, "prob_greater": u / (n1 * n2)}
+
+    diff = u - mean
+    z = (diff - math.copysign(0.5, diff)) / math.sqrt(variance) if diff else 0.0
+    return {
+        "u": u,
+        "z": round(z, 4),
+        "p_value": math.erfc(abs(z) / math.sqrt(2)),
+        "prob_greater": round(u / (n1 * n2), 4),
+    }
+
+
+def distribution(values: list[float]) -> dict:
+    """Count, mean and p50/p95/p99 of a sample (empty dict for no values)."""
+    if not values:
+        return {}
+    return {
+        "count": len(values),
+        "mean": round(sum(values) / len(values), 3),
+        "p50": round(percentile(values, 50), 3),
+        "p95": round(percentile(values, 95), 3),
+        "p99": round(percentile(values, 99), 3),
+    }
+
+
+def pct_change(old, new):
+    if old in (None, 0) or new is None:
+        return None
+    return round((new - old) / old * 100, 1)
+
+
+# =============================================================================
+# Comparison
+# =============================================================================
+
+def compare_pair(
+    baseline: dict,
+    other: dict,
+    metric: str = DEFAULT_METRIC,
+    threshold_pct: float = DEFAULT_THRESHOLD_PCT,
+    alpha: float = DEFAULT_ALPHA,
+    top: int = DEFAULT_TOP
+) -> dict:
+    """
+    Compare one run against the baseline.
+
+    Args:
+        baseline: Baseline run ({id: result}, see load_run)
+        other: Run to compare
+        metric: Timing field to compare (see generate_report.TIMING_FIELDS)
+        threshold_pct: Percentile growth that counts as a regression
+        alpha: Significance level for the Mann-Whitney test
+        top: Number of largest per-query slowdowns to keep
+
+    Returns:
+        Dict with id coverage, verdict transitions, verdict regressions and
+        improvements, metric distributions and deltas, the test result and
+        the performance regression flag
+    """
+    common = [rid for rid in baseline if rid in other]
+
+    transitions = Counter()
+    verdict_regressions = []
+    verdict_improvements = []
+    deltas = []
+    for rid in common:
+        old_v, new_v = verdict_of(baseline[rid]), verdict_of(other[rid])
+        if old_v and new_v and old_v != new_v:
+            transitions[f"{old_v}→{new_v}"] += 1
+            change = {"id": rid, "query": other[rid].get("query", ""), "from": old_v, "to": new_v}
+            if VERDICT_RANK.get(new_v, 0) < VERDICT_RANK.get(old_v, 0):
+                verdict_regressions.append(change)
+            elif VERDICT_RANK.get(new_v, 0) > VERDICT_RANK.get(old_v, 0):
+                verdict_improvements.append(change)
+
+        old_m, new_m = metric_of(baseline[rid], metric), metric_of(other[rid], metric)
+        if old_m is not None and new_m is not None:
+            deltas.append({
+                "id": rid,
+                "query": other[rid].get("query", ""),
+                "baseline": old_m,
+                "value": new_m,
+                "delta": round(new_m - old_m, 3),
+                "delta_pct": pct_change(old_m, new_m),
+            })
+
+    base_values = [v for v in (metric_of(r, metric) for r in baseline.values()) if v is not None]
+    other_values = [v for v in (metric_of(r, metric) for r in other.values()) if v is not None]
+    base_dist, other_dist = distribution(base_values), distribution(other_values)
+    test = mann_whitney_u(base_values, other_values)
+
+    change_pct = {
+        p: pct_change(base_dist.get(p), other_dist.get(p)) for p in ["p50", "p95", "p99", "mean"]
+    }
+    significant = test["p_value"] is not None and test["p_value"] < alpha
+    grew = [p for p in ["p50", "p95"] if change_pct[p] is not None and change_pct[p] > threshold_pct]
+    slower = (test["prob_greater"] or 0) > 0.5
+
+    deltas.sort(key=lambda d: d["delta"], reverse=True)
+    return {
+        "common": len(common),
+        "only_in_baseline": len(baseline) - len(common),
+        "only_in_run": len(other) - len(common),
+        "transitions": dict(transitions.most_common()),
+        "verdict_counts": {
+            "baseline": {v: sum(1 for r in baseline.values() if verdict_of(r) == v) for v in VERDICTS},
+            "run": {v: sum(1 for r in other.values() if verdict_of(r) == v) for v in VERDICTS},
+        },
+        "verdict_regressions": verdict_regressions,
+        "verdict_improvements": verdict_improvements,
+        "metric": metric,
+        "baseline_dist": base_dist,
+        "run_dist": other_dist,
+        "change_pct": change_pct,
+        "median_delta": round(percentile([d["delta"] for d in deltas], 50), 3) if deltas else None,
+        "test": test,
+        "performance_regression": bool(grew and significant and slower),
+        "regressed_percentiles": grew if significant and slower else [],
+        "slowest": deltas[:top],
+    }
+
+
+def compare_runs(
+    run_paths: list[str],
+    metric: str = DEFAULT_METRIC,
+    threshold_pct: float = DEFAULT_THRESHOLD_PCT,
+    alpha: float = DEFAULT_ALPHA,
+    top: int = DEFAULT_TOP
+) -> dict:
+    """
+    Compare every run against the first one.
+
+    Returns:
+        Dict with the runs, one compare_pair result per non-baseline run, and
+        the verdict history of every query whose verdict changed in any run
+    """
+    if len(run_paths) < 2:
+        raise ValueError("At least two runs are needed")
+    runs = [load_run(path) for path in run_paths]
+    baseline = runs[0]
+
+    comparisons = [
+        {"run": path, **compare_pair(baseline, run, metric, threshold_pct, alpha, top)}
+        for path, run in zip(run_paths[1:], runs[1:])
+    ]
+
+    history = []
+    for rid, result in baseline.items():
+        verdicts = [verdict_of(run[rid]) if rid in run else "" for run in runs]
+        if len({v for v in verdicts if v}) > 1:
+            history.append({"id": rid, "query": result.get("query", ""), "verdicts": verdicts})
+
+    return {
+        "baseline": run_paths[0],
+        "runs": run_paths,
+        "metric": metric,
+        "threshold_pct": threshold_pct,
+        "alpha": alpha,
+        "comparisons": comparisons,
+        "verdict_history": history,
+        "regression": any(c["performance_regression"] or c["verdict_regressions"] for c in comparisons),
+    }
+
+
+# =============================================================================
+# Rendering
+# =============================================================================
+
+def _fmt(value, suffix="") -> str:
+    if value is None:
+        return "-"
+    if isinstance(value, float):
+        return f"{value:+.1f}{suffix}" if suffix == "%" else f"{value:.2f}{suffix}"
+    return f"{value}{suffix}"
+
+
+def _short(text: str, width: int = 50) -> str:
+    text = str(text).replace("\n", " ").replace("|", "\\|")
+    return text[:width] + ("..." if len(text) > width else "")
+
+
+def create_comparison_markdown(comparison: dict, output_path: str) -> str:
+    """Write a Markdown comparison report. Returns the path."""
+    metric = comparison["metric"]
+    label = dict(TIMING_FIELDS).get(metric, metric)
+    lines = [
+        "# Run Comparison",
+        "",
+        f"**Baseline:** {comparison['baseline']}",
+        f"**Metric:** {label} (regression threshold {comparison['threshold_pct']:.0f}%, alpha {comparison['alpha']})",
+        "",
+    ]
+
+    for c in comparison["comparisons"]:
+        status = "⚠️ REGRESSION" if c["performance_regression"] else "OK"
+        lines.extend([
+            f"## {c['run']}",
+            "",
+            f"**Joined queries:** {c['common']} "
+            f"(only in baseline: {c['only_in_baseline']}, only in this run: {c['only_in_run']})",
+            "",
+            "| Verdict | Baseline | Run |",
+            "|---------|----------|-----|",
+        ])
+        for v in VERDICTS:
+            lines.append(f"| {v} | {c['verdict_counts']['baseline'][v]} | {c['verdict_counts']['run'][v]} |")
+
+        if c["transitions"]:
+            lines.extend(["", "**Verdict changes:** " + ", ".join(f"{t}: {n}" for t, n in c["transitions"].items())])
+
+        test = c["test"]
+        p_value = f"{test['p_value']:.4f}" if test["p_value"] is not None else "-"
+        lines.extend([
+            "",
+            f"### {label}: {status}",
+            "",
+            "| | Baseline | Run | Change |",
+            "|---|---|---|---|",
+        ])
+        for p in ["p50", "p95", "p99", "mean"]:
+            lines.append(
+                f"| {p} | {_fmt(c['baseline_dist'].get(p))} | {_fmt(c['run_dist'].get(p))} | "
+                f"{_fmt(c['change_pct'].get(p), '%')} |"
+            )
+        lines.extend([
+            "",
+            f"- **Median per-query delta:** {_fmt(c['median_delta'], 's')}",
+            f"- **Mann-Whitney U:** p = {p_value}, P(run > baseline) = {_fmt(test['prob_greater'])}",
+        ])
+        if c["regressed_percentiles"]:
+            lines.append(f"- **Regressed:** {', '.join(c['regressed_percentiles'])}")
+
+        if c["verdict_regressions"]:
+            lines.extend(["", "### Verdict Regressions", "", "| # | Query | Change |", "|---|-------|--------|"])
+            for r in c["verdict_regressions"]:
+                lines.append(f"| {r['id']} | {_short(r['query'])} | {r['from']} → {r['to']} |")
+
+        if c["verdict_improvements"]:
+            lines.extend(["", "### Verdict Improvements", "", "| # | Query | Change |", "|---|-------|--------|"])
+            for r in c["verdict_improvements"]:
+                lines.append(f"| {r['id']} | {_short(r['query'])} | {r['from']} → {r['to']} |")
+
+        slowest = [d for d in c["slowest"] if d["delta"] > 0]
+        if slowest:
+            lines.extend([
+                "",
+                "### Largest Slowdowns",
+                "",
+                "| # | Query | Baseline | Run | Delta |",
+                "|---|-------|----------|-----|-------|",
+            ])
+            for d in slowest:
+                lines.append(
+                    f"| {d['id']} | {_short(d['query'])} | {d['baseline']:.2f} | {d['value']:.2f} | "
+                    f"{d['delta']:+.2f} ({_fmt(d['delta_pct'], '%')}) |"
+                )
+        lines.append("")
+
+    history = comparison["verdict_history"]
+    if history and len(comparison["runs"]) > 2:
+        names = [Path(r).name or r for r in comparison["runs"]]
+        lines.extend([
+            "## Verdict History",
+            "",
+            "| # | Query | " + " | ".join(names) + " |",
+            "|---|-------|" + "|".join("---" for _ in names) + "|",
+        ])
+        for h in history:
+            lines.append(f"| {h['id']} | {_short(h['query'])} | " + " | ".join(v or "-" for v in h["verdicts"]) + " |")
+        lines.append("")
+
+    Path(output_path).write_text("\n".join(lines), encoding="utf-8")
+    return output_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare evaluation runs (first run is the baseline)")
+    parser.add_argument("runs", nargs="+", help="Run folders or results files, baseline first")
+    parser.add_argument("--output", "-o", default="comparison.md", help="Markdown report path (default: comparison.md)")
+    parser.add_argument("--json", help="Also write the comparison as JSON")
+    parser.add_argument("--metric", "-m", default=DEFAULT_METRIC, choices=[f for f, _ in TIMING_FIELDS],
+                        help=f"Timing field to compare (default: {DEFAULT_METRIC})")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD_PCT,
+                        help=f"Percent growth of p50/p95 that counts as a regression (default: {DEFAULT_THRESHOLD_PCT:.0f})")
+    parser.add_argument("--alpha", type=float, default=DEFAULT_ALPHA,
+                        help=f"Significance level (default: {DEFAULT_ALPHA})")
+    parser.add_argument("--top", type=int, default=DEFAULT_TOP,
+                        help=f"Largest per-query slowdowns to list (default: {DEFAULT_TOP})")
+    parser.add_argument("--fail-on-regression", action="store_true",
+                        help="Exit with status 1 on a verdict or performance regression")
+    args = parser.parse_args()
+
+    if len(args.runs) < 2:
+        parser.error("At least two runs are needed")
+
+    comparison = compare_runs(args.runs, args.metric, args.threshold, args.alpha, args.top)
+    create_comparison_markdown(comparison, args.output)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(comparison, f, ensure_ascii=False, indent=2)
+
+    for c in comparison["comparisons"]:
+        flag = "REGRESSION" if c["performance_regression"] else "ok"
+        print(f"{c['run']}: {c['common']} joined, {len(c['verdict_regressions'])} verdict regressions, "
+              f"{args.metric} p95 {_fmt(c['change_pct']['p95'], '%')} [{flag}]")
+    print(f"Report: {args.output}")
+    return 1 if args.fail_on_regression and comparison["regression"] else 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -6,17 +6,80 @@ Usage:
     python fetch_response.py "¿Qué es el SCTR?" --project prj_xxx --show-sources
     python fetch_response.py --query "¿Qué coberturas tiene?" --json
 
+    # Keep the full retrieval payload for retrieval_metrics.py
+    python fetch_response.py --input queries.jsonl --project prj_xxx --full-sources --output responses.jsonl
+
+    # Batch mode: many queries through one pooled client
+    python fetch_response.py --input queries.jsonl --project prj_xxx --concurrency 8 \
+        --output responses.jsonl
+
+    # Same, but hundreds of streams on one asyncio event loop
+    python fetch_response.py --input queries.jsonl --project prj_xxx --async --concurrency 200
+
+    # Reuse one pre-created conversation per worker over a warm HTTP/2 connection
+    python fetch_response.py --input queries.jsonl --project prj_xxx --reuse-conversations --http2
+
+    # Serve answers from an earlier run when the agent and KB are unchanged
+    python fetch_response.py --input queries.jsonl --project prj_xxx --cache --kb-version v12
+
+    # Record the raw SSE streams next to the output (see sse_recorder.py)
+    python fetch_response.py --input queries.jsonl --project prj_xxx --output run/responses.jsonl --record
+
+    # Against a local mock server (see mock_server.py)
+    python fetch_response.py --input queries.jsonl --project prj_test --base-url http://127.0.0.1:8765
+
 Required environment variables:
     AIFINDR_ORG_ID: Organization ID
     AIFINDR_API_KEY: API key
+
+Optional environment variables:
+    AIFINDR_BASE_URL: API base URL, overridden by --base-url (see resolve_base_url)
 """
 
 import argparse
+import asyncio
 import os
 import json
+import sys
 import time
+import queue
 import httpx
-from typing import Tuple, List, Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import Tuple, List, Dict, Any, Optional, Callable
+
+from run_store import RunStore, DEFAULT_STORE_PATH
+from sse_recorder import RECORDINGS_FILE, SSERecorder
+
+try:
+    import h2  # noqa: F401  (enables httpx HTTP/2 support)
+    HAS_H2 = True
+except ImportError:
+    HAS_H2 = False
+
+
+API_BASE_URL_TEMPLATE = 'https://api.saas.aifindr.ai/api/widget/projects/{project_id}'
+DEFAULT_TIMEOUT = 120.0
+DEFAULT_CONCURRENCY = 4
+# response_cache.py (imported only when a cache is used) shares this default
+DEFAULT_CACHE_PATH = '.aifindr_cache.sqlite'
+
+RETRIEVAL_EVENT = 'search-workflow-knowledge-retrieved'
+ANSWER_DELTA_EVENT = 'search-workflow-answer-delta-generated'
+
+ANSWER_FIELDS = ('text_response', 'product', 'reasoning')
+_WHITESPACE = ' \t\r\n'
+
+
+def resolve_base_url(project_id: str, base_url: Optional[str] = None) -> str:
+    """
+    Base URL of a project's widget API.
+
+    base_url (or env AIFINDR_BASE_URL) replaces the production API, e.g. to
+    point at mock_server.py. A "{project_id}" placeholder in it is filled in;
+    otherwise it is used as is.
+    """
+    template = base_url or os.environ.get('AIFINDR_BASE_URL') or API_BASE_URL_TEMPLATE
+    return template.rstrip('/').format(project_id=project_id)
 
 
 def get_env(name: str) -> str:
@@ -26,20 +89,348 @@ def get_env(name: str) -> str:
     return value
 
 
+def client_options(
+    timeout: float = DEFAULT_TIMEOUT,
+    concurrency: Optional[int] = None,
+    http2: bool = False
+) -> Dict[str, Any]:
+    """
+    Keyword arguments for httpx.Client / httpx.AsyncClient.
+
+    With concurrency, the connection pool keeps that many connections alive
+    between queries. http2 multiplexes all streams over one warm connection
+    and needs the optional h2 package.
+    """
+    if http2 and not HAS_H2:
+        raise ImportError("h2 is required for HTTP/2. Install with: pip install 'httpx[http2]'")
+
+    options = {'timeout': timeout, 'http2': http2}
+    if concurrency:
+        options['limits'] = httpx.Limits(
+            max_connections=concurrency, max_keepalive_connections=concurrency
+        )
+    return options
+
+
+def build_headers(org_id: str, api_key: str) -> dict:
+    """Build the request headers for the AIFindr widget API."""
+    return {
+        'X-Organization-Id': org_id,
+        'Authorization': f'Bearer {api_key}',
+        'Content-Type': 'application/json',
+    }
+
+
+class AnswerJSONStream:
+    """
+    Incremental parser for the answer JSON object streamed as deltas.
+
+    Deltas are kept in a list (joined once, on demand) and scanned exactly
+    once, character by character. Each top-level field is decoded as soon as
+    its value is complete, so fields are available before the stream ends
+    and survive a truncated or malformed tail.
+
+    Args:
+        on_field: Optional callback(key, value) invoked when a top-level
+            field finishes streaming
+    """
+
+    def __init__(self, on_field: Optional[Callable[[str, Any], None]] = None):
+        self.chunks: List[str] = []
+        self.fields: Dict[str, Any] = {}
+        self.on_field = on_field
+        # start, key_or_end, key, colon, value, string, nested, scalar,
+        # after_value, done, invalid
+        self._state = 'start'
+        self._token: List[str] = []
+        self._key = None
+        self._escape = False
+        self._depth = 0
+        self._nested_in_string = False
+
+    @property
+    def text(self) -> str:
+        """The raw answer received so far."""
+        return ''.join(self.chunks)
+
+    @property
+    def complete(self) -> bool:
+        """True once the closing brace of the top-level object arrived."""
+        return self._state == 'done'
+
+    @property
+    def is_json(self) -> bool:
+        """False once the answer is known not to be a JSON object."""
+        return self._state != 'invalid'
+
+    def feed(self, chunk: str) -> None:
+        """Consume one answer delta."""
+        self.chunks.append(chunk)
+        for c in chunk:
+            if self._state in ('done', 'invalid'):
+                return
+            self._step(c)
+
+    def partial(self) -> Dict[str, Any]:
+        """
+        Fields parsed so far, including the string value still streaming
+        (decoded up to the last complete character).
+        """
+        fields = dict(self.fields)
+        if self._state == 'string' and self._key is not None:
+            value = self._decode_partial_string()
+            if value is not None:
+                fields[self._key] = value
+        return fields
+
+    def _step(self, c: str) -> None:
+        state = self._state
+        if state == 'start':
+            if c == '{':
+                self._state = 'key_or_end'
+            elif c not in _WHITESPACE:
+                self._state = 'invalid'
+        elif state == 'key_or_end':
+            if c == '"':
+                self._token = [c]
+                self._state = 'key'
+            elif c == '}':
+                self._state = 'done'
+            elif c not in _WHITESPACE:
+                self._state = 'invalid'
+        elif state in ('key', 'string'):
+            self._token.append(c)
+            if self._escape:
+                self._escape = False
+            elif c == '\\':
+                self._escape = True
+            elif c == '"':
+                value = json.loads(''.join(self._token))
+                if state == 'key':
+                    self._key = value
+                    self._state = 'colon'
+                else:
+                    self._store(value)
+        elif state == 'colon':
+            if c == ':':
+                self._state = 'value'
+            elif c not in _WHITESPACE:
+                self._state = 'invalid'
+        elif state == 'value':
+            if c in _WHITESPACE:
+                return
+            self._token = [c]
+            if c == '"':
+                self._state = 'string'
+            elif c in '{[':
+                self._depth = 1
+                self._nested_in_string = False
+                self._state = 'nested'
+            else:
+                self._state = 'scalar'
+        elif state == 'nested':
+            self._token.append(c)
+            if self._nested_in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == '\\':
+                    self._escape = True
+                elif c == '"':
+                    self._nested_in_string = False
+            elif c == '"':
+                self._nested_in_string = True
+            elif c in '{[':
+                self._depth += 1
+            elif c in '}]':
+                self._depth -= 1
+                if self._depth == 0:
+                    self._store_raw(''.join(self._token))
+        elif state == 'scalar':
+            if c in ',}':
+                self._store_raw(''.join(self._token).strip())
+                if self._state == 'after_value':
+                    self._step(c)
+            else:
+                self._token.append(c)
+        elif state == 'after_value':
+            if c == ',':
+                self._state = 'key_or_end'
+            elif c == '}':
+                self._state = 'done'
+            elif c not in _WHITESPACE:
+                self._state = 'invalid'
+
+    def _store_raw(self, raw: str) -> None:
+        try:
+            self._store(json.loads(raw))
+        except json.JSONDecodeError:
+            self._state = 'invalid'
+
+    def _store(self, value: Any) -> None:
+        self.fields[self._key] = value
+        self._token = []
+        self._state = 'after_value'
+        if self.on_field:
+            self.on_field(self._key, value)
+
+    def _decode_partial_string(self) -> Optional[str]:
+        raw = ''.join(self._token)
+        # Drop a dangling escape sequence (at most "\uXXX") before closing
+        for cut in range(0, min(6, len(raw) - 1) + 1):
+            try:
+                value = json.loads(raw[:len(raw) - cut] + '"')
+            except json.JSONDecodeError:
+                continue
+            # ...and the first half of a split surrogate pair
+            if value and '\ud800' <= value[-1] <= '\udbff':
+                value = value[:-1]
+            return value
+        return None
+
+
+class SSEAnswerParser:
+    """
+    Line-by-line parser for the /ask SSE stream.
+
+    Shared by the sync and async clients so both produce the same
+    (text_response, product, reasoning, retrieved_sources) tuple.
+
+    Also records a timeline of (offset_s, event_name) arrivals, measured from
+    `start` (a time.monotonic() value taken when the request was sent), from
+    which timings() derives TTFB, retrieval latency, TTFT and streaming rate.
+
+    Answer deltas go through an AnswerJSONStream; use partial() to read the
+    fields parsed so far, or pass on_field to be notified as each completes.
+
+    With record, the raw data of every event is also kept in `events` as
+    (offset_s, event_name, data) for an SSERecorder (see sse_recorder.py).
+    """
+
+    def __init__(
+        self,
+        start: Optional[float] = None,
+        on_field: Optional[Callable[[str, Any], None]] = None,
+        record: bool = False
+    ):
+        self.current_event = None
+        self.retrieved_sources = []
+        self.answer = AnswerJSONStream(on_field=on_field)
+        self.start = start if start is not None else time.monotonic()
+        self.first_byte_at = None
+        self.end_at = None
+        self.timeline: List[Tuple[float, str]] = []
+        self.events: Optional[List[Tuple[float, str, str]]] = [] if record else None
+
+    def feed_line(self, line: str) -> None:
+        """Consume one line of the event stream."""
+        now = time.monotonic() - self.start
+        if self.first_byte_at is None:
+            self.first_byte_at = now
+        if not line:
+            return
+
+        if line.startswith('event:'):
+            self.current_event = line[6:].strip()
+        elif line.startswith('data:'):
+            data_str = line[5:].strip()
+            self.timeline.append((now, self.current_event))
+            if self.events is not None:
+                self.events.append((now, self.current_event, data_str))
+
+            if self.current_event == RETRIEVAL_EVENT:
+                try:
+                    self.retrieved_sources = json.loads(data_str)
+                except json.JSONDecodeError:
+                    pass
+            elif self.current_event == ANSWER_DELTA_EVENT:
+                try:
+                    delta_data = json.loads(data_str)
+                    self.answer.feed(delta_data.get('delta', ''))
+                except json.JSONDecodeError:
+                    pass
+
+    @property
+    def full_response(self) -> str:
+        """The raw answer text received so far."""
+        return self.answer.text
+
+    def partial(self) -> Dict[str, Any]:
+        """Answer fields parsed so far (see AnswerJSONStream.partial)."""
+        return self.answer.partial()
+
+    def finish(self) -> None:
+        """Mark the end of the stream."""
+        self.end_at = time.monotonic() - self.start
+
+    @property
+    def incomplete(self) -> bool:
+        """True when the answer JSON never closed (truncated, malformed or missing)."""
+        return not self.answer.complete
+
+    def timings(self) -> Dict[str, Any]:
+        """
+        Derive timing fields from the timeline (seconds, relative to start).
+
+        Returns a dict with ttfb_s, retrieval_s, ttft_s, stream_s,
+        num_deltas and tokens_per_s (answer deltas per second of streaming;
+        each delta is roughly one token). Fields that could not be measured
+        are None.
+        """
+        def first(event):
+            return next((t for t, e in self.timeline if e == event), None)
+
+        deltas = [t for t, e in self.timeline if e == ANSWER_DELTA_EVENT]
+        stream_s = deltas[-1] - deltas[0] if len(deltas) > 1 else None
+
+        return {
+            'ttfb_s': _round(self.first_byte_at),
+            'retrieval_s': _round(first(RETRIEVAL_EVENT)),
+            'ttft_s': _round(deltas[0] if deltas else None),
+            'stream_s': _round(stream_s),
+            'num_deltas': len(deltas),
+            'tokens_per_s': _round(len(deltas) / stream_s if stream_s else None, 1),
+        }
+
+    def result(self) -> Tuple[str, str, str, List[Dict[str, Any]]]:
+        """
+        Return the parsed answer fields.
+
+        If the answer JSON was truncated or malformed, the fields that did
+        complete are kept (and incomplete is True). Only when none of them
+        could be recovered does text_response fall back to the first 500
+        characters of the raw text.
+        """
+        fields = self.answer.partial()
+        if not any(key in fields for key in ANSWER_FIELDS):
+            return self.full_response[:500], "", "", self.retrieved_sources
+
+        text_response, product, reasoning = (
+            fields.get(key, '') for key in ANSWER_FIELDS
+        )
+        return text_response, product, reasoning, self.retrieved_sources
+
+
 def ask_with_sse(
     client: httpx.Client,
     headers: dict,
     api_base_url: str,
     conv_id: str,
-    query: str
+    query: str,
+    timeout: Optional[float] = None,
+    parser: Optional[SSEAnswerParser] = None
 ) -> Tuple[str, str, str, List[Dict[str, Any]]]:
     """
     Ask a question using SSE streaming.
+
+    If timeout is given, the whole stream must complete within that many
+    seconds, otherwise TimeoutError is raised. Pass a parser to inspect the
+    event timeline afterwards (see SSEAnswerParser.timings).
+
     Returns: (text_response, product, reasoning, retrieved_sources)
     """
-    retrieved_sources = []
-    full_response = ""
-    current_event = None
+    parser = parser or SSEAnswerParser()
+    parser.start = time.monotonic()
+    deadline = time.monotonic() + timeout if timeout else None
 
     with client.stream(
         'POST',
@@ -49,39 +440,174 @@ def ask_with_sse(
     ) as response:
         response.raise_for_status()
         for line in response.iter_lines():
-            if not line:
-                continue
+            if deadline and time.monotonic() > deadline:
+                raise TimeoutError(f"No complete answer within {timeout:.0f}s")
+            parser.feed_line(line)
+    parser.finish()
+
+    return parser.result()
+
+
+async def ask_with_sse_async(
+    client: httpx.AsyncClient,
+    headers: dict,
+    api_base_url: str,
+    conv_id: str,
+    query: str,
+    timeout: Optional[float] = None,
+    parser: Optional[SSEAnswerParser] = None
+) -> Tuple[str, str, str, List[Dict[str, Any]]]:
+    """
+    Async variant of ask_with_sse for multiplexing many streams in one loop.
+
+    Cancelling the awaiting task closes the underlying stream. If timeout is
+    given, the whole stream must complete within that many seconds,
+    otherwise TimeoutError is raised.
+
+    Returns: (text_response, product, reasoning, retrieved_sources)
+    """
+    parser = parser or SSEAnswerParser()
+    parser.start = time.monotonic()
+
+    async def consume():
+        async with client.stream(
+            'POST',
+            f'{api_base_url}/ask',
+            headers=headers,
+            json={'conversationId': conv_id, 'query': query, 'stream': True}
+        ) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                parser.feed_line(line)
+        parser.finish()
 
-            if line.startswith('event:'):
-                current_event = line[6:].strip()
-            elif line.startswith('data:'):
-                data_str = line[5:].strip()
-
-                if current_event == 'search-workflow-knowledge-retrieved':
-                    try:
-                        retrieved_sources = json.loads(data_str)
-                    except json.JSONDecodeError:
-                        pass
-                elif current_event == 'search-workflow-answer-delta-generated':
-                    try:
-                        delta_data = json.loads(data_str)
-                        full_response += delta_data.get('delta', '')
-                    except json.JSONDecodeError:
-                        pass
-
-    # Parse the final response JSON
-    text_response = ""
-    product = ""
-    reasoning = ""
     try:
-        response_json = json.loads(full_response)
-        text_response = response_json.get('text_response', '')
-        product = response_json.get('product', '')
-        reasoning = response_json.get('reasoning', '')
-    except json.JSONDecodeError:
-        text_response = full_response[:500]
+        await asyncio.wait_for(consume(), timeout)
+    except asyncio.TimeoutError:
+        raise TimeoutError(f"No complete answer within {timeout:.0f}s") from None
 
-    return text_response, product, reasoning, retrieved_sources
+    return parser.result()
+
+
+def format_output(
+    query: str,
+    text_response: str,
+    product: str,
+    reasoning: str,
+    sources: List[Dict[str, Any]],
+    latency: float,
+    show_sources: bool = False,
+    timings: Optional[Dict[str, Any]] = None,
+    full_sources: bool = False,
+    incomplete: bool = False
+) -> Dict[str, Any]:
+    """
+    Build the output dict for a single answered query.
+
+    With full_sources, the whole search-workflow-knowledge-retrieved payload
+    is kept, unmodified, under "retrieval". An answer recovered from a
+    truncated or malformed stream is marked "incomplete": true.
+    """
+    output = {
+        'query': query,
+        'product': product,
+        'response': text_response,
+        'reasoning': reasoning,
+        'num_sources': len(sources),
+        'latency_s': round(latency, 2),
+    }
+    if incomplete:
+        output['incomplete'] = True
+    if timings:
+        output.update(timings)
+
+    if show_sources:
+        output['sources'] = [
+            {
+                'chunk_id': s.get('chunk_external_id', ''),
+                'distance': s.get('_additional', {}).get('distance', 0),
+                'text': s.get('text', '')[:300]
+            }
+            for s in sources
+        ]
+    if full_sources:
+        output['retrieval'] = sources
+
+    return output
+
+
+def _round(value: Optional[float], ndigits: int = 3) -> Optional[float]:
+    return round(value, ndigits) if value is not None else None
+
+
+def _query_timings(parser: SSEAnswerParser, conversation_s: float) -> Dict[str, Any]:
+    """Per-query timing fields: conversation creation plus the /ask timeline."""
+    timings = {'conversation_s': _round(conversation_s)}
+    timings.update(parser.timings())
+    timings['total_s'] = _round(conversation_s + parser.end_at)
+    return timings
+
+
+def create_conversation(
+    client: httpx.Client,
+    headers: dict,
+    api_base_url: str
+) -> Tuple[str, float]:
+    """Create a conversation. Returns: (conversation_id, seconds taken)"""
+    start = time.monotonic()
+    resp = client.post(f'{api_base_url}/conversations', headers=headers, json={})
+    resp.raise_for_status()
+    return resp.json()['conversationId'], time.monotonic() - start
+
+
+async def create_conversation_async(
+    client: httpx.AsyncClient,
+    headers: dict,
+    api_base_url: str
+) -> Tuple[str, float]:
+    """Async variant of create_conversation."""
+    start = time.monotonic()
+    resp = await client.post(f'{api_base_url}/conversations', headers=headers, json={})
+    resp.raise_for_status()
+    return resp.json()['conversationId'], time.monotonic() - start
+
+
+class ConversationPool:
+    """
+    Pre-created conversations, each lent to one in-flight query at a time.
+
+    The agent answers single-turn queries statelessly, so a conversation can
+    be reused across queries as long as two queries never share it at the
+    same time. With one conversation per worker, acquire() never blocks.
+    """
+
+    def __init__(self, conv_ids: List[str], creation_s: List[float]):
+        self.creation_s = creation_s
+        self._available = queue.Queue()
+        for conv_id in conv_ids:
+            self._available.put(conv_id)
+
+    @classmethod
+    def create(
+        cls,
+        client: httpx.Client,
+        headers: dict,
+        api_base_url: str,
+        size: int
+    ) -> 'ConversationPool':
+        """Create `size` conversations up front."""
+        created = [create_conversation(client, headers, api_base_url) for _ in range(size)]
+        return cls([c for c, _ in created], [t for _, t in created])
+
+    @property
+    def size(self) -> int:
+        return len(self.creation_s)
+
+    def acquire(self) -> str:
+        return self._available.get()
+
+    def release(self, conv_id: str) -> None:
+        self._available.put(conv_id)
 
 
 def fetch_response(
@@ -89,7 +615,14 @@ def fetch_response(
     query: str,
     org_id: str = None,
     api_key: str = None,
-    show_sources: bool = False
+    show_sources: bool = False,
+    client: Optional[httpx.Client] = None,
+    timeout: float = DEFAULT_TIMEOUT,
+    conv_id: Optional[str] = None,
+    full_sources: bool = False,
+    base_url: Optional[str] = None,
+    recorder: Optional[SSERecorder] = None,
+    record_id: Any = None
 ) -> Dict[str, Any]:
     """
     Fetch response from an AIFindr agent.
@@ -100,6 +633,16 @@ def fetch_response(
         org_id: Organization ID (defaults to env AIFINDR_ORG_ID)
         api_key: API key (defaults to env AIFINDR_API_KEY)
         show_sources: Whether to include source details
+        client: Optional shared httpx.Client (left open; a private one is
+            created and closed otherwise)
+        timeout: Maximum seconds for the whole query
+        conv_id: Existing conversation to ask in (a new one is created
+            otherwise; conversation_s is then 0)
+        full_sources: Keep the full retrieval payload under "retrieval"
+        base_url: API base URL (see resolve_base_url; defaults to production)
+        recorder: Optional SSERecorder that saves the raw /ask stream, also
+            when it fails
+        record_id: Id stored with the recording (e.g. the query id)
 
     Returns:
         Dict with query, product, response, reasoning, sources info
@@ -107,53 +650,514 @@ def fetch_response(
     org_id = org_id or get_env('AIFINDR_ORG_ID')
     api_key = api_key or get_env('AIFINDR_API_KEY')
 
-    api_base_url = f'https://api.saas.aifindr.ai/api/widget/projects/{project_id}'
-
-    headers = {
-        'X-Organization-Id': org_id,
-        'Authorization': f'Bearer {api_key}',
-        'Content-Type': 'application/json',
-    }
+    api_base_url = resolve_base_url(project_id, base_url)
+    headers = build_headers(org_id, api_key)
 
-    client = httpx.Client(timeout=120.0)
+    own_client = client is None
+    if own_client:
+        client = httpx.Client(timeout=timeout)
 
     try:
-        # Create conversation
-        resp = client.post(f'{api_base_url}/conversations', headers=headers, json={})
-        resp.raise_for_status()
-        conv_id = resp.json()['conversationId']
+        # Create conversation (unless reusing one)
+        conversation_s = 0.0
+        if conv_id is None:
+            conv_id, conversation_s = create_conversation(client, headers, api_base_url)
 
         # Ask question with SSE streaming
-        start_time = time.time()
-        text_response, product, reasoning, sources = ask_with_sse(
-            client, headers, api_base_url, conv_id, query
+        parser = SSEAnswerParser(record=recorder is not None)
+        try:
+            text_response, product, reasoning, sources = ask_with_sse(
+                client, headers, api_base_url, conv_id, query, timeout=timeout, parser=parser
+            )
+        except Exception as e:
+            if recorder:
+                recorder.record(parser, query, conv_id, record_id, error=e)
+            raise
+        if recorder:
+            recorder.record(parser, query, conv_id, record_id)
+
+        return format_output(
+            query, text_response, product, reasoning, sources, parser.end_at,
+            show_sources, _query_timings(parser, conversation_s), full_sources, parser.incomplete
         )
-        latency = time.time() - start_time
-
-        output = {
-            'query': query,
-            'product': product,
-            'response': text_response,
-            'reasoning': reasoning,
-            'num_sources': len(sources),
-            'latency_s': round(latency, 2),
-        }
 
-        if show_sources:
-            output['sources'] = [
-                {
-                    'chunk_id': s.get('chunk_external_id', ''),
-                    'distance': s.get('_additional', {}).get('distance', 0),
-                    'text': s.get('text', '')[:300]
-                }
-                for s in sources
-            ]
+    finally:
+        if own_client:
+            client.close()
+
+
+async def fetch_response_async(
+    project_id: str,
+    query: str,
+    org_id: str = None,
+    api_key: str = None,
+    show_sources: bool = False,
+    client: Optional[httpx.AsyncClient] = None,
+    timeout: float = DEFAULT_TIMEOUT,
+    conv_id: Optional[str] = None,
+    full_sources: bool = False,
+    base_url: Optional[str] = None,
+    recorder: Optional[SSERecorder] = None,
+    record_id: Any = None
+) -> Dict[str, Any]:
+    """
+    Async variant of fetch_response. Takes the same arguments, except that
+    client is an optional shared httpx.AsyncClient.
+    """
+    org_id = org_id or get_env('AIFINDR_ORG_ID')
+    api_key = api_key or get_env('AIFINDR_API_KEY')
+
+    api_base_url = resolve_base_url(project_id, base_url)
+    headers = build_headers(org_id, api_key)
+
+    own_client = client is None
+    if own_client:
+        client = httpx.AsyncClient(timeout=timeout)
+
+    try:
+        conversation_s = 0.0
+        if conv_id is None:
+            conv_id, conversation_s = await create_conversation_async(
+                client, headers, api_base_url
+            )
+
+        parser = SSEAnswerParser(record=recorder is not None)
+        try:
+            text_response, product, reasoning, sources = await ask_with_sse_async(
+                client, headers, api_base_url, conv_id, query, timeout=timeout, parser=parser
+            )
+        except Exception as e:
+            if recorder:
+                recorder.record(parser, query, conv_id, record_id, error=e)
+            raise
+        if recorder:
+            recorder.record(parser, query, conv_id, record_id)
+
+        return format_output(
+            query, text_response, product, reasoning, sources, parser.end_at,
+            show_sources, _query_timings(parser, conversation_s), full_sources, parser.incomplete
+        )
+
+    finally:
+        if own_client:
+            await client.aclose()
+
+
+def load_queries(path: str) -> List[Dict[str, Any]]:
+    """
+    Load batch queries from a JSONL file.
+
+    Each line is either a JSON object with a "query" key (and optionally
+    "id", "expected" or any other fields, which are carried through) or a
+    bare JSON string. Lines without an id are numbered from 1 in file order.
+    """
+    items = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            item = json.loads(line)
+            if isinstance(item, str):
+                item = {'query': item}
+            if not item.get('query'):
+                raise ValueError(f"Missing 'query' in line {len(items) + 1} of {path}")
+            item.setdefault('id', len(items) + 1)
+            items.append(item)
+    return items
+
+
+def fetch_batch(
+    project_id: str,
+    items: List[Dict[str, Any]],
+    concurrency: int = DEFAULT_CONCURRENCY,
+    timeout: float = DEFAULT_TIMEOUT,
+    show_sources: bool = False,
+    org_id: str = None,
+    api_key: str = None,
+    reuse_conversations: bool = False,
+    http2: bool = False,
+    full_sources: bool = False,
+    base_url: Optional[str] = None,
+    recorder: Optional[SSERecorder] = None,
+    merge_items: bool = True
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Fetch responses for many queries through one pooled client.
+
+    Queries run on a pool of at most `concurrency` worker threads that share
+    a single httpx.Client (and therefore its keep-alive connections). A query
+    that fails or exceeds `timeout` yields an entry with an "error" key
+    instead of aborting the batch.
+
+    With reuse_conversations, one conversation per worker is created up front
+    (see ConversationPool) instead of one per query.
+
+    Args:
+        project_id: AIFindr project ID
+        items: Query dicts as returned by load_queries
+        concurrency: Maximum number of queries in flight
+        timeout: Maximum seconds per query
+        show_sources: Whether to include source details
+        org_id: Organization ID (defaults to env AIFINDR_ORG_ID)
+        api_key: API key (defaults to env AIFINDR_API_KEY)
+        reuse_conversations: Reuse pre-created conversations across queries
+        http2: Use HTTP/2 (requires h2)
+        full_sources: Keep the full retrieval payload under "retrieval"
+        base_url: API base URL (see resolve_base_url; defaults to production)
+        recorder: Optional SSERecorder that saves every raw /ask stream
+        merge_items: Carry the input fields (id, expected, ...) into each
+            result; without it, results hold only what the agent returned
+
+    Returns:
+        Tuple of (results in input order, aggregate stats)
+    """
+    org_id = org_id or get_env('AIFINDR_ORG_ID')
+    api_key = api_key or get_env('AIFINDR_API_KEY')
+    api_base_url = resolve_base_url(project_id, base_url)
 
-        return output
+    client = httpx.Client(**client_options(timeout, concurrency, http2))
+    pool = None
 
+    def run(item: Dict[str, Any]) -> Dict[str, Any]:
+        conv_id = pool.acquire() if pool else None
+        try:
+            result = fetch_response(
+                project_id, item['query'], org_id=org_id, api_key=api_key,
+                show_sources=show_sources, client=client, timeout=timeout,
+                conv_id=conv_id, full_sources=full_sources, base_url=base_url,
+                recorder=recorder, record_id=item.get('id')
+            )
+        except Exception as e:
+            result = _error_result(item, e)
+        finally:
+            if pool:
+                pool.release(conv_id)
+        return _merge_item(item, result) if merge_items else result
+
+    start_time = time.time()
+    try:
+        if reuse_conversations and items:
+            pool = ConversationPool.create(
+                client, build_headers(org_id, api_key), api_base_url,
+                min(concurrency, len(items))
+            )
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = list(executor.map(run, items))
     finally:
         client.close()
 
+    stats = _batch_stats(results, concurrency, time.time() - start_time)
+    stats.update(_conversation_stats(results, pool.creation_s if pool else None))
+    return results, stats
+
+
+async def fetch_batch_async(
+    project_id: str,
+    items: List[Dict[str, Any]],
+    concurrency: int = DEFAULT_CONCURRENCY,
+    timeout: float = DEFAULT_TIMEOUT,
+    show_sources: bool = False,
+    org_id: str = None,
+    api_key: str = None,
+    reuse_conversations: bool = False,
+    http2: bool = False,
+    full_sources: bool = False,
+    base_url: Optional[str] = None,
+    recorder: Optional[SSERecorder] = None,
+    merge_items: bool = True
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Async variant of fetch_batch: many SSE streams on one event loop.
+
+    A fixed set of `concurrency` worker coroutines pull queries from the
+    input, so no more than that many streams (or pending tasks) exist at
+    once regardless of the input size. Cancelling the returned coroutine
+    cancels every in-flight stream. With reuse_conversations, each worker
+    creates one conversation up front and asks all its queries in it.
+
+    Returns:
+        Tuple of (results in input order, aggregate stats)
+    """
+    org_id = org_id or get_env('AIFINDR_ORG_ID')
+    api_key = api_key or get_env('AIFINDR_API_KEY')
+    api_base_url = resolve_base_url(project_id, base_url)
+    headers = build_headers(org_id, api_key)
+
+    results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+    pending = iter(enumerate(items))
+    num_workers = min(concurrency, len(items)) or 1
+    conv_ids: List[Optional[str]] = [None] * num_workers
+    creation_s = None
+
+    async def worker(client: httpx.AsyncClient, conv_id: Optional[str]) -> None:
+        for idx, item in pending:
+            try:
+                result = await fetch_response_async(
+                    project_id, item['query'], org_id=org_id, api_key=api_key,
+                    show_sources=show_sources, client=client, timeout=timeout,
+                    conv_id=conv_id, full_sources=full_sources, base_url=base_url,
+                    recorder=recorder, record_id=item.get('id')
+                )
+            except Exception as e:
+                result = _error_result(item, e)
+            results[idx] = _merge_item(item, result) if merge_items else result
+
+    start_time = time.time()
+    async with httpx.AsyncClient(**client_options(timeout, concurrency, http2)) as client:
+        if reuse_conversations and items:
+            created = await asyncio.gather(*(
+                create_conversation_async(client, headers, api_base_url)
+                for _ in range(num_workers)
+            ))
+            conv_ids = [c for c, _ in created]
+            creation_s = [t for _, t in created]
+        workers = [asyncio.create_task(worker(client, conv_id)) for conv_id in conv_ids]
+        try:
+            await asyncio.gather(*workers)
+        finally:
+            for task in workers:
+                task.cancel()
+
+    stats = _batch_stats(results, concurrency, time.time() - start_time)
+    stats.update(_conversation_stats(results, creation_s))
+    return results, stats
+
+
+def fetch_response_cached(
+    project_id: str,
+    query: str,
+    cache: 'ResponseCache',
+    refresh: bool = False,
+    kb_version: str = '',
+    show_sources: bool = False,
+    **kwargs
+) -> Dict[str, Any]:
+    """
+    fetch_response through a ResponseCache.
+
+    Hits are returned with "cached": true. Misses (and every query when
+    refresh is set) are fetched live and stored, sources included, so a
+    later --show-sources run can be served from the cache too; incomplete
+    answers are not stored. Remaining
+    kwargs are passed to fetch_response; with full_sources, hits cached
+    without the full retrieval payload count as misses.
+    """
+    full_sources = kwargs.get('full_sources', False)
+    if not refresh:
+        hit = cache.get(project_id, query, kb_version)
+        if hit is not None and (not full_sources or 'retrieval' in hit):
+            return _from_cache(hit, query, show_sources, full_sources)
+
+    result = fetch_response(project_id, query, show_sources=True, **kwargs)
+    if not result.get('incomplete'):
+        cache.put(project_id, query, result, kb_version)
+    return _without_sources(result, show_sources, full_sources)
+
+
+def fetch_batch_cached(
+    project_id: str,
+    items: List[Dict[str, Any]],
+    cache: 'ResponseCache',
+    refresh: bool = False,
+    kb_version: str = '',
+    use_async: bool = False,
+    show_sources: bool = False,
+    **batch_kwargs
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    fetch_batch (or fetch_batch_async, run to completion) through a
+    ResponseCache: only cache misses are sent to the agent, and successful,
+    complete answers are stored as the agent returned them, before the input
+    fields are merged in. Stats gain a cache_hits count.
+    """
+    full_sources = batch_kwargs.get('full_sources', False)
+    results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+    misses = []
+    for idx, item in enumerate(items):
+        hit = None if refresh else cache.get(project_id, item['query'], kb_version)
+        if hit is None or (full_sources and 'retrieval' not in hit):
+            misses.append(idx)
+        else:
+            results[idx] = _merge_item(item, _from_cache(hit, item['query'], show_sources, full_sources))
+
+    start_time = time.time()
+    miss_items = [items[idx] for idx in misses]
+    if use_async:
+        fetched, stats = asyncio.run(
+            fetch_batch_async(project_id, miss_items, show_sources=True, merge_items=False, **batch_kwargs)
+        )
+    else:
+        fetched, stats = fetch_batch(project_id, miss_items, show_sources=True, merge_items=False, **batch_kwargs)
+
+    for idx, result in zip(misses, fetched):
+        item = items[idx]
+        if 'error' not in result and not result.get('incomplete'):
+            cache.put(project_id, item['query'], result, kb_version)
+        results[idx] = _merge_item(item, _without_sources(result, show_sources, full_sources))
+
+    concurrency = batch_kwargs.get('concurrency', DEFAULT_CONCURRENCY)
+    stats.update(_batch_stats(results, concurrency, time.time() - start_time))
+    stats['cache_hits'] = len(items) - len(misses)
+    return results, stats
+
+
+def _from_cache(
+    hit: Dict[str, Any],
+    query: str,
+    show_sources: bool,
+    full_sources: bool = False
+) -> Dict[str, Any]:
+    # The key is the normalized query; report the query exactly as asked
+    return {**_without_sources(hit, show_sources, full_sources), 'query': query, 'cached': True}
+
+
+def _without_sources(result: Dict[str, Any], show_sources: bool, full_sources: bool = False) -> Dict[str, Any]:
+    drop = set()
+    if not show_sources:
+        drop.add('sources')
+    if not full_sources:
+        drop.add('retrieval')
+    if not drop & result.keys():
+        return result
+    return {k: v for k, v in result.items() if k not in drop}
+
+
+def _merge_item(item: Dict[str, Any], result: Dict[str, Any]) -> Dict[str, Any]:
+    """Carry the input fields (id, expected, ...) through to the result."""
+    extra = {k: v for k, v in item.items() if k != 'query'}
+    return {**extra, **result}
+
+
+def _error_result(item: Dict[str, Any], error: Exception) -> Dict[str, Any]:
+    return {'query': item['query'], 'error': f"{type(error).__name__}: {error}"}
+
+
+def _batch_stats(results: List[Dict[str, Any]], concurrency: int, elapsed: float) -> Dict[str, Any]:
+    errors = sum(1 for r in results if 'error' in r)
+    return {
+        'total': len(results),
+        'ok': len(results) - errors,
+        'errors': errors,
+        'incomplete': sum(1 for r in results if r.get('incomplete')),
+        'concurrency': concurrency,
+        'elapsed_s': round(elapsed, 2),
+        'throughput_qps': round(len(results) / elapsed, 3) if elapsed > 0 else 0.0,
+    }
+
+
+def _conversation_stats(
+    results: List[Dict[str, Any]],
+    pool_creation_s: Optional[List[float]] = None
+) -> Dict[str, Any]:
+    """
+    Conversation-creation cost of a batch, to compare pooled and fresh runs.
+
+    pool_creation_s holds the creation times of a conversation pool; without
+    it, every successful query is assumed to have created its own.
+    """
+    if pool_creation_s is not None:
+        mode, times = 'pool', pool_creation_s
+    else:
+        mode = 'fresh'
+        times = [r['conversation_s'] for r in results if r.get('conversation_s') is not None]
+    return {
+        'conversation_mode': mode,
+        'conversations_created': len(times),
+        'conversation_total_s': round(sum(times), 2),
+        'conversation_mean_s': round(sum(times) / len(times), 3) if times else None,
+    }
+
+
+def run_batch(args) -> int:
+    """Run batch mode from parsed CLI args; results are written as JSONL."""
+    items = load_queries(args.input)
+    batch_kwargs = {
+        'concurrency': args.concurrency,
+        'timeout': args.timeout,
+        'show_sources': args.show_sources,
+        'reuse_conversations': args.reuse_conversations,
+        'http2': args.http2,
+        'full_sources': args.full_sources,
+        'base_url': args.base_url,
+    }
+    # Open the output first: a bad path must fail before the batch is fetched, not after
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    out = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    recorder = open_recorder(args)
+    if recorder:
+        batch_kwargs['recorder'] = recorder
+    cache = open_cache(args)
+    try:
+        if cache:
+            with cache:
+                results, stats = fetch_batch_cached(
+                    args.project, items, cache,
+                    refresh=args.refresh, kb_version=args.kb_version, use_async=args.use_async,
+                    **batch_kwargs
+                )
+        elif args.use_async:
+            results, stats = asyncio.run(fetch_batch_async(args.project, items, **batch_kwargs))
+        else:
+            results, stats = fetch_batch(args.project, items, **batch_kwargs)
+        for result in results:
+            out.write(json.dumps(result, ensure_ascii=False) + '\n')
+    finally:
+        if recorder:
+            recorder.close()
+        if args.output:
+            out.close()
+
+    print(
+        f"Batch: {stats['ok']}/{stats['total']} ok, {stats['errors']} errors, "
+        f"{stats['incomplete']} incomplete answers in {stats['elapsed_s']:.2f}s ({stats['throughput_qps']:.2f} queries/s, "
+        f"concurrency={stats['concurrency']})",
+        file=sys.stderr
+    )
+    print(
+        f"Conversations ({stats['conversation_mode']}): {stats['conversations_created']} created, "
+        f"{stats['conversation_total_s']:.2f}s total",
+        file=sys.stderr
+    )
+    if 'cache_hits' in stats:
+        print(f"Cache: {stats['cache_hits']}/{stats['total']} served from {args.cache}", file=sys.stderr)
+    if recorder:
+        print(f"Recorded {recorder.count} SSE sessions to {recorder.path}", file=sys.stderr)
+    if args.store:
+        run_id = args.run_id or store_run_id(args.output)
+        rows = RunStore(args.store).append(results, run_id=run_id, project=args.project, source='fetch')
+        print(f"Run store: {rows} rows appended to {args.store} (run {run_id})", file=sys.stderr)
+    return 1 if stats['errors'] else 0
+
+
+def store_run_id(output_path: Optional[str]) -> str:
+    """Run id for the run store: the run folder holding the output, else a new timestamp."""
+    if output_path:
+        return os.path.basename(os.path.dirname(os.path.abspath(output_path)))
+    return time.strftime('%Y-%m-%d_%H-%M-%S')
+
+
+def open_recorder(args) -> Optional[SSERecorder]:
+    """Open the SSE recordings file requested with --record (default: next to --output)."""
+    if args.record is None:
+        return None
+    path = args.record or os.path.join(os.path.dirname(args.output or ''), RECORDINGS_FILE)
+    return SSERecorder(path)
+
+
+def open_cache(args) -> Optional['ResponseCache']:
+    """Open the response cache requested on the command line, if any."""
+    if not args.cache:
+        return None
+    # Only cached runs need response_cache (and the dataset builder's sqlite_cache)
+    try:
+        from response_cache import ResponseCache
+    except ImportError as e:
+        raise ImportError(f"--cache needs {e.name}.py (aifindr-dataset-builder skill scripts)") from e
+    ttl_s = args.cache_ttl_hours * 3600 if args.cache_ttl_hours is not None else None
+    return ResponseCache(args.cache, ttl_s=ttl_s, max_entries=args.cache_max_entries)
+
 
 def main():
     parser = argparse.ArgumentParser(description="Fetch agent response for a query")
@@ -161,23 +1165,78 @@ def main():
     parser.add_argument("--query", "-q", dest="query_flag", help="The query (alternative)")
     parser.add_argument("--project", "-p", required=True, help="AIFindr project ID")
     parser.add_argument("--show-sources", "-s", action="store_true", help="Show retrieved sources")
+    parser.add_argument("--full-sources", action="store_true",
+                        help="Keep the full retrieval payload under \"retrieval\" (see retrieval_metrics.py)")
     parser.add_argument("--json", "-j", action="store_true", help="Output as JSON")
+    parser.add_argument("--input", "-i", help="JSONL file of queries to fetch in batch mode")
+    parser.add_argument("--output", "-o", help="Batch mode: write JSONL results here (default: stdout)")
+    parser.add_argument("--concurrency", "-c", type=int, default=DEFAULT_CONCURRENCY,
+                        help=f"Batch mode: queries in flight (default: {DEFAULT_CONCURRENCY})")
+    parser.add_argument("--timeout", "-t", type=float, default=DEFAULT_TIMEOUT,
+                        help=f"Maximum seconds per query (default: {DEFAULT_TIMEOUT:.0f})")
+    parser.add_argument("--async", dest="use_async", action="store_true",
+                        help="Batch mode: multiplex streams on one asyncio event loop instead of threads")
+    parser.add_argument("--reuse-conversations", action="store_true",
+                        help="Batch mode: pre-create one conversation per worker and reuse it")
+    parser.add_argument("--http2", action="store_true",
+                        help="Use HTTP/2 (requires: pip install 'httpx[http2]')")
+    parser.add_argument("--base-url",
+                        help="API base URL, e.g. a local mock_server.py (default: env AIFINDR_BASE_URL, else production)")
+    parser.add_argument("--cache", nargs="?", const=DEFAULT_CACHE_PATH,
+                        help=f"Serve and store responses in a cache file (default: {DEFAULT_CACHE_PATH})")
+    parser.add_argument("--refresh", action="store_true",
+                        help="With --cache: fetch live and overwrite cached responses")
+    parser.add_argument("--kb-version", default="",
+                        help="With --cache: knowledge-base/agent version tag (part of the cache key)")
+    parser.add_argument("--cache-ttl-hours", type=float,
+                        help="With --cache: ignore and evict entries older than this")
+    parser.add_argument("--cache-max-entries", type=int,
+                        help="With --cache: keep at most this many entries (LRU eviction)")
+    parser.add_argument("--store", nargs="?", const=DEFAULT_STORE_PATH,
+                        help=f"Batch mode: append results to a columnar run store (default: {DEFAULT_STORE_PATH})")
+    parser.add_argument("--run-id",
+                        help="With --store: run id (default: the folder holding --output)")
+    parser.add_argument("--record", nargs="?", const="",
+                        help=f"Save the raw SSE streams (default: {RECORDINGS_FILE} next to --output)")
     args = parser.parse_args()
 
+    if args.input:
+        return run_batch(args)
+
     query = args.query or args.query_flag
     if not query:
         parser.error("Query is required")
 
+    recorder = open_recorder(args)
     try:
-        result = fetch_response(args.project, query, show_sources=args.show_sources)
+        cache = open_cache(args)
+        if cache:
+            with cache:
+                result = fetch_response_cached(
+                    args.project, query, cache,
+                    refresh=args.refresh, kb_version=args.kb_version,
+                    show_sources=args.show_sources, timeout=args.timeout,
+                    full_sources=args.full_sources, base_url=args.base_url, recorder=recorder
+                )
+        else:
+            result = fetch_response(
+                args.project, query, show_sources=args.show_sources, timeout=args.timeout,
+                full_sources=args.full_sources, base_url=args.base_url, recorder=recorder
+            )
 
         if args.json:
             print(json.dumps(result, ensure_ascii=False, indent=2))
         else:
             print(f"Query: {result['query']}")
             print(f"Product: {result['product']}")
-            print(f"Latency: {result['latency_s']:.2f}s")
+            print(f"Latency: {result['latency_s']:.2f}s" + (" (cached)" if result.get('cached') else ""))
+            if result.get('ttft_s') is not None:
+                print(f"TTFT: {result['ttft_s']:.2f}s "
+                      f"(conversation {result['conversation_s']:.2f}s, "
+                      f"retrieval {result['retrieval_s'] or 0:.2f}s)")
             print(f"Sources: {result['num_sources']}")
+            if result.get('incomplete'):
+                print("Warning: the answer stream was truncated or malformed; fields were partially recovered")
             print()
             print("=" * 60)
             print("RESPONSE:")
@@ -205,6 +1264,9 @@ def main():
         else:
             print(f"ERROR: {e}")
         return 1
+    finally:
+        if recorder:
+            recorder.close()
 
     return 0
 
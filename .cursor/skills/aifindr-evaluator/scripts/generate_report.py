@@ -13,18 +13,25 @@ Or use programmatically:
 import argparse
 import json
 import os
+import shutil
+import tempfile
 from datetime import datetime
 from pathlib import Path
 from typing import Any
 
 try:
     import openpyxl
-    from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font, Alignment, PatternFill, Border, Side, NamedStyle
+    from openpyxl.styles.fonts import DEFAULT_FONT
     from openpyxl.utils import get_column_letter
     HAS_OPENPYXL = True
 except ImportError:
     HAS_OPENPYXL = False
 
+from latency_histogram import LatencyHistogram
+from run_store import DEFAULT_STORE_PATH, RunStore
+
 
 # =============================================================================
 # XLSX Styling Constants (deterministic look and feel)
@@ -51,6 +58,7 @@ COLUMN_WIDTHS = {
     "expected": 50,
     "response": 60,
     "verdict": 12,
+    "confidence": 12,
     "num_sources": 12,
     "latency_s": 10,
     "notes": 45,
@@ -58,6 +66,330 @@ COLUMN_WIDTHS = {
 
 HEADERS = ["id", "query", "expected", "response", "verdict", "num_sources", "latency_s", "notes"]
 
+# Results scored by score_verdicts.py also get the confidence of the suggested verdict
+CONFIDENCE_HEADERS = HEADERS[:5] + ["confidence"] + HEADERS[5:]
+
+# Timing fields recorded by fetch_response.py, summarized as percentiles
+TIMING_FIELDS = [
+    ("latency_s", "Latency (s)"),
+    ("conversation_s", "Conversation (s)"),
+    ("ttfb_s", "TTFB (s)"),
+    ("retrieval_s", "Retrieval (s)"),
+    ("ttft_s", "TTFT (s)"),
+    ("tokens_per_s", "Tokens/s"),
+    ("total_s", "Total (s)"),
+]
+
+PERCENTILES = [50, 95, 99]
+
+# Timing percentiles are exact (as percentile()) up to this many results per field,
+# then approximated by a LatencyHistogram in constant memory
+EXACT_PERCENTILE_MAX = 10_000
+
+# Markdown sections and failure rows spooled in memory up to this size, then to a temp file
+MARKDOWN_SPOOL_BYTES = 8 * 1024 * 1024
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Percentile with linear interpolation between closest ranks."""
+    ordered = sorted(values)
+    if not ordered:
+        raise ValueError("percentile() of empty data")
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+class TimingHistogram(LatencyHistogram):
+    """
+    LatencyHistogram that also keeps the raw values of its first
+    EXACT_PERCENTILE_MAX recordings. Until then percentiles come from
+    percentile(), so reports agree with compare_runs.py and
+    retrieval_metrics.py; past it the values are dropped and the histogram
+    answers alone.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.values: list[float] = []
+
+    def record(self, seconds: float) -> None:
+        super().record(seconds)
+        if self.values is None:
+            return
+        if len(self.values) < EXACT_PERCENTILE_MAX:
+            self.values.append(seconds)
+        else:
+            self.values = None
+
+    def percentile(self, pct: float) -> float:
+        if self.values:
+            return percentile(self.values, pct)
+        return super().percentile(pct)
+
+
+def compute_timing_stats(results: list[dict]) -> dict:
+    """
+    Compute p50/p95/p99 for each timing field present in the results.
+
+    Returns:
+        Dict of field -> {"label", "count", "p50", "p95", "p99"}, in
+        TIMING_FIELDS order. Fields missing from every result are omitted.
+    """
+    histograms = timing_histograms()
+    for r in results:
+        collect_timings(r, histograms)
+    return summarize_timings(histograms)
+
+
+def timing_histograms(fields: list[str] = None) -> dict:
+    """An empty TimingHistogram per timing field (default: every TIMING_FIELDS field)."""
+    return {field: TimingHistogram() for field in fields or [field for field, _ in TIMING_FIELDS]}
+
+
+def collect_timings(result: dict, histograms: dict) -> None:
+    """
+    Record the numeric timing fields of one result in histograms (field ->
+    TimingHistogram). Cached results replay the timings of the original
+    fetch, so they are left out.
+    """
+    if result.get("cached"):
+        return
+    for field, histogram in histograms.items():
+        value = result.get(field)
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            histogram.record(value)
+
+
+def summarize_timings(histograms: dict) -> dict:
+    """p50/p95/p99 per field from recorded histograms (see compute_timing_stats)."""
+    stats = {}
+    for field, label in TIMING_FIELDS:
+        histogram = histograms.get(field)
+        if histogram is None or not histogram.total:
+            continue
+        stats[field] = {"label": label, "count": histogram.total}
+        for pct in PERCENTILES:
+            stats[field][f"p{pct}"] = round(histogram.percentile(pct), 2)
+    return stats
+
+
+class RowSpool:
+    """
+    Rows appended as JSON lines to a temporary file (in memory up to
+    MARKDOWN_SPOOL_BYTES, then on disk). Supports len() and repeated iteration.
+    """
+
+    def __init__(self):
+        self._file = tempfile.SpooledTemporaryFile(max_size=MARKDOWN_SPOOL_BYTES, mode="w+", encoding="utf-8")
+        self._count = 0
+
+    def append(self, row: dict) -> None:
+        self._file.write(json.dumps(row, ensure_ascii=False) + "\n")
+        self._count += 1
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self):
+        self._file.seek(0)
+        try:
+            for line in iter(self._file.readline, ""):
+                yield json.loads(line)
+        finally:
+            self._file.seek(0, os.SEEK_END)
+
+    def close(self) -> None:
+        self._file.close()
+
+
+# =============================================================================
+# Single-pass aggregation shared by the Markdown and XLSX reports
+# =============================================================================
+
+VERDICTS = ["PASS", "PARTIAL", "FAIL", "NO_RETRIEVAL"]
+FAILING_VERDICTS = ["FAIL", "NO_RETRIEVAL"]
+
+
+def result_product(result: dict) -> str:
+    """Product of a result ("product", or the dataset's "meta.product")."""
+    meta = result.get("meta")
+    product = (
+        result.get("product")
+        or result.get("meta.product")
+        or (meta.get("product") if isinstance(meta, dict) else None)
+    )
+    return str(product) if product else ""
+
+
+class ReportAggregate:
+    """
+    Report statistics built in one pass over the results.
+
+    Only counters and bounded latency histograms are kept in memory, never
+    the result dicts themselves; the failure and needs-review rows are spooled
+    like the Markdown sections (RowSpool). Results can therefore come from a
+    generator or a JSONL file that does not fit in memory. close() releases
+    the spools.
+    """
+
+    def __init__(self):
+        self.total = 0
+        self.verdict_counts = {verdict: 0 for verdict in VERDICTS}
+        self.timing_histograms = timing_histograms()
+        self.by_product = {}
+        self.variant_groups = {}
+        self.failures = RowSpool()
+        self.needs_review = RowSpool()
+
+    def close(self) -> None:
+        self.failures.close()
+        self.needs_review.close()
+
+    def add(self, result: dict) -> None:
+        """Fold one result into the aggregate."""
+        self.total += 1
+        verdict = str(result.get("verdict", "")).upper()
+        if verdict in self.verdict_counts:
+            self.verdict_counts[verdict] += 1
+        collect_timings(result, self.timing_histograms)
+
+        product = result_product(result)
+        if product:
+            entry = self.by_product.setdefault(product, {
+                "total": 0,
+                "verdicts": {v: 0 for v in VERDICTS},
+                "timings": timing_histograms(["latency_s"]),
+            })
+            entry["total"] += 1
+            if verdict in entry["verdicts"]:
+                entry["verdicts"][verdict] += 1
+            collect_timings(result, entry["timings"])
+
+        group = result.get("variant_group")
+        if group is not None and group != "":
+            counts = self.variant_groups.setdefault(group, {})
+            counts[verdict or "-"] = counts.get(verdict or "-", 0) + 1
+
+        if verdict in FAILING_VERDICTS:
+            self.failures.append({
+                "id": result.get("id"),
+                "verdict": result.get("verdict"),
+                "notes": result.get("notes", "No notes"),
+            })
+
+        if result.get("needs_review"):
+            self.needs_review.append({
+                "id": result.get("id"),
+                "verdict": result.get("verdict"),
+                "confidence": result.get("confidence"),
+                "notes": result.get("notes", ""),
+            })
+
+    def timing_stats(self) -> dict:
+        """p50/p95/p99 per timing field (see summarize_timings)."""
+        return summarize_timings(self.timing_histograms)
+
+    def product_breakdown(self) -> list[dict]:
+        """Per-product verdict counts, pass rate and latency p50/p95, by product name."""
+        rows = []
+        for product in sorted(self.by_product):
+            entry = self.by_product[product]
+            latencies = entry["timings"]["latency_s"]
+            rows.append({
+                "product": product,
+                "total": entry["total"],
+                "verdicts": entry["verdicts"],
+                "pass_rate": entry["verdicts"]["PASS"] / entry["total"],
+                "p50_s": round(latencies.percentile(50), 2) if latencies.total else None,
+                "p95_s": round(latencies.percentile(95), 2) if latencies.total else None,
+            })
+        return rows
+
+    def inconsistent_variant_groups(self) -> list[tuple]:
+        """(group, verdict counts) for variant groups whose queries got different verdicts."""
+        return sorted(
+            ((group, counts) for group, counts in self.variant_groups.items() if len(counts) > 1),
+            key=lambda item: (not isinstance(item[0], (int, float)), str(item[0]).zfill(12))
+        )
+
+
+def aggregate_results(results, *writers) -> ReportAggregate:
+    """
+    Read results once, folding each into a ReportAggregate and passing it to
+    every report writer (anything with an add(result) method).
+    """
+    aggregate = ReportAggregate()
+    for result in results:
+        aggregate.add(result)
+        for writer in writers:
+            writer.add(result)
+    return aggregate
+
+
+def result_headers(results) -> list[str]:
+    """
+    Results sheet columns: HEADERS, plus confidence when any result is
+    auto-scored (a run may mix human and suggested verdicts).
+    """
+    return CONFIDENCE_HEADERS if any("confidence" in result for result in results) else HEADERS
+
+
+def iter_results(path: str):
+    """
+    Yield results from a JSONL file (one result per line) or a JSON file
+    holding a list or a single result.
+    """
+    if Path(path).suffix == ".jsonl":
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        return
+
+    with open(path, "r", encoding="utf-8") as f:
+        results = json.load(f)
+    if isinstance(results, list):
+        yield from results
+    else:
+        yield results
+
+
+# Latency distributions in a load_test.py summary
+LOAD_TEST_LATENCIES = [
+    ("latency", "Latency from schedule"),
+    ("service_time", "Service time"),
+    ("ttft", "TTFT"),
+    ("conversation", "Conversation"),
+]
+
+LOAD_TEST_PERCENTILES = ["p50_s", "p90_s", "p95_s", "p99_s", "p99.9_s", "max_s"]
+
+
+def load_test_overview(load_test: dict) -> list[tuple]:
+    """(label, value) rows describing a load_test.py summary."""
+    profile = load_test.get("profile", "")
+    if profile == "ramp":
+        target = f"{load_test.get('target_rate')} → {load_test.get('end_rate')} req/s (ramp)"
+    else:
+        target = f"{load_test.get('target_rate')} req/s ({profile})"
+    errors = load_test.get("errors_by_status") or {}
+    return [
+        ("Started", load_test.get("started", "")),
+        ("Target rate", target),
+        ("Duration", f"{load_test.get('duration_s', 0)}s"),
+        ("Achieved rate", f"{load_test.get('achieved_rate', 0)} req/s"),
+        ("Goodput", f"{load_test.get('goodput', 0)} answers/s"),
+        ("Sent", load_test.get("sent", 0)),
+        ("OK", load_test.get("ok", 0)),
+        ("Failed", load_test.get("failed", 0)),
+        ("Error rate", f"{load_test.get('error_rate', 0) * 100:.2f}%"),
+        ("Broken streams", load_test.get("broken_streams", 0)),
+        ("Dropped (client saturated)", load_test.get("dropped", 0)),
+        ("Errors by status", ", ".join(f"{k}: {v}" for k, v in errors.items()) or "none"),
+    ]
+
 
 def get_verdict_style(verdict: str) -> tuple:
     """Return (fill, font) for a verdict."""
@@ -84,29 +416,15 @@ def get_verdict_style(verdict: str) -> tuple:
         )
 
 
-def create_xlsx_report(results: list[dict], output_path: str, metadata: dict = None) -> str:
+def create_xlsx_styles() -> dict:
     """
-    Create an XLSX report with consistent styling.
-
-    Args:
-        results: List of evaluation result dicts with keys matching HEADERS
-        output_path: Path to save the XLSX file
-        metadata: Optional metadata dict with project, date, etc.
+    Named styles for the results sheet, keyed by role.
 
-    Returns:
-        Path to the created file
+    Built once per workbook and referenced by name from every cell, instead
+    of creating Font/Fill/Border/Alignment objects per cell.
     """
-    if not HAS_OPENPYXL:
-        raise ImportError("openpyxl is required. Install with: pip install openpyxl")
-
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = "Evaluation Results"
-
-    # Define styles
     header_fill = PatternFill(start_color=COLORS["header_bg"], end_color=COLORS["header_bg"], fill_type="solid")
-    header_font = Font(bold=True, color=COLORS["header_font"], size=11)
-    header_alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
+    alt_row_fill = PatternFill(start_color=COLORS["alt_row_bg"], end_color=COLORS["alt_row_bg"], fill_type="solid")
 
     cell_alignment = Alignment(horizontal="left", vertical="top", wrap_text=True)
     center_alignment = Alignment(horizontal="center", vertical="top")
@@ -118,134 +436,338 @@ def create_xlsx_report(results: list[dict], output_path: str, metadata: dict = N
         bottom=Side(style='thin', color=COLORS["border"])
     )
 
-    alt_row_fill = PatternFill(start_color=COLORS["alt_row_bg"], end_color=COLORS["alt_row_bg"], fill_type="solid")
+    styles = {
+        "header": NamedStyle(
+            name="eval_header",
+            fill=header_fill,
+            font=Font(bold=True, color=COLORS["header_font"], size=11),
+            alignment=Alignment(horizontal="center", vertical="center", wrap_text=True),
+            border=thin_border,
+        ),
+        "text": NamedStyle(name="eval_text", font=DEFAULT_FONT, alignment=cell_alignment, border=thin_border),
+        "text_alt": NamedStyle(name="eval_text_alt", font=DEFAULT_FONT, alignment=cell_alignment,
+                               border=thin_border, fill=alt_row_fill),
+        "center": NamedStyle(name="eval_center", font=DEFAULT_FONT, alignment=center_alignment, border=thin_border),
+        "center_alt": NamedStyle(name="eval_center_alt", font=DEFAULT_FONT, alignment=center_alignment,
+                                 border=thin_border, fill=alt_row_fill),
+    }
+    for verdict in ["PASS", "FAIL", "PARTIAL", "NO_RETRIEVAL"]:
+        fill, font = get_verdict_style(verdict)
+        styles[verdict] = NamedStyle(
+            name=f"eval_verdict_{verdict.lower()}",
+            fill=fill, font=font, alignment=center_alignment, border=thin_border,
+        )
+    review_fill, review_font = get_verdict_style("PARTIAL")
+    styles["review"] = NamedStyle(
+        name="eval_needs_review", fill=review_fill, font=review_font, alignment=center_alignment, border=thin_border,
+    )
+    return styles
 
-    # Write headers
-    for col, header in enumerate(HEADERS, 1):
-        cell = ws.cell(row=1, column=col, value=header.upper())
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = header_alignment
-        cell.border = thin_border
 
-    # Freeze header row
-    ws.freeze_panes = "A2"
+def estimate_row_height(result: dict, headers: list[str] = HEADERS) -> float:
+    """Estimate a results row height from its longest cell content."""
+    max_lines = 1
+    for header in headers:
+        value = str(result.get(header, ""))
+        width = COLUMN_WIDTHS.get(header, 15)
+        estimated_lines = max(1, len(value) // (width * 1.5) + value.count('\n') + 1)
+        max_lines = max(max_lines, estimated_lines)
+    return min(400, max(30, max_lines * 15))
 
-    # Write data rows
-    for row_idx, result in enumerate(results, 2):
-        is_alt_row = row_idx % 2 == 0
 
-        for col_idx, header in enumerate(HEADERS, 1):
-            value = result.get(header, "")
-            cell = ws.cell(row=row_idx, column=col_idx, value=value)
-            cell.border = thin_border
+def _styled_cell(ws, value, style=None, font=None, fill=None):
+    cell = WriteOnlyCell(ws, value=value)
+    if style:
+        cell.style = style
+    if font:
+        cell.font = font
+    if fill:
+        cell.fill = fill
+    return cell
 
-            # Apply alignment
-            if header in ["id", "verdict", "num_sources", "latency_s"]:
-                cell.alignment = center_alignment
-            else:
-                cell.alignment = cell_alignment
 
-            # Apply verdict-specific styling
-            if header == "verdict":
-                fill, font = get_verdict_style(str(value))
-                cell.fill = fill
-                cell.font = font
-            elif is_alt_row:
-                cell.fill = alt_row_fill
-
-    # Set column widths
-    for col_idx, header in enumerate(HEADERS, 1):
-        ws.column_dimensions[get_column_letter(col_idx)].width = COLUMN_WIDTHS.get(header, 15)
-
-    # Set row heights (estimate based on content)
-    ws.row_dimensions[1].height = 25  # Header row
-    for row_idx in range(2, len(results) + 2):
-        # Calculate height based on longest cell content
-        max_lines = 1
-        for col_idx, header in enumerate(HEADERS, 1):
-            value = str(results[row_idx - 2].get(header, ""))
-            width = COLUMN_WIDTHS.get(header, 15)
-            estimated_lines = max(1, len(value) // (width * 1.5) + value.count('\n') + 1)
-            max_lines = max(max_lines, estimated_lines)
-        ws.row_dimensions[row_idx].height = min(400, max(30, max_lines * 15))
-
-    # Add autofilter
-    ws.auto_filter.ref = f"A1:{get_column_letter(len(HEADERS))}{len(results) + 1}"
-
-    # Add Summary sheet
-    ws_summary = wb.create_sheet("Summary", 0)
-    ws_summary.sheet_properties.tabColor = "2F5496"
-
-    # Summary content
-    summary_data = [
-        ("EVALUATION SUMMARY", ""),
-        ("", ""),
-        ("Project", metadata.get("project", "N/A") if metadata else "N/A"),
-        ("Date", metadata.get("date", datetime.now().strftime("%Y-%m-%d %H:%M")) if metadata else datetime.now().strftime("%Y-%m-%d %H:%M")),
-        ("Total Queries", len(results)),
-        ("", ""),
-        ("VERDICTS", "COUNT"),
-    ]
+class XlsxReportWriter:
+    """
+    Streaming XLSX report writer.
 
-    # Count verdicts
-    verdict_counts = {"PASS": 0, "PARTIAL": 0, "FAIL": 0, "NO_RETRIEVAL": 0}
-    for r in results:
-        v = str(r.get("verdict", "")).upper()
-        if v in verdict_counts:
-            verdict_counts[v] += 1
+    The workbook is written in openpyxl write-only mode: each add() streams
+    one row to disk, and finish() adds the Summary sheet from the aggregate,
+    so memory stays flat however many rows there are.
 
-    for verdict, count in verdict_counts.items():
-        pct = f"{count / len(results) * 100:.1f}%" if results else "0%"
-        summary_data.append((verdict, f"{count} ({pct})"))
+    Args:
+        output_path: Path to save the XLSX file
+        metadata: Optional metadata dict with project, date, etc.
+        load_test: Optional load_test.py summary, added as a "Load Test" sheet
+        headers: Results sheet columns (default: HEADERS, see result_headers)
+    """
 
-    # Write summary
-    for row_idx, (label, value) in enumerate(summary_data, 1):
-        cell_label = ws_summary.cell(row=row_idx, column=1, value=label)
-        cell_value = ws_summary.cell(row=row_idx, column=2, value=value)
+    def __init__(self, output_path: str, metadata: dict = None, load_test: dict = None, headers: list[str] = None):
+        if not HAS_OPENPYXL:
+            raise ImportError("openpyxl is required. Install with: pip install openpyxl")
+
+        self.output_path = output_path
+        self.metadata = metadata
+        self.load_test = load_test
+        self.headers = headers or HEADERS
+
+        self.wb = openpyxl.Workbook(write_only=True)
+        self.styles = create_xlsx_styles()
+        for style in self.styles.values():
+            self.wb.add_named_style(style)
+
+        self.ws = ws = self.wb.create_sheet("Evaluation Results")
+
+        # Column widths, frozen header and header height must precede the first row
+        for col_idx, header in enumerate(self.headers, 1):
+            ws.column_dimensions[get_column_letter(col_idx)].width = COLUMN_WIDTHS.get(header, 15)
+        ws.freeze_panes = "A2"
+        ws.row_dimensions[1].height = 25
+
+        ws.append([_styled_cell(ws, header.upper(), self.styles["header"].name) for header in self.headers])
+        del ws.row_dimensions[1]
+        self.row_idx = 1
+
+    def add(self, result: dict) -> None:
+        """Append one result row."""
+        ws, styles = self.ws, self.styles
+        self.row_idx += 1
+        row_idx = self.row_idx
+        is_alt_row = row_idx % 2 == 0
 
-        if row_idx == 1:
-            cell_label.font = Font(bold=True, size=14, color=COLORS["header_bg"])
-        elif label in ["VERDICTS", "Project", "Date", "Total Queries"]:
-            cell_label.font = Font(bold=True)
-        elif label in verdict_counts:
-            fill, font = get_verdict_style(label)
-            cell_label.fill = fill
-            cell_label.font = font
+        row = []
+        for header in self.headers:
+            value = result.get(header, "")
+            if header == "verdict":
+                style = styles.get(str(value).upper(), styles["NO_RETRIEVAL"])
+            elif header == "confidence" and result.get("needs_review"):
+                style = styles["review"]
+            elif header in ["id", "num_sources", "latency_s", "confidence"]:
+                style = styles["center_alt" if is_alt_row else "center"]
+            else:
+                style = styles["text_alt" if is_alt_row else "text"]
+            row.append(_styled_cell(ws, value, style.name))
+
+        # Row dimensions are read when the row is written, then dropped
+        ws.row_dimensions[row_idx].height = estimate_row_height(result, self.headers)
+        ws.append(row)
+        del ws.row_dimensions[row_idx]
+
+    def finish(self, aggregate: ReportAggregate) -> str:
+        """Add the Summary (and Load Test) sheets and save. Returns the path."""
+        metadata = self.metadata
+        total = aggregate.total
+        verdict_counts = aggregate.verdict_counts
+
+        # Add autofilter
+        self.ws.auto_filter.ref = f"A1:{get_column_letter(len(self.headers))}{total + 1}"
+
+        # Add Summary sheet
+        ws_summary = self.wb.create_sheet("Summary", 0)
+        ws_summary.sheet_properties.tabColor = "2F5496"
+        ws_summary.column_dimensions["A"].width = 20
+        ws_summary.column_dimensions["B"].width = 25
+        ws_summary.column_dimensions["C"].width = 12
+        ws_summary.column_dimensions["D"].width = 12
+
+        # Summary content
+        summary_data = [
+            ("EVALUATION SUMMARY", ""),
+            ("", ""),
+            ("Project", metadata.get("project", "N/A") if metadata else "N/A"),
+            ("Date", metadata.get("date", datetime.now().strftime("%Y-%m-%d %H:%M")) if metadata else datetime.now().strftime("%Y-%m-%d %H:%M")),
+            ("Total Queries", total),
+            ("", ""),
+            ("VERDICTS", "COUNT"),
+        ]
+
+        for verdict, count in verdict_counts.items():
+            pct = f"{count / total * 100:.1f}%" if total else "0%"
+            summary_data.append((verdict, f"{count} ({pct})"))
+        if aggregate.needs_review:
+            summary_data.extend([("", ""), ("Needs Review", len(aggregate.needs_review))])
+
+        # Write summary
+        for row_idx, (label, value) in enumerate(summary_data, 1):
+            if row_idx == 1:
+                cell_label = _styled_cell(ws_summary, label, font=Font(bold=True, size=14, color=COLORS["header_bg"]))
+            elif label in ["VERDICTS", "Project", "Date", "Total Queries", "Needs Review"]:
+                cell_label = _styled_cell(ws_summary, label, font=Font(bold=True))
+            elif label in verdict_counts:
+                fill, font = get_verdict_style(label)
+                cell_label = _styled_cell(ws_summary, label, font=font, fill=fill)
+            else:
+                cell_label = label
+            ws_summary.append([cell_label, value])
+
+        # Timing percentiles
+        timing_stats = aggregate.timing_stats()
+        if timing_stats:
+            ws_summary.append([])
+            timing_header = ["TIMING"] + [f"P{pct}" for pct in PERCENTILES]
+            ws_summary.append([_styled_cell(ws_summary, label, font=Font(bold=True)) for label in timing_header])
+            for stat in timing_stats.values():
+                ws_summary.append([stat["label"]] + [stat[f"p{pct}"] for pct in PERCENTILES])
+
+        # Per-product breakdown
+        products = aggregate.product_breakdown()
+        if products:
+            ws_summary.append([])
+            product_header = ["PRODUCT", "PASS / TOTAL", "PASS %", "P95 (s)"]
+            ws_summary.append([_styled_cell(ws_summary, label, font=Font(bold=True)) for label in product_header])
+            for row in products:
+                ws_summary.append([
+                    row["product"],
+                    f"{row['verdicts']['PASS']} / {row['total']}",
+                    f"{row['pass_rate'] * 100:.1f}%",
+                    row["p95_s"],
+                ])
+
+        # Variant groups whose queries disagree
+        if aggregate.variant_groups:
+            inconsistent = aggregate.inconsistent_variant_groups()
+            ws_summary.append([])
+            ws_summary.append([
+                _styled_cell(ws_summary, "Variant Groups", font=Font(bold=True)),
+                f"{len(aggregate.variant_groups)} ({len(inconsistent)} inconsistent)",
+            ])
 
-    ws_summary.column_dimensions["A"].width = 20
-    ws_summary.column_dimensions["B"].width = 25
+        if self.load_test:
+            add_load_test_sheet(self.wb, self.load_test)
 
-    # Save
-    wb.save(output_path)
-    return output_path
+        # Save
+        self.wb.save(self.output_path)
+        return self.output_path
 
 
-def create_markdown_report(results: list[dict], output_path: str, metadata: dict = None) -> str:
+def create_xlsx_report(
+    results,
+    output_path: str,
+    metadata: dict = None,
+    load_test: dict = None,
+    headers: list[str] = None
+) -> str:
     """
-    Create a Markdown report.
+    Create an XLSX report with consistent styling.
 
     Args:
-        results: List of evaluation result dicts
-        output_path: Path to save the markdown file
-        metadata: Optional metadata dict
+        results: Iterable of evaluation result dicts with keys matching HEADERS
+            (read exactly once; a generator is fine)
+        output_path: Path to save the XLSX file
+        metadata: Optional metadata dict with project, date, etc.
+        load_test: Optional load_test.py summary, added as a "Load Test" sheet
+        headers: Results sheet columns (default: HEADERS)
 
     Returns:
         Path to the created file
     """
+    writer = XlsxReportWriter(output_path, metadata, load_test, headers)
+    aggregate = aggregate_results(results, writer)
+    try:
+        return writer.finish(aggregate)
+    finally:
+        aggregate.close()
+
+
+def add_load_test_sheet(wb, load_test: dict) -> None:
+    """Add a "Load Test" sheet rendering a load_test.py summary."""
+    ws = wb.create_sheet("Load Test")
+    ws.column_dimensions["A"].width = 28
+    ws.column_dimensions["B"].width = 30
+    for col_idx in range(3, 3 + len(LOAD_TEST_PERCENTILES)):
+        ws.column_dimensions[get_column_letter(col_idx)].width = 10
+
+    ws.append([_styled_cell(ws, "LOAD TEST", font=Font(bold=True, size=14, color=COLORS["header_bg"]))])
+    ws.append([])
+    for label, value in load_test_overview(load_test):
+        ws.append([_styled_cell(ws, label, font=Font(bold=True)), value])
+
+    ws.append([])
+    header_fill = PatternFill(start_color=COLORS["header_bg"], end_color=COLORS["header_bg"], fill_type="solid")
+    header_font = Font(bold=True, color=COLORS["header_font"])
+    ws.append([
+        _styled_cell(ws, label, font=header_font, fill=header_fill)
+        for label in ["LATENCY (s)", "COUNT"] + [p[:-2].upper() for p in LOAD_TEST_PERCENTILES]
+    ])
+    for key, label in LOAD_TEST_LATENCIES:
+        dist = load_test.get(key) or {}
+        ws.append([label, dist.get("count", 0)] + [dist.get(pct) for pct in LOAD_TEST_PERCENTILES])
+
+
+def format_confidence(r: dict) -> str:
+    """Confidence of a suggested verdict, flagged when it needs review."""
+    confidence = r.get("confidence")
+    if confidence is None:
+        return "-"
+    return f"{confidence:.2f}" + (" ⚠️" if r.get("needs_review") else "")
+
+
+def markdown_table_row(r: dict, confidence: bool = False) -> str:
+    """One row of the Markdown results table (with a Confidence column if requested)."""
+    rid = r.get("id", "")
+    query = r.get("query", "")[:50] + ("..." if len(r.get("query", "")) > 50 else "")
+    verdict = r.get("verdict", "")
+    latency = f"{r.get('latency_s', 0):.1f}s"
+    notes = r.get("notes", "")[:60] + ("..." if len(r.get("notes", "")) > 60 else "")
+    if confidence:
+        return f"| {rid} | {query} | {verdict} | {format_confidence(r)} | {latency} | {notes} |"
+    return f"| {rid} | {query} | {verdict} | {latency} | {notes} |"
+
+
+def markdown_details(r: dict) -> list[str]:
+    """The "Detailed Results" lines for one result."""
+    rid = r.get("id", "")
+    query = r.get("query", "")
+    verdict = r.get("verdict", "")
+    response = r.get("response", "")
+    expected = r.get("expected", "")
+    notes = r.get("notes", "")
+
+    verdict_emoji = {"PASS": "✅", "FAIL": "❌", "PARTIAL": "⚠️", "NO_RETRIEVAL": "🔍"}.get(verdict.upper(), "❓")
+
+    lines = [
+        f"### Query {rid}: {query}",
+        "",
+        f"**Verdict:** {verdict} {verdict_emoji}",
+        "",
+    ]
+
+    if r.get("confidence") is not None:
+        lines.extend([
+            f"**Confidence:** {format_confidence(r)}" + (" (needs review)" if r.get("needs_review") else ""),
+            "",
+        ])
+
+    lines.extend([
+        "**Agent Response:**",
+        f"> {response.replace(chr(10), chr(10) + '> ')}",
+        "",
+    ])
+
+    if expected:
+        lines.extend([
+            "**Expected:**",
+            f"> {expected.replace(chr(10), chr(10) + '> ')}",
+            "",
+        ])
+
+    if notes:
+        lines.extend([
+            f"**Notes:** {notes}",
+            "",
+        ])
+
+    lines.append("---")
+    lines.append("")
+    return lines
+
+
+def markdown_summary(aggregate: ReportAggregate, metadata: dict = None, load_test: dict = None) -> list[str]:
+    """Header, verdict summary, latency, breakdowns and load test sections."""
     meta = metadata or {}
     project = meta.get("project", "N/A")
     date = meta.get("date", datetime.now().strftime("%Y-%m-%d %H:%M"))
     kb_path = meta.get("knowledge_base", "N/A")
-
-    # Count verdicts
-    verdict_counts = {"PASS": 0, "PARTIAL": 0, "FAIL": 0, "NO_RETRIEVAL": 0}
-    for r in results:
-        v = str(r.get("verdict", "")).upper()
-        if v in verdict_counts:
-            verdict_counts[v] += 1
-
-    total = len(results)
+    total = aggregate.total
 
     lines = [
         "# Evaluation Report",
@@ -261,80 +783,107 @@ def create_markdown_report(results: list[dict], output_path: str, metadata: dict
         "|---------|-------|------------|",
     ]
 
-    for verdict, count in verdict_counts.items():
+    for verdict, count in aggregate.verdict_counts.items():
         pct = f"{count / total * 100:.0f}%" if total else "0%"
         lines.append(f"| {verdict} | {count} | {pct} |")
 
-    lines.extend([
-        "",
-        "## Results",
-        "",
-        "| # | Query | Verdict | Latency | Notes |",
-        "|---|-------|---------|---------|-------|",
-    ])
-
-    for r in results:
-        rid = r.get("id", "")
-        query = r.get("query", "")[:50] + ("..." if len(r.get("query", "")) > 50 else "")
-        verdict = r.get("verdict", "")
-        latency = f"{r.get('latency_s', 0):.1f}s"
-        notes = r.get("notes", "")[:60] + ("..." if len(r.get("notes", "")) > 60 else "")
-        lines.append(f"| {rid} | {query} | {verdict} | {latency} | {notes} |")
-
-    # Detailed results
-    lines.extend([
-        "",
-        "## Detailed Results",
-        "",
-    ])
-
-    for r in results:
-        rid = r.get("id", "")
-        query = r.get("query", "")
-        verdict = r.get("verdict", "")
-        response = r.get("response", "")
-        expected = r.get("expected", "")
-        notes = r.get("notes", "")
+    if aggregate.needs_review:
+        lines.extend([
+            "",
+            "## Needs Review",
+            "",
+            f"{len(aggregate.needs_review)} suggested verdicts have low confidence:",
+            "",
+            "| # | Suggested | Confidence | Notes |",
+            "|---|-----------|------------|-------|",
+        ])
+        for r in aggregate.needs_review:
+            confidence = f"{r['confidence']:.2f}" if r["confidence"] is not None else "-"
+            lines.append(f"| {r['id']} | {r['verdict'] or '-'} | {confidence} | {r['notes']} |")
 
-        verdict_emoji = {"PASS": "✅", "FAIL": "❌", "PARTIAL": "⚠️", "NO_RETRIEVAL": "🔍"}.get(verdict.upper(), "❓")
+    timing_stats = aggregate.timing_stats()
+    if timing_stats:
+        lines.extend([
+            "",
+            "## Latency",
+            "",
+            "| Metric | p50 | p95 | p99 | n |",
+            "|--------|-----|-----|-----|---|",
+        ])
+        for stat in timing_stats.values():
+            lines.append(
+                f"| {stat['label']} | {stat['p50']:.2f} | {stat['p95']:.2f} | {stat['p99']:.2f} | {stat['count']} |"
+            )
 
+    products = aggregate.product_breakdown()
+    if products:
         lines.extend([
-            f"### Query {rid}: {query}",
             "",
-            f"**Verdict:** {verdict} {verdict_emoji}",
+            "## By Product",
             "",
-            "**Agent Response:**",
-            f"> {response.replace(chr(10), chr(10) + '> ')}",
+            "| Product | Queries | " + " | ".join(VERDICTS) + " | Pass rate | p50 latency | p95 latency |",
+            "|---------|---------|" + "|".join("-" * (len(v) + 2) for v in VERDICTS) + "|-----------|-------------|-------------|",
+        ])
+        for row in products:
+            counts = " | ".join(str(row["verdicts"][v]) for v in VERDICTS)
+            p50 = f"{row['p50_s']:.2f}s" if row["p50_s"] is not None else "-"
+            p95 = f"{row['p95_s']:.2f}s" if row["p95_s"] is not None else "-"
+            lines.append(
+                f"| {row['product']} | {row['total']} | {counts} | {row['pass_rate'] * 100:.0f}% | {p50} | {p95} |"
+            )
+
+    if aggregate.variant_groups:
+        inconsistent = aggregate.inconsistent_variant_groups()
+        lines.extend([
+            "",
+            "## Variant Groups",
             "",
+            f"**Groups:** {len(aggregate.variant_groups)} "
+            f"({len(aggregate.variant_groups) - len(inconsistent)} consistent, {len(inconsistent)} inconsistent)",
         ])
-
-        if expected:
+        if inconsistent:
             lines.extend([
-                "**Expected:**",
-                f"> {expected.replace(chr(10), chr(10) + '> ')}",
                 "",
-            ])
-
-        if notes:
-            lines.extend([
-                f"**Notes:** {notes}",
+                "Groups whose variants got different verdicts:",
                 "",
+                "| Group | Verdicts |",
+                "|-------|----------|",
             ])
+            for group, counts in inconsistent:
+                verdicts = ", ".join(f"{v}: {n}" for v, n in sorted(counts.items()))
+                lines.append(f"| {group} | {verdicts} |")
+
+    if load_test:
+        lines.extend(["", "## Load Test", ""])
+        lines.extend(f"- **{label}:** {value}" for label, value in load_test_overview(load_test))
+        pct_labels = [p[:-2] for p in LOAD_TEST_PERCENTILES]
+        lines.extend([
+            "",
+            "| Latency (s) | n | " + " | ".join(pct_labels) + " |",
+            "|-------------|---|" + "|".join("-" * (len(p) + 2) for p in pct_labels) + "|",
+        ])
+        for key, label in LOAD_TEST_LATENCIES:
+            dist = load_test.get(key) or {}
+            values = " | ".join(
+                f"{dist[p]:.2f}" if dist.get(p) is not None else "-" for p in LOAD_TEST_PERCENTILES
+            )
+            lines.append(f"| {label} | {dist.get('count', 0)} | {values} |")
 
-        lines.append("---")
-        lines.append("")
+    return lines
 
-    # Issues and recommendations
-    fails = [r for r in results if r.get("verdict", "").upper() in ["FAIL", "NO_RETRIEVAL"]]
 
-    lines.extend([
+def markdown_issues(aggregate: ReportAggregate) -> list[str]:
+    """Issues Found and Recommendations sections."""
+    fails = aggregate.failures
+
+    lines = [
         "## Issues Found",
         "",
-    ])
+    ]
 
     if fails:
         for r in fails:
-            lines.append(f"- **Query {r.get('id')}** ({r.get('verdict')}): {r.get('notes', 'No notes')}")
+            lines.append(f"- **Query {r['id']}** ({r['verdict']}): {r['notes']}")
     else:
         lines.append("*No issues found in this evaluation.*")
 
@@ -352,24 +901,123 @@ def create_markdown_report(results: list[dict], output_path: str, metadata: dict
     else:
         lines.append("*No recommendations - all queries passed.*")
 
-    content = "\n".join(lines)
+    return lines
+
+
+class MarkdownReportWriter:
+    """
+    Streaming Markdown report writer.
+
+    The results table and detailed results are spooled to temporary files
+    (in memory up to MARKDOWN_SPOOL_BYTES, then on disk) as results arrive;
+    finish() writes the summary, which needs the whole pass, and then copies
+    the spooled sections after it.
 
-    Path(output_path).write_text(content, encoding="utf-8")
-    return output_path
+    Args:
+        output_path: Path to save the markdown file
+        metadata: Optional metadata dict
+        load_test: Optional load_test.py summary, rendered as a "Load Test" section
+        headers: Result columns; the results table gets a Confidence column
+            when they include "confidence"
+    """
+
+    def __init__(self, output_path: str, metadata: dict = None, load_test: dict = None, headers: list[str] = None):
+        self.output_path = output_path
+        self.metadata = metadata
+        self.load_test = load_test
+        self.confidence = "confidence" in (headers or HEADERS)
+        self._table = tempfile.SpooledTemporaryFile(max_size=MARKDOWN_SPOOL_BYTES, mode="w+", encoding="utf-8")
+        self._details = tempfile.SpooledTemporaryFile(max_size=MARKDOWN_SPOOL_BYTES, mode="w+", encoding="utf-8")
+
+    def add(self, result: dict) -> None:
+        """Spool the table row and detailed section of one result."""
+        self._table.write(markdown_table_row(result, self.confidence) + "\n")
+        self._details.write("\n".join(markdown_details(result)) + "\n")
+
+    def finish(self, aggregate: ReportAggregate) -> str:
+        """Write the report file. Returns the path."""
+        head = markdown_summary(aggregate, self.metadata, self.load_test)
+        head.extend(["", "## Results", ""])
+        if self.confidence:
+            head.extend([
+                "| # | Query | Verdict | Confidence | Latency | Notes |",
+                "|---|-------|---------|------------|---------|-------|",
+            ])
+        else:
+            head.extend([
+                "| # | Query | Verdict | Latency | Notes |",
+                "|---|-------|---------|---------|-------|",
+            ])
+
+        try:
+            with open(self.output_path, "w", encoding="utf-8") as f:
+                f.write("\n".join(head) + "\n")
+                self._table.seek(0)
+                shutil.copyfileobj(self._table, f)
+                f.write("\n## Detailed Results\n\n")
+                self._details.seek(0)
+                shutil.copyfileobj(self._details, f)
+                f.write("\n".join(markdown_issues(aggregate)))
+        finally:
+            self._table.close()
+            self._details.close()
+        return self.output_path
+
+
+def create_markdown_report(
+    results,
+    output_path: str,
+    metadata: dict = None,
+    load_test: dict = None,
+    headers: list[str] = None
+) -> str:
+    """
+    Create a Markdown report.
+
+    Args:
+        results: Iterable of evaluation result dicts (read exactly once)
+        output_path: Path to save the markdown file
+        metadata: Optional metadata dict
+        load_test: Optional load_test.py summary, rendered as a "Load Test" section
+        headers: Result columns (include "confidence" for a Confidence column)
+
+    Returns:
+        Path to the created file
+    """
+    writer = MarkdownReportWriter(output_path, metadata, load_test, headers)
+    aggregate = aggregate_results(results, writer)
+    try:
+        return writer.finish(aggregate)
+    finally:
+        aggregate.close()
 
 
 def generate_reports(
-    results: list[dict],
+    results,
     output_dir: str,
-    metadata: dict = None
+    metadata: dict = None,
+    load_test: dict = None,
+    store: str = None,
+    headers: list[str] = None
 ) -> tuple[str, str]:
     """
     Generate both Markdown and XLSX reports.
 
+    Both reports are written from a single pass over results, so results may
+    be a generator (e.g. iter_results over a large responses JSONL). Results
+    scored by score_verdicts.py (with "confidence") get a Confidence column
+    and a Needs Review section. The columns depend on every result: without
+    headers, a list is scanned first and any other iterable is spooled to a
+    temporary file while it is scanned.
+
     Args:
-        results: List of evaluation result dicts
+        results: Iterable of evaluation result dicts
         output_dir: Directory to save reports
         metadata: Optional metadata dict
+        load_test: Optional load_test.py summary to render next to the verdicts
+        store: Optional run store directory (see run_store.py); the results are
+            appended to it in the same pass, with the output folder name as run id
+        headers: Result columns (default: result_headers of the results)
 
     Returns:
         Tuple of (markdown_path, xlsx_path)
@@ -379,8 +1027,30 @@ def generate_reports(
     md_path = os.path.join(output_dir, "report.md")
     xlsx_path = os.path.join(output_dir, "results.xlsx")
 
-    create_markdown_report(results, md_path, metadata)
-    create_xlsx_report(results, xlsx_path, metadata)
+    spool = None
+    if headers is None and isinstance(results, (list, tuple)):
+        headers = result_headers(results)
+    elif headers is None:
+        spool = RowSpool()
+        for result in results:
+            spool.append(result)
+        results = spool
+        headers = result_headers(spool)
+
+    xlsx_writer = XlsxReportWriter(xlsx_path, metadata, load_test, headers)
+    md_writer = MarkdownReportWriter(md_path, metadata, load_test, headers)
+    writers = [md_writer, xlsx_writer]
+    if store:
+        run_id = Path(output_dir).resolve().name
+        writers.append(RunStore(store).writer(run_id, (metadata or {}).get("project", ""), source="report"))
+    aggregate = aggregate_results(results, *writers)
+    try:
+        for writer in writers:
+            writer.finish(aggregate)
+    finally:
+        aggregate.close()
+        if spool is not None:
+            spool.close()
 
     return md_path, xlsx_path
 
@@ -392,30 +1062,38 @@ def get_run_folder_name() -> str:
 
 def main():
     parser = argparse.ArgumentParser(description="Generate evaluation reports")
-    parser.add_argument("--results", "-r", required=True, help="Path to results JSON file")
+    parser.add_argument("--results", "-r", required=True, help="Path to results JSON or JSONL file")
     parser.add_argument("--output-dir", "-o", required=True, help="Output directory for reports")
     parser.add_argument("--project", "-p", default="", help="Project ID for metadata")
     parser.add_argument("--knowledge-base", "-k", default="", help="Knowledge base path for metadata")
+    parser.add_argument("--load-test", "-l", help="Path to a load_test.py summary JSON to include")
+    parser.add_argument("--store", nargs="?", const=DEFAULT_STORE_PATH,
+                        help=f"Also append the results to a columnar run store (default: {DEFAULT_STORE_PATH})")
     args = parser.parse_args()
 
-    # Load results
-    with open(args.results, "r", encoding="utf-8") as f:
-        results = json.load(f)
-
-    if not isinstance(results, list):
-        results = [results]
-
     metadata = {
         "project": args.project,
         "knowledge_base": args.knowledge_base,
         "date": datetime.now().strftime("%Y-%m-%d %H:%M"),
     }
 
-    md_path, xlsx_path = generate_reports(results, args.output_dir, metadata)
+    load_test = None
+    if args.load_test:
+        with open(args.load_test, "r", encoding="utf-8") as f:
+            load_test = json.load(f)
+
+    # Results are streamed, not loaded up front: one pass for the columns, one for the reports
+    headers = result_headers(iter_results(args.results))
+    results = iter_results(args.results)
+    md_path, xlsx_path = generate_reports(
+        results, args.output_dir, metadata, load_test, store=args.store, headers=headers
+    )
 
     print(f"Reports generated:")
     print(f"  Markdown: {md_path}")
     print(f"  XLSX: {xlsx_path}")
+    if args.store:
+        print(f"  Run store: {args.store}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+HDR-style latency histogram: percentiles in constant memory.
+
+Used by load_test.py (open-loop latencies) and generate_report.py (timing
+percentiles of any number of results).
+
+Usage:
+    from latency_histogram import LatencyHistogram
+    histogram = LatencyHistogram()
+    for seconds in latencies:
+        histogram.record(seconds)
+    histogram.percentile(95), histogram.summary()
+"""
+
+import math
+from typing import Any, Dict, Optional
+
+
+REPORTED_PERCENTILES = [50, 90, 95, 99, 99.9]
+
+
+class LatencyHistogram:
+    """
+    HDR-style latency histogram with bounded relative error.
+
+    Values are recorded in microseconds into log-linear buckets: each power
+    of two is split into 2**sub_bucket_bits linear sub-buckets, so any
+    recorded value is reported within 1 / 2**sub_bucket_bits of its true
+    value (about 0.8% with the default 7 bits) and memory stays constant no
+    matter how many values are recorded.
+    """
+
+    def __init__(self, sub_bucket_bits: int = 7):
+        self.sub_bucket_bits = sub_bucket_bits
+        self.counts: Dict[int, int] = {}
+        self.total = 0
+        self.min_us = None
+        self.max_us = None
+        self.sum_us = 0
+
+    def _index(self, value_us: int) -> int:
+        shift = max(0, value_us.bit_length() - self.sub_bucket_bits - 1)
+        return (shift << (self.sub_bucket_bits + 1)) | (value_us >> shift)
+
+    def _value(self, index: int) -> int:
+        shift = index >> (self.sub_bucket_bits + 1)
+        mantissa = index & ((1 << (self.sub_bucket_bits + 1)) - 1)
+        # Report the bucket midpoint
+        return (mantissa << shift) + ((1 << shift) >> 1)
+
+    def record(self, seconds: float) -> None:
+        value_us = max(0, int(seconds * 1_000_000))
+        index = self._index(value_us)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.total += 1
+        self.sum_us += value_us
+        self.min_us = value_us if self.min_us is None else min(self.min_us, value_us)
+        self.max_us = value_us if self.max_us is None else max(self.max_us, value_us)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """Value (seconds) at or below which pct% of recordings fall."""
+        if not self.total:
+            return None
+        target = max(1, math.ceil(self.total * pct / 100))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= target:
+                return min(self._value(index), self.max_us) / 1_000_000
+        return self.max_us / 1_000_000
+
+    def summary(self) -> Dict[str, Any]:
+        """Count, mean, min, max and REPORTED_PERCENTILES, in seconds."""
+        if not self.total:
+            return {"count": 0}
+        summary = {
+            "count": self.total,
+            "mean_s": round(self.sum_us / self.total / 1_000_000, 3),
+            "min_s": round(self.min_us / 1_000_000, 3),
+            "max_s": round(self.max_us / 1_000_000, 3),
+        }
+        for pct in REPORTED_PERCENTILES:
+            summary[f"p{pct:g}_s"] = round(self.percentile(pct), 3)
+        return summary
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serializable form: bucket values (us) and counts."""
+        return {
+            "sub_bucket_bits": self.sub_bucket_bits,
+            "buckets": [[self._value(i), self.counts[i]] for i in sorted(self.counts)],
+        }
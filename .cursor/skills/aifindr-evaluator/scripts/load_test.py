@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Open-loop load test of an AIFindr agent.
+
+Requests are sent on a fixed schedule (constant rate or linear ramp) whatever
+the agent's response times, like production traffic. Latencies are therefore
+measured from each request's *scheduled* start, so a saturated agent cannot
+hide queueing delay (no coordinated omission). Queries cycle through a fixed
+pool. The run writes a summary JSON that generate_report.py can render next
+to the correctness verdicts.
+
+Usage:
+    # 2 requests/s for 5 minutes
+    python load_test.py --input queries.jsonl --project prj_xxx \
+        --rate 2 --duration 300 --output evals/project/runs/2026-01-21_14-30-45/load_test.json
+
+    # Ramp from 1 to 10 requests/s over 10 minutes
+    python load_test.py --input queries.jsonl --project prj_xxx \
+        --profile ramp --rate 1 --end-rate 10 --duration 600
+
+    # Repeatable client-side benchmark against a local mock server (see mock_server.py)
+    python load_test.py --input queries.jsonl --project prj_test --base-url http://127.0.0.1:8765 \
+        --rate 50 --duration 30
+
+    # Render it with the evaluation reports
+    python generate_report.py --results results.json --output-dir ... --load-test load_test.json
+
+Required environment variables:
+    AIFINDR_ORG_ID: Organization ID
+    AIFINDR_API_KEY: API key
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+import httpx
+
+from fetch_response import (
+    DEFAULT_TIMEOUT,
+    SSEAnswerParser,
+    ask_with_sse_async,
+    build_headers,
+    client_options,
+    create_conversation_async,
+    get_env,
+    load_queries,
+    resolve_base_url,
+)
+from latency_histogram import LatencyHistogram
+
+
+DEFAULT_MAX_IN_FLIGHT = 1000
+
+
+def arrival_times(profile: str, rate: float, duration: float, end_rate: Optional[float] = None) -> Iterator[float]:
+    """
+    Scheduled send offsets (seconds from start) for an open-loop profile.
+
+    constant: `rate` requests/s for `duration` seconds.
+    ramp: rate grows linearly from `rate` to `end_rate` over `duration`; the
+        k-th request is sent when the integrated rate reaches k.
+    """
+    if profile == "constant":
+        if rate <= 0:
+            return
+        for k in range(int(rate * duration)):
+            yield k / rate
+    elif profile == "ramp":
+        end_rate = rate if end_rate is None else end_rate
+        slope = (end_rate - rate) / duration
+        total = int((rate + end_rate) / 2 * duration)
+        for k in range(total):
+            # Solve rate * t + slope / 2 * t**2 = k for t
+            if abs(slope) < 1e-12:
+                yield k / rate
+            else:
+                yield (-rate + math.sqrt(rate * rate + 2 * slope * k)) / slope
+    else:
+        raise ValueError(f"Unknown profile: {profile}")
+
+
+class LoadTestStats:
+    """Aggregated outcomes of a load test."""
+
+    def __init__(self):
+        self.latency = LatencyHistogram()
+        self.service = LatencyHistogram()
+        self.ttft = LatencyHistogram()
+        self.conversation = LatencyHistogram()
+        self.sent = 0
+        self.ok = 0
+        self.dropped = 0
+        self.broken_streams = 0
+        self.errors: Dict[str, int] = {}
+
+    def record_error(self, key: str) -> None:
+        self.errors[key] = self.errors.get(key, 0) + 1
+
+
+def error_key(error: Exception) -> str:
+    """Group errors by HTTP status, or by exception type otherwise."""
+    if isinstance(error, httpx.HTTPStatusError):
+        return f"HTTP {error.response.status_code}"
+    if isinstance(error, TimeoutError):
+        return "timeout"
+    return type(error).__name__
+
+
+async def run_load_test(
+    project_id: str,
+    queries: List[str],
+    profile: str = "constant",
+    rate: float = 1.0,
+    duration: float = 60.0,
+    end_rate: Optional[float] = None,
+    timeout: float = DEFAULT_TIMEOUT,
+    max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+    org_id: str = None,
+    api_key: str = None,
+    base_url: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Drive the agent with an open-loop arrival schedule.
+
+    Each arrival creates a conversation and asks the next query from the pool
+    through ask_with_sse_async. Arrivals that would exceed max_in_flight are
+    counted as dropped (the client, not the agent, is saturated). A stream
+    that delivered data but failed or ended before the answer JSON closed
+    counts as broken.
+
+    Returns:
+        Summary dict (see build_summary)
+    """
+    org_id = org_id or get_env("AIFINDR_ORG_ID")
+    api_key = api_key or get_env("AIFINDR_API_KEY")
+    api_base_url = resolve_base_url(project_id, base_url)
+    headers = build_headers(org_id, api_key)
+
+    stats = LoadTestStats()
+    in_flight = set()
+
+    async def one_request(client: httpx.AsyncClient, query: str, scheduled: float) -> None:
+        parser = SSEAnswerParser()
+        try:
+            conv_id, conversation_s = await create_conversation_async(client, headers, api_base_url)
+            stats.conversation.record(conversation_s)
+            await ask_with_sse_async(
+                client, headers, api_base_url, conv_id, query, timeout=timeout, parser=parser
+            )
+        except Exception as e:
+            stats.record_error(error_key(e))
+            if parser.first_byte_at is not None:
+                stats.broken_streams += 1
+            return
+        if not parser.answer.complete:
+            stats.broken_streams += 1
+            stats.record_error("incomplete answer")
+            return
+        stats.ok += 1
+        stats.latency.record(time.monotonic() - scheduled)
+        stats.service.record(parser.end_at + conversation_s)
+        ttft_s = parser.timings()["ttft_s"]
+        if ttft_s is not None:
+            stats.ttft.record(ttft_s)
+
+    start_wall = datetime.now()
+    async with httpx.AsyncClient(**client_options(timeout, max_in_flight)) as client:
+        start = time.monotonic()
+        for k, offset in enumerate(arrival_times(profile, rate, duration, end_rate)):
+            scheduled = start + offset
+            delay = scheduled - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if len(in_flight) >= max_in_flight:
+                stats.dropped += 1
+                continue
+            stats.sent += 1
+            task = asyncio.create_task(one_request(client, queries[k % len(queries)], scheduled))
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+        send_window = time.monotonic() - start
+        if in_flight:
+            await asyncio.gather(*in_flight)
+        elapsed = time.monotonic() - start
+
+    return build_summary(
+        stats, profile, rate, end_rate, duration, send_window, elapsed, project_id, start_wall
+    )
+
+
+def build_summary(
+    stats: LoadTestStats,
+    profile: str,
+    rate: float,
+    end_rate: Optional[float],
+    duration: float,
+    send_window: float,
+    elapsed: float,
+    project_id: str,
+    started: datetime
+) -> Dict[str, Any]:
+    """Serializable load-test summary, as read by generate_report.py."""
+    failed = sum(stats.errors.values())
+    return {
+        "type": "load_test",
+        "project": project_id,
+        "started": started.isoformat(timespec="seconds"),
+        "profile": profile,
+        "target_rate": rate,
+        "end_rate": end_rate if profile == "ramp" else rate,
+        "duration_s": duration,
+        "elapsed_s": round(elapsed, 2),
+        "sent": stats.sent,
+        "ok": stats.ok,
+        "failed": failed,
+        "dropped": stats.dropped,
+        "achieved_rate": round(stats.sent / send_window, 3) if send_window > 0 else 0.0,
+        "goodput": round(stats.ok / elapsed, 3) if elapsed > 0 else 0.0,
+        "error_rate": round(failed / stats.sent, 4) if stats.sent else 0.0,
+        "errors_by_status": dict(sorted(stats.errors.items(), key=lambda kv: -kv[1])),
+        "broken_streams": stats.broken_streams,
+        "latency": stats.latency.summary(),
+        "service_time": stats.service.summary(),
+        "ttft": stats.ttft.summary(),
+        "conversation": stats.conversation.summary(),
+        "histogram": stats.latency.to_dict(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Open-loop load test of an AIFindr agent")
+    parser.add_argument("--input", "-i", required=True, help="JSONL file with the query pool")
+    parser.add_argument("--project", "-p", required=True, help="AIFindr project ID")
+    parser.add_argument("--profile", choices=["constant", "ramp"], default="constant", help="Arrival profile")
+    parser.add_argument("--rate", type=float, required=True, help="Requests/s (start rate for ramp)")
+    parser.add_argument("--end-rate", type=float, help="Ramp: final requests/s")
+    parser.add_argument("--duration", type=float, default=60.0, help="Seconds of traffic (default: 60)")
+    parser.add_argument("--timeout", "-t", type=float, default=DEFAULT_TIMEOUT,
+                        help=f"Maximum seconds per request (default: {DEFAULT_TIMEOUT:.0f})")
+    parser.add_argument("--max-in-flight", type=int, default=DEFAULT_MAX_IN_FLIGHT,
+                        help=f"Client-side cap on open requests (default: {DEFAULT_MAX_IN_FLIGHT})")
+    parser.add_argument("--output", "-o", help="Write the summary JSON here (default: stdout)")
+    parser.add_argument("--base-url",
+                        help="API base URL, e.g. a local mock_server.py (default: env AIFINDR_BASE_URL, else production)")
+    args = parser.parse_args()
+
+    if args.profile == "ramp" and args.end_rate is None:
+        parser.error("--end-rate is required for the ramp profile")
+
+    queries = [item["query"] for item in load_queries(args.input)]
+    if not queries:
+        parser.error(f"No queries in {args.input}")
+
+    summary = asyncio.run(run_load_test(
+        args.project, queries,
+        profile=args.profile,
+        rate=args.rate,
+        duration=args.duration,
+        end_rate=args.end_rate,
+        timeout=args.timeout,
+        max_in_flight=args.max_in_flight,
+        base_url=args.base_url,
+    ))
+
+    text = json.dumps(summary, ensure_ascii=False, indent=2)
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.output).write_text(text, encoding="utf-8")
+    else:
+        print(text)
+
+    latency = summary["latency"]
+    print(
+        f"Sent {summary['sent']} ({summary['achieved_rate']:.2f}/s), ok {summary['ok']}, "
+        f"failed {summary['failed']}, dropped {summary['dropped']}, "
+        f"broken streams {summary['broken_streams']}; "
+        f"p50 {latency.get('p50_s', 0):.2f}s p99 {latency.get('p99_s', 0):.2f}s",
+        file=sys.stderr
+    )
+    return 1 if summary["failed"] or summary["dropped"] else 0
+
+
+if __name__ == "__main__":
+    exit(main())
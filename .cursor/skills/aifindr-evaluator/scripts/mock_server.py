@@ -0,0 +1,390 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the AIFindr widget API, for offline client benchmarks.
+
+Implements POST .../conversations and the streaming POST .../ask endpoint
+with the same SSE events as the agent (search-workflow-knowledge-retrieved,
+then search-workflow-answer-delta-generated deltas of the answer JSON), so
+fetch_response.py, run_driver.py and load_test.py run unchanged against it
+with --base-url. Any path prefix is accepted, and so are any credentials.
+
+Per-event delays, payload sizes and injected faults are configurable. Every
+random choice comes from a generator seeded with --seed, the query and how
+many times that query has been asked, so a run produces the same delays
+and faults whatever the concurrency or arrival order.
+
+Usage:
+    python mock_server.py --port 8765 --retrieval-delay 0.3 --first-delta-delay 0.5 \
+        --delta-delay 0.02 --jitter 0.2 --sources 8
+
+    # Fault injection: 2% HTTP 503, 1% streams cut mid-answer, 1% stalled for 30s
+    python mock_server.py --port 8765 --error-rate 0.02 --disconnect-rate 0.01 \
+        --stall-rate 0.01 --stall-s 30
+
+    AIFINDR_ORG_ID=org_test AIFINDR_API_KEY=test python fetch_response.py \
+        --input queries.jsonl --project prj_test --base-url http://127.0.0.1:8765 --concurrency 32
+
+    # Requests served and faults injected so far
+    curl -s http://127.0.0.1:8765/stats
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from fetch_response import ANSWER_DELTA_EVENT, RETRIEVAL_EVENT
+
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+PRODUCTS = ["SCTR", "Vida Ley", "Salud", "Vehicular"]
+
+FILLER = (
+    "El seguro cubre las prestaciones descritas en la póliza dentro de los límites y "
+    "condiciones pactadas, previa presentación de la documentación requerida. "
+)
+
+
+class MockAgent:
+    """
+    Timing, payload and fault settings of the mock agent.
+
+    Args:
+        conversation_delay: Seconds before answering POST /conversations
+        retrieval_delay: Seconds from /ask to the retrieval event
+        first_delta_delay: Seconds from the retrieval event to the first answer delta
+        delta_delay: Seconds between answer deltas
+        jitter: Relative random spread of every delay (0.2 = ±20%)
+        num_sources: Chunks in the retrieval event
+        chunk_chars: Characters of text per retrieved chunk
+        answer_chars: Characters of the answer text_response
+        delta_chars: Characters of answer JSON per delta
+        error_rate: Share of /ask requests answered with error_status
+        error_status: HTTP status of injected errors
+        conversation_error_rate: Share of /conversations requests answered with error_status
+        disconnect_rate: Share of streams cut (connection closed) mid-answer
+        malformed_rate: Share of streams that end cleanly with a truncated answer JSON
+        stall_rate: Share of streams that pause stall_s seconds mid-answer
+        stall_s: Length of an injected stall
+        seed: Seed of every random choice
+    """
+
+    def __init__(
+        self,
+        conversation_delay: float = 0.05,
+        retrieval_delay: float = 0.2,
+        first_delta_delay: float = 0.3,
+        delta_delay: float = 0.01,
+        jitter: float = 0.0,
+        num_sources: int = 5,
+        chunk_chars: int = 800,
+        answer_chars: int = 600,
+        delta_chars: int = 4,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        conversation_error_rate: float = 0.0,
+        disconnect_rate: float = 0.0,
+        malformed_rate: float = 0.0,
+        stall_rate: float = 0.0,
+        stall_s: float = 30.0,
+        seed: int = 0
+    ):
+        self.conversation_delay = conversation_delay
+        self.retrieval_delay = retrieval_delay
+        self.first_delta_delay = first_delta_delay
+        self.delta_delay = delta_delay
+        self.jitter = jitter
+        self.num_sources = num_sources
+        self.chunk_chars = chunk_chars
+        self.answer_chars = answer_chars
+        self.delta_chars = max(1, delta_chars)
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.conversation_error_rate = conversation_error_rate
+        self.disconnect_rate = disconnect_rate
+        self.malformed_rate = malformed_rate
+        self.stall_rate = stall_rate
+        self.stall_s = stall_s
+        self.seed = seed
+        self.stats: Counter = Counter()
+        self._asked: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def count(self, key: str) -> None:
+        with self._lock:
+            self.stats[key] += 1
+
+    def rng(self, kind: str, key: str) -> random.Random:
+        """Generator for the n-th request of this kind and key (deterministic per seed)."""
+        with self._lock:
+            n = self._asked[(kind, key)]
+            self._asked[(kind, key)] += 1
+        digest = hashlib.sha256(f"{self.seed}\0{kind}\0{key}\0{n}".encode("utf-8")).digest()
+        return random.Random(int.from_bytes(digest[:8], "big"))
+
+    def delay(self, rng: random.Random, seconds: float) -> float:
+        if seconds <= 0:
+            return 0.0
+        return max(0.0, seconds * (1 + self.jitter * (2 * rng.random() - 1)))
+
+    def sources(self, query: str, rng: random.Random) -> List[Dict[str, Any]]:
+        """Retrieved chunks shaped like the Knowledge class objects."""
+        key = hashlib.sha1(query.encode("utf-8")).hexdigest()[:8]
+        text = (FILLER * (self.chunk_chars // len(FILLER) + 1))[:self.chunk_chars]
+        distance = 0.1 + 0.2 * rng.random()
+        sources = []
+        for i in range(self.num_sources):
+            sources.append({
+                "chunk_external_id": f"mock-{key}-{i}",
+                "title": f"Documento {key}",
+                "text": text,
+                "source": f"doc-{key}",
+                "metadata": {"totalChunks": self.num_sources, "chunkNumber": i + 1},
+                "accessParams": {"sourceType": "file", "fileName": f"{key}.pdf"},
+                "_additional": {"distance": round(distance, 4)},
+            })
+            distance += 0.02 + 0.05 * rng.random()
+        return sources
+
+    def answer(self, query: str, rng: random.Random) -> str:
+        """The answer JSON string streamed as deltas."""
+        text = f"Respuesta a: {query}. "
+        text += (FILLER * (self.answer_chars // len(FILLER) + 1))[:max(0, self.answer_chars - len(text))]
+        return json.dumps({
+            "text_response": text,
+            "product": rng.choice(PRODUCTS),
+            "reasoning": "Respuesta generada por el servidor de pruebas.",
+        }, ensure_ascii=False)
+
+    def plan(self, query: str) -> Tuple[Optional[str], Iterator[Tuple[float, Optional[bytes]]]]:
+        """
+        Fault and event schedule of one /ask request.
+
+        Returns:
+            (fault, steps): fault is None, "error", "disconnect", "malformed"
+            or "stall"; steps yields (seconds to wait, SSE bytes to send), and
+            None bytes means close the connection abruptly
+        """
+        rng = self.rng("ask", query)
+        fault = None
+        roll = rng.random()
+        for name, rate in (
+            ("error", self.error_rate),
+            ("disconnect", self.disconnect_rate),
+            ("malformed", self.malformed_rate),
+            ("stall", self.stall_rate),
+        ):
+            if roll < rate:
+                fault = name
+                break
+            roll -= rate
+        return fault, self._steps(query, rng, fault)
+
+    def _steps(self, query: str, rng: random.Random, fault: Optional[str]) -> Iterator[Tuple[float, Optional[bytes]]]:
+        sources = self.sources(query, rng)
+        yield self.delay(rng, self.retrieval_delay), sse_event(RETRIEVAL_EVENT, sources)
+
+        answer = self.answer(query, rng)
+        deltas = [answer[i:i + self.delta_chars] for i in range(0, len(answer), self.delta_chars)]
+        cut = len(deltas) // 2
+        for i, delta in enumerate(deltas):
+            if i == cut and fault in ("disconnect", "malformed"):
+                yield 0.0, None if fault == "disconnect" else b""
+                return
+            wait = self.delay(rng, self.first_delta_delay if i == 0 else self.delta_delay)
+            if i == cut and fault == "stall":
+                wait += self.stall_s
+            yield wait, sse_event(ANSWER_DELTA_EVENT, {"delta": delta})
+
+
+def sse_event(event: str, data: Any) -> bytes:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n".encode("utf-8")
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    """HTTP/1.1 keep-alive handler; the MockAgent is the server's `agent` attribute."""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _read_json(self) -> Dict[str, Any]:
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        try:
+            return json.loads(body) if body else {}
+        except json.JSONDecodeError:
+            return {}
+
+    def _send_json(self, status: int, payload: Dict[str, Any]) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _write_chunk(self, data: bytes) -> None:
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.flush()
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/stats"):
+            self._send_json(200, dict(self.server.agent.stats))
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        agent: MockAgent = self.server.agent
+        payload = self._read_json()
+        path = self.path.split("?", 1)[0].rstrip("/")
+
+        if path.endswith("/conversations"):
+            agent.count("conversations")
+            rng = agent.rng("conversation", "")
+            time.sleep(agent.delay(rng, agent.conversation_delay))
+            if rng.random() < agent.conversation_error_rate:
+                agent.count("conversation_errors")
+                self._send_json(agent.error_status, {"error": "injected fault"})
+                return
+            self._send_json(200, {"conversationId": f"conv_mock_{rng.getrandbits(48):012x}"})
+            return
+
+        if not path.endswith("/ask"):
+            self._send_json(404, {"error": "not found"})
+            return
+
+        agent.count("asks")
+        fault, steps = agent.plan(str(payload.get("query", "")))
+        if fault:
+            agent.count(fault)
+        if fault == "error":
+            time.sleep(agent.retrieval_delay)
+            self._send_json(agent.error_status, {"error": "injected fault"})
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            for wait, data in steps:
+                if wait:
+                    time.sleep(wait)
+                if data is None:
+                    # Cut the stream without the terminating chunk
+                    self.close_connection = True
+                    return
+                if data:
+                    self._write_chunk(data)
+            self._write_chunk(b"")
+        except (BrokenPipeError, ConnectionResetError):
+            # The client gave up (timeout or cancellation)
+            self.close_connection = True
+
+
+class MockServer(ThreadingHTTPServer):
+    """Threaded HTTP server serving one MockAgent."""
+
+    daemon_threads = True
+    # Load tests open many connections at once
+    request_queue_size = 1024
+
+    def __init__(self, address: Tuple[str, int], agent: MockAgent, verbose: bool = False):
+        super().__init__(address, MockHandler)
+        self.agent = agent
+        self.verbose = verbose
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+def start_server(
+    agent: Optional[MockAgent] = None,
+    host: str = DEFAULT_HOST,
+    port: int = 0
+) -> MockServer:
+    """
+    Start a mock server on a background thread (port 0 picks a free port).
+
+    Use server.base_url as base_url in fetch_response / fetch_batch /
+    run_load_test, and server.shutdown() when done.
+    """
+    server = MockServer((host, port), agent or MockAgent())
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local mock of the AIFindr widget API (SSE)")
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"Bind address (default: {DEFAULT_HOST})")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"Port (default: {DEFAULT_PORT})")
+    parser.add_argument("--conversation-delay", type=float, default=0.05, help="Seconds per POST /conversations (default: 0.05)")
+    parser.add_argument("--retrieval-delay", type=float, default=0.2, help="Seconds to the retrieval event (default: 0.2)")
+    parser.add_argument("--first-delta-delay", type=float, default=0.3,
+                        help="Seconds from retrieval to the first answer delta (default: 0.3)")
+    parser.add_argument("--delta-delay", type=float, default=0.01, help="Seconds between answer deltas (default: 0.01)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Relative random spread of every delay, e.g. 0.2 (default: 0)")
+    parser.add_argument("--sources", type=int, default=5, help="Chunks per retrieval event (default: 5)")
+    parser.add_argument("--chunk-chars", type=int, default=800, help="Characters per chunk (default: 800)")
+    parser.add_argument("--answer-chars", type=int, default=600, help="Characters of the answer text (default: 600)")
+    parser.add_argument("--delta-chars", type=int, default=4, help="Characters of answer JSON per delta (default: 4)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of /ask requests failing with --error-status")
+    parser.add_argument("--error-status", type=int, default=503, help="HTTP status of injected errors (default: 503)")
+    parser.add_argument("--conversation-error-rate", type=float, default=0.0,
+                        help="Share of /conversations requests failing with --error-status")
+    parser.add_argument("--disconnect-rate", type=float, default=0.0, help="Share of streams cut mid-answer")
+    parser.add_argument("--malformed-rate", type=float, default=0.0,
+                        help="Share of streams ending cleanly with a truncated answer JSON")
+    parser.add_argument("--stall-rate", type=float, default=0.0, help="Share of streams pausing --stall-s mid-answer")
+    parser.add_argument("--stall-s", type=float, default=30.0, help="Length of an injected stall (default: 30)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of delays, payloads and faults (default: 0)")
+    parser.add_argument("--verbose", "-v", action="store_true", help="Log every request")
+    args = parser.parse_args()
+
+    agent = MockAgent(
+        conversation_delay=args.conversation_delay,
+        retrieval_delay=args.retrieval_delay,
+        first_delta_delay=args.first_delta_delay,
+        delta_delay=args.delta_delay,
+        jitter=args.jitter,
+        num_sources=args.sources,
+        chunk_chars=args.chunk_chars,
+        answer_chars=args.answer_chars,
+        delta_chars=args.delta_chars,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        conversation_error_rate=args.conversation_error_rate,
+        disconnect_rate=args.disconnect_rate,
+        malformed_rate=args.malformed_rate,
+        stall_rate=args.stall_rate,
+        stall_s=args.stall_s,
+        seed=args.seed,
+    )
+    server = MockServer((args.host, args.port), agent, verbose=args.verbose)
+    print(f"Mock AIFindr API on {server.base_url} (Ctrl-C to stop)", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(json.dumps(dict(agent.stats)), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
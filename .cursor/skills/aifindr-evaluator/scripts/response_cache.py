@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+On-disk cache of agent responses, keyed by project, query and KB version.
+
+Used by fetch_response.py (--cache / --refresh) so an unchanged agent can be
+re-scored without live SSE calls. Entries live in a single SQLite file and are
+evicted by age (TTL) and by count (least recently used first); storage and
+eviction come from the dataset builder's sqlite_cache.py (see skill_paths.py).
+
+Usage:
+    python response_cache.py stats --cache .aifindr_cache.sqlite
+    python response_cache.py evict --cache .aifindr_cache.sqlite --ttl-hours 72 --max-entries 5000
+    python response_cache.py clear --cache .aifindr_cache.sqlite
+
+Or use programmatically:
+    from response_cache import ResponseCache
+    with ResponseCache(".aifindr_cache.sqlite", ttl_s=86400) as cache:
+        hit = cache.get("prj_xxx", "¿Qué es el SCTR?", kb_version="v12")
+"""
+
+from typing import Any, Dict, Optional
+
+import skill_paths  # noqa: F401  (sqlite_cache lives in the dataset builder)
+from fetch_response import DEFAULT_CACHE_PATH
+from sqlite_cache import SQLiteCache, cache_cli, content_key, normalize_query
+
+
+def cache_key(project_id: str, query: str, kb_version: str = "") -> str:
+    """Content address of a (project, normalized query, KB version) triple."""
+    return content_key(project_id, normalize_query(query), kb_version or "")
+
+
+class ResponseCache(SQLiteCache):
+    """
+    SQLite-backed response cache, safe to share between worker threads.
+
+    Args:
+        path: SQLite file (created if missing)
+        ttl_s: Entries older than this many seconds are ignored and evicted
+        max_entries: Keep at most this many entries (least recently used
+            entries are evicted first)
+    """
+
+    TABLE = "responses"
+    COLUMNS = (("project_id", "TEXT"), ("kb_version", "TEXT"), ("query", "TEXT"))
+    GROUP_BY = ("by_project", ("project_id", "kb_version"))
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, ttl_s: Optional[float] = None,
+                 max_entries: Optional[int] = None):
+        super().__init__(path, ttl_s=ttl_s, max_entries=max_entries)
+
+    def get(self, project_id: str, query: str, kb_version: str = "") -> Optional[Dict[str, Any]]:
+        """Return the cached response, or None on a miss or expired entry."""
+        return self.get_payload(cache_key(project_id, query, kb_version))
+
+    def put(self, project_id: str, query: str, response: Dict[str, Any], kb_version: str = "") -> None:
+        """Store (or replace) a response, then apply size-based eviction."""
+        self.put_payload(
+            cache_key(project_id, query, kb_version), response,
+            project_id=project_id, kb_version=kb_version or "", query=query
+        )
+
+
+def main():
+    cache_cli(ResponseCache, "Inspect or maintain the response cache", DEFAULT_CACHE_PATH)
+
+
+if __name__ == "__main__":
+    main()
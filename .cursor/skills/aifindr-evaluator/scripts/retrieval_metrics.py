@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+Retrieval quality metrics from the sources retrieved for each query.
+
+Reads responses fetched with --full-sources (the whole
+search-workflow-knowledge-retrieved payload, under "retrieval") or
+--show-sources (chunk ids and distances, under "sources"), and reports:
+
+- recall@k and MRR against labeled gold chunk ids ("gold_chunk_ids" in the
+  queries file, carried through to the responses, or joined with --gold)
+- distance distributions of the top and of all retrieved chunks
+- score gaps: top-1 to top-2 distance, and the largest gap in each ranking
+  (the "elbow", a hint of how many chunks are actually relevant)
+- latency per retrieval size, to see what more chunks cost
+
+All metrics are also aggregated per product.
+
+Usage:
+    python fetch_response.py --input queries.jsonl --project prj_xxx --full-sources \
+        --output evals/project/runs/2026-01-21_14-30-45/responses.jsonl
+
+    python retrieval_metrics.py --input evals/project/runs/2026-01-21_14-30-45/responses.jsonl \
+        --output evals/project/runs/2026-01-21_14-30-45/retrieval.md
+
+    # Gold chunk ids kept in a separate file (id + gold_chunk_ids per line)
+    python retrieval_metrics.py --input responses.jsonl --gold gold.jsonl --json
+"""
+
+import argparse
+import json
+import sys
+from collections import defaultdict
+from pathlib import Path
+from typing import Optional
+
+from generate_report import iter_results, percentile, result_product
+
+
+DEFAULT_KS = [1, 3, 5, 10]
+
+# Recommended k: smallest k reaching this share of the best recall@k
+RECALL_TARGET = 0.95
+
+GOLD_FIELDS = ["gold_chunk_ids", "gold_chunks", "gold"]
+
+LATENCY_FIELDS = ["latency_s", "retrieval_s", "ttft_s"]
+
+
+def gold_ids(row: dict) -> Optional[set]:
+    """Gold chunk ids of a row (None when the row is not labeled)."""
+    for field in GOLD_FIELDS:
+        value = row.get(field)
+        if value is None or value == "":
+            continue
+        if isinstance(value, str):
+            value = [v.strip() for v in value.split(",")]
+        return {str(v) for v in value if str(v).strip()}
+    return None
+
+
+def ranked_chunks(row: dict) -> list[tuple[str, Optional[float]]]:
+    """(chunk_id, distance) of the retrieved chunks, in retrieval order."""
+    if isinstance(row.get("retrieval"), list):
+        return [
+            (str(s.get("chunk_external_id", "")), (s.get("_additional") or {}).get("distance"))
+            for s in row["retrieval"]
+        ]
+    if isinstance(row.get("sources"), list):
+        return [(str(s.get("chunk_id", "")), s.get("distance")) for s in row["sources"]]
+    return []
+
+
+def score_gaps(distances: list[float]) -> tuple[Optional[float], Optional[int]]:
+    """
+    Top-1 to top-2 distance gap and the elbow of a ranking.
+
+    Returns:
+        (gap1, elbow_k): gap1 is d2 - d1; elbow_k is the number of chunks
+        before the largest gap between consecutive distances
+    """
+    if len(distances) < 2:
+        return None, None
+    gaps = [b - a for a, b in zip(distances, distances[1:])]
+    largest = max(range(len(gaps)), key=gaps.__getitem__)
+    return gaps[0], largest + 1
+
+
+def query_metrics(row: dict, ks: list[int] = DEFAULT_KS) -> Optional[dict]:
+    """
+    Retrieval metrics of one response.
+
+    Returns:
+        Dict with num_retrieved, distances, gap1, elbow_k and, when the row
+        has gold chunk ids, recall@k per k and reciprocal_rank. None for rows
+        that errored or carry no sources.
+    """
+    if row.get("error"):
+        return None
+    chunks = ranked_chunks(row)
+    if not chunks and "retrieval" not in row and "sources" not in row:
+        return None
+
+    distances = [d for _, d in chunks if isinstance(d, (int, float))]
+    gap1, elbow_k = score_gaps(distances)
+    metrics = {
+        "num_retrieved": len(chunks),
+        "distances": distances,
+        "gap1": gap1,
+        "elbow_k": elbow_k,
+    }
+
+    gold = gold_ids(row)
+    if gold:
+        ranks = [rank for rank, (chunk_id, _) in enumerate(chunks, 1) if chunk_id in gold]
+        first = ranks[0] if ranks else None
+        metrics["recall"] = {k: sum(1 for r in ranks if r <= k) / len(gold) for k in ks}
+        metrics["reciprocal_rank"] = 1 / first if first else 0.0
+        metrics["first_gold_rank"] = first
+    return metrics
+
+
+class RetrievalAggregate:
+    """Retrieval metrics accumulated over a group of responses (a run or a product)."""
+
+    def __init__(self, ks: list[int] = DEFAULT_KS):
+        self.ks = ks
+        self.queries = 0
+        self.labeled = 0
+        self.recall = {k: 0.0 for k in ks}
+        self.reciprocal_ranks = 0.0
+        self.missed = 0
+        self.top_distances: list[float] = []
+        self.all_distances: list[float] = []
+        self.gap1: list[float] = []
+        self.elbows: list[int] = []
+        self.sizes: list[int] = []
+
+    def add(self, metrics: dict) -> None:
+        self.queries += 1
+        self.sizes.append(metrics["num_retrieved"])
+        if metrics["distances"]:
+            self.top_distances.append(metrics["distances"][0])
+            self.all_distances.extend(metrics["distances"])
+        if metrics["gap1"] is not None:
+            self.gap1.append(metrics["gap1"])
+            self.elbows.append(metrics["elbow_k"])
+        if "recall" in metrics:
+            self.labeled += 1
+            for k in self.ks:
+                self.recall[k] += metrics["recall"][k]
+            self.reciprocal_ranks += metrics["reciprocal_rank"]
+            self.missed += metrics["first_gold_rank"] is None
+
+    def summary(self) -> dict:
+        summary = {
+            "queries": self.queries,
+            "labeled": self.labeled,
+            "retrieved": distribution(self.sizes),
+            "top_distance": distribution(self.top_distances),
+            "distance": distribution(self.all_distances),
+            "gap1": distribution(self.gap1),
+            "elbow_k": distribution(self.elbows),
+        }
+        if self.labeled:
+            summary["recall"] = {k: round(self.recall[k] / self.labeled, 4) for k in self.ks}
+            summary["mrr"] = round(self.reciprocal_ranks / self.labeled, 4)
+            summary["missed"] = self.missed
+            summary["recommended_k"] = recommended_k(summary["recall"])
+        return summary
+
+
+def distribution(values: list[float]) -> Optional[dict]:
+    """min/p25/p50/p75/p95/max/mean of values (None when empty)."""
+    if not values:
+        return None
+    stats = {"count": len(values), "min": round(min(values), 4)}
+    for pct in (25, 50, 75, 95):
+        stats[f"p{pct}"] = round(percentile(values, pct), 4)
+    stats["max"] = round(max(values), 4)
+    stats["mean"] = round(sum(values) / len(values), 4)
+    return stats
+
+
+def recommended_k(recall: dict) -> Optional[int]:
+    """Smallest k whose recall reaches RECALL_TARGET of the best recall@k."""
+    best = max(recall.values(), default=0)
+    if not best:
+        return None
+    return min(k for k, value in recall.items() if value >= best * RECALL_TARGET)
+
+
+def latency_by_size(rows: list[dict], sizes: list[int]) -> list[dict]:
+    """p50 latency fields per number of retrieved chunks."""
+    values = defaultdict(lambda: defaultdict(list))
+    for row, size in zip(rows, sizes):
+        for field in LATENCY_FIELDS:
+            value = row.get(field)
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                values[size][field].append(value)
+    table = []
+    for size in sorted(values):
+        entry = {"retrieved": size, "count": max(len(v) for v in values[size].values())}
+        for field in LATENCY_FIELDS:
+            if values[size][field]:
+                entry[f"{field}_p50"] = round(percentile(values[size][field], 50), 2)
+        table.append(entry)
+    return table
+
+
+def analyze(rows, ks: list[int] = DEFAULT_KS) -> dict:
+    """
+    Retrieval metrics of a run, overall and per product.
+
+    Args:
+        rows: Response dicts (an iterable; only the metrics are kept)
+        ks: Cutoffs for recall@k
+
+    Returns:
+        {"overall", "products", "latency_by_size", "skipped"}
+    """
+    overall = RetrievalAggregate(ks)
+    products = defaultdict(lambda: RetrievalAggregate(ks))
+    timed, sizes = [], []
+    skipped = 0
+    for row in rows:
+        metrics = query_metrics(row, ks)
+        if metrics is None:
+            skipped += 1
+            continue
+        overall.add(metrics)
+        products[result_product(row) or "(none)"].add(metrics)
+        timed.append({field: row.get(field) for field in LATENCY_FIELDS})
+        sizes.append(metrics["num_retrieved"])
+    return {
+        "overall": overall.summary(),
+        "products": {product: products[product].summary() for product in sorted(products)},
+        "latency_by_size": latency_by_size(timed, sizes),
+        "skipped": skipped,
+    }
+
+
+def merge_gold(rows: list[dict], gold_rows: list[dict]) -> int:
+    """Copy gold chunk ids from a labels file into rows lacking them (joined by id). Returns rows filled."""
+    by_id = {str(g.get("id")): gold_ids(g) for g in gold_rows if g.get("id") is not None}
+    filled = 0
+    for row in rows:
+        gold = by_id.get(str(row.get("id")))
+        if gold and not gold_ids(row):
+            row["gold_chunk_ids"] = sorted(gold)
+            filled += 1
+    return filled
+
+
+def _stat_getter(summary: dict):
+    return lambda key, stat: (summary[key] or {}).get(stat)
+
+
+def _fmt(value, ndigits: int = 3) -> str:
+    return "-" if value is None else f"{value:.{ndigits}f}"
+
+
+def markdown_report(analysis: dict, source: str = "") -> str:
+    """Markdown rendering of analyze()."""
+    overall = analysis["overall"]
+    ks = list(overall.get("recall", {}))
+    lines = ["# Retrieval Metrics", ""]
+    if source:
+        lines += [f"**Input:** `{source}`", ""]
+    lines += [
+        f"**Queries:** {overall['queries']} ({overall['labeled']} with gold chunks, "
+        f"{analysis['skipped']} skipped: errors or no sources)",
+        "",
+    ]
+
+    if overall["labeled"]:
+        lines += ["## Recall", ""]
+        lines.append("| Product | Labeled | " + " | ".join(f"R@{k}" for k in ks) + " | MRR | Missed | Recommended k |")
+        lines.append("|---|---:|" + "---:|" * len(ks) + "---:|---:|---:|")
+        for name, summary in [("**All**", overall)] + list(analysis["products"].items()):
+            if not summary["labeled"]:
+                continue
+            recall = " | ".join(_fmt(summary["recall"][k]) for k in ks)
+            lines.append(
+                f"| {name} | {summary['labeled']} | {recall} | {_fmt(summary['mrr'])} | "
+                f"{summary['missed']} | {summary['recommended_k'] or '-'} |"
+            )
+        lines += ["", f"Recommended k: smallest k reaching {RECALL_TARGET:.0%} of the best recall@k.", ""]
+
+    lines += ["## Distances", ""]
+    lines.append("| Product | Retrieved (p50) | Top-1 p50 | Top-1 p95 | All p50 | All p95 | Gap 1→2 p50 | Elbow k p50 |")
+    lines.append("|---|---:|---:|---:|---:|---:|---:|---:|")
+    for name, summary in [("**All**", overall)] + list(analysis["products"].items()):
+        pick = _stat_getter(summary)
+        lines.append(
+            f"| {name} | {_fmt(pick('retrieved', 'p50'), 0)} | {_fmt(pick('top_distance', 'p50'))} | "
+            f"{_fmt(pick('top_distance', 'p95'))} | {_fmt(pick('distance', 'p50'))} | "
+            f"{_fmt(pick('distance', 'p95'))} | {_fmt(pick('gap1', 'p50'))} | {_fmt(pick('elbow_k', 'p50'), 0)} |"
+        )
+    lines.append("")
+
+    if analysis["latency_by_size"]:
+        lines += ["## Latency by Retrieval Size", ""]
+        lines.append("| Retrieved | Queries | " + " | ".join(f"{f} p50" for f in LATENCY_FIELDS) + " |")
+        lines.append("|---:|---:|" + "---:|" * len(LATENCY_FIELDS))
+        for entry in analysis["latency_by_size"]:
+            cells = " | ".join(_fmt(entry.get(f"{f}_p50"), 2) for f in LATENCY_FIELDS)
+            lines.append(f"| {entry['retrieved']} | {entry['count']} | {cells} |")
+        lines.append("")
+
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Retrieval quality metrics for a run")
+    parser.add_argument("--input", "-i", required=True, help="responses.jsonl fetched with --full-sources or --show-sources")
+    parser.add_argument("--gold", "-g", help="JSONL with id and gold_chunk_ids, joined by id")
+    parser.add_argument("--k", type=int, action="append", help=f"recall@k cutoff (repeatable, default: {DEFAULT_KS})")
+    parser.add_argument("--output", "-o", help="Write the Markdown report here (default: stdout)")
+    parser.add_argument("--json", action="store_true", help="Print the metrics as JSON instead")
+    args = parser.parse_args()
+
+    ks = sorted(set(args.k)) if args.k else DEFAULT_KS
+    rows = iter_results(args.input)
+    if args.gold:
+        with open(args.gold, "r", encoding="utf-8") as f:
+            gold_rows = [json.loads(line) for line in f if line.strip()]
+        rows = list(rows)
+        filled = merge_gold(rows, gold_rows)
+        print(f"Gold chunk ids joined for {filled} rows", file=sys.stderr)
+
+    analysis = analyze(rows, ks)
+    if args.json:
+        print(json.dumps(analysis, ensure_ascii=False, indent=2))
+        return 0
+
+    report = markdown_report(analysis, Path(args.input).name)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(report + "\n")
+        print(args.output)
+    else:
+        print(report)
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
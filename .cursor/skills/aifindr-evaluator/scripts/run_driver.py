@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+"""
+Resumable, checkpointed fetch of a full evaluation run.
+
+Every completed response is appended to {run_dir}/responses.jsonl as soon as it
+arrives, so a crash loses at most the queries that were in flight. Ctrl-C drops
+the queued queries and waits for the ones in flight (Ctrl-C again to abort).
+Transient failures (timeouts, network errors, 429/5xx) are retried with
+jittered exponential backoff; queries that still fail go to errors.jsonl and
+are retried on the next resume.
+
+Usage:
+    # Start a new run in evals/project/runs/{YYYY-MM-DD}_{HH-MM-SS}/
+    python run_driver.py --input queries.jsonl --project prj_xxx \
+        --runs-dir evals/project/runs --concurrency 8 --show-sources
+
+    # Resume the most recent run (or pass a specific run folder)
+    python run_driver.py --project prj_xxx --runs-dir evals/project/runs --resume
+    python run_driver.py --project prj_xxx --resume evals/project/runs/2026-01-21_14-30-45
+
+    # Also keep every raw SSE stream for sse_recorder.py
+    python run_driver.py --input queries.jsonl --project prj_xxx --runs-dir evals/project/runs --record
+
+    # Append the run's responses to the columnar run store (see run_store.py)
+    python run_driver.py --input queries.jsonl --project prj_xxx --runs-dir evals/project/runs \
+        --store evals/project/run_store
+
+Required environment variables:
+    AIFINDR_ORG_ID: Organization ID
+    AIFINDR_API_KEY: API key
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Set
+
+import httpx
+
+from fetch_response import (
+    DEFAULT_CACHE_PATH,
+    DEFAULT_CONCURRENCY,
+    DEFAULT_TIMEOUT,
+    client_options,
+    fetch_response,
+    fetch_response_cached,
+    get_env,
+    load_queries,
+)
+from generate_report import get_run_folder_name
+from run_store import DEFAULT_STORE_PATH, RunStore
+from sse_recorder import RECORDINGS_FILE, SSERecorder
+
+
+RESPONSES_FILE = "responses.jsonl"
+ERRORS_FILE = "errors.jsonl"
+QUERIES_FILE = "queries.jsonl"
+
+DEFAULT_RETRIES = 4
+DEFAULT_BACKOFF_BASE = 1.0
+DEFAULT_BACKOFF_MAX = 60.0
+
+TRANSIENT_STATUS_CODES = {408, 425, 429, 500, 502, 503, 504}
+
+
+def is_transient(error: Exception) -> bool:
+    """Whether an error is worth retrying (timeouts, network errors, 429/5xx)."""
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code in TRANSIENT_STATUS_CODES
+    return isinstance(error, (TimeoutError, httpx.TransportError))
+
+
+def backoff_delay(attempt: int, base: float = DEFAULT_BACKOFF_BASE, cap: float = DEFAULT_BACKOFF_MAX) -> float:
+    """Full-jitter exponential backoff: uniform(0, min(cap, base * 2**attempt))."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+def call_with_retry(
+    fn: Callable[[], Dict[str, Any]],
+    retries: int = DEFAULT_RETRIES,
+    base: float = DEFAULT_BACKOFF_BASE,
+    cap: float = DEFAULT_BACKOFF_MAX
+) -> Dict[str, Any]:
+    """
+    Call fn, retrying transient errors up to `retries` times.
+
+    The returned dict gets an "attempts" count. Non-transient errors, and the
+    last transient one, are raised.
+    """
+    attempt = 0
+    while True:
+        try:
+            result = fn()
+            result["attempts"] = attempt + 1
+            return result
+        except Exception as e:
+            if attempt >= retries or not is_transient(e):
+                raise
+            time.sleep(backoff_delay(attempt, base, cap))
+            attempt += 1
+
+
+def read_jsonl(path: Path) -> List[Dict[str, Any]]:
+    """Read a JSONL file, skipping a truncated last line left by a crash."""
+    records = []
+    if not path.exists():
+        return records
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return records
+
+
+def completed_ids(run_dir: Path) -> Set[str]:
+    """Ids of queries already answered in a run folder."""
+    return {str(r.get("id")) for r in read_jsonl(run_dir / RESPONSES_FILE) if "error" not in r}
+
+
+def latest_run_dir(runs_dir: str) -> Optional[Path]:
+    """Most recent run folder (names sort chronologically, see get_run_folder_name)."""
+    runs = sorted(p for p in Path(runs_dir).iterdir() if p.is_dir()) if Path(runs_dir).is_dir() else []
+    return runs[-1] if runs else None
+
+
+class JsonlAppender:
+    """Thread-safe appender that flushes every record to disk immediately."""
+
+    def __init__(self, path: Path):
+        self._lock = threading.Lock()
+        self._file = open(path, "a", encoding="utf-8")
+
+    def write(self, record: Dict[str, Any]) -> None:
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        self._file.close()
+
+
+def run_evaluation(
+    project_id: str,
+    items: List[Dict[str, Any]],
+    run_dir: str,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    timeout: float = DEFAULT_TIMEOUT,
+    show_sources: bool = False,
+    full_sources: bool = False,
+    retries: int = DEFAULT_RETRIES,
+    cache: Optional["ResponseCache"] = None,
+    kb_version: str = "",
+    org_id: str = None,
+    api_key: str = None,
+    base_url: Optional[str] = None,
+    record: bool = False
+) -> Dict[str, Any]:
+    """
+    Fetch every query not yet answered in run_dir, checkpointing as it goes.
+
+    Args:
+        project_id: AIFindr project ID
+        items: Query dicts (with "id"), as returned by load_queries
+        run_dir: Run folder; responses.jsonl and errors.jsonl are appended to
+        concurrency: Maximum number of queries in flight
+        timeout: Maximum seconds per attempt
+        show_sources: Whether to include source details
+        full_sources: Keep the full retrieval payload under "retrieval"
+        retries: Retries per query for transient failures
+        cache: Optional ResponseCache to serve and store responses
+        kb_version: KB/version tag for the cache key
+        org_id: Organization ID (defaults to env AIFINDR_ORG_ID)
+        api_key: API key (defaults to env AIFINDR_API_KEY)
+        base_url: API base URL (see fetch_response.resolve_base_url)
+        record: Save every raw /ask stream, retries included, to
+            {run_dir}/sse_sessions.jsonl.gz (see sse_recorder.py)
+
+    Returns:
+        Dict with total, skipped, completed, failed and elapsed_s
+    """
+    org_id = org_id or get_env("AIFINDR_ORG_ID")
+    api_key = api_key or get_env("AIFINDR_API_KEY")
+
+    run_path = Path(run_dir)
+    run_path.mkdir(parents=True, exist_ok=True)
+    done = completed_ids(run_path)
+    todo = [item for item in items if str(item["id"]) not in done]
+
+    responses = JsonlAppender(run_path / RESPONSES_FILE)
+    errors = JsonlAppender(run_path / ERRORS_FILE)
+    recorder = SSERecorder(str(run_path / RECORDINGS_FILE)) if record else None
+    client = httpx.Client(**client_options(timeout, concurrency))
+
+    def fetch(item: Dict[str, Any]) -> Dict[str, Any]:
+        kwargs = dict(org_id=org_id, api_key=api_key, client=client, timeout=timeout, full_sources=full_sources,
+                      base_url=base_url, recorder=recorder, record_id=item.get("id"))
+        if cache:
+            return fetch_response_cached(
+                project_id, item["query"], cache, kb_version=kb_version,
+                show_sources=show_sources, **kwargs
+            )
+        return fetch_response(project_id, item["query"], show_sources=show_sources, **kwargs)
+
+    def run(item: Dict[str, Any]) -> bool:
+        extra = {k: v for k, v in item.items() if k != "query"}
+        timestamp = datetime.now().isoformat(timespec="seconds")
+        try:
+            result = call_with_retry(lambda: fetch(item), retries=retries)
+        except Exception as e:
+            errors.write({**extra, "query": item["query"], "error": f"{type(e).__name__}: {e}",
+                          "timestamp": timestamp})
+            return False
+        responses.write({**extra, **result, "timestamp": timestamp})
+        return True
+
+    start_time = time.time()
+    completed = failed = 0
+    pool = ThreadPoolExecutor(max_workers=concurrency)
+    try:
+        futures = [pool.submit(run, item) for item in todo]
+        for future in as_completed(futures):
+            if future.result():
+                completed += 1
+            else:
+                failed += 1
+            print(f"\r[{completed + failed}/{len(todo)}] {failed} failed", end="", file=sys.stderr)
+        print(file=sys.stderr)
+    except KeyboardInterrupt:
+        # Drop the queued queries; the ones in flight still finish and are checkpointed
+        print("\nInterrupted: waiting for the queries in flight (Ctrl-C again to abort)", file=sys.stderr)
+        pool.shutdown(wait=False, cancel_futures=True)
+        raise
+    finally:
+        pool.shutdown(wait=True)
+        client.close()
+        responses.close()
+        errors.close()
+        if recorder:
+            recorder.close()
+
+    return {
+        "run_dir": str(run_path),
+        "total": len(items),
+        "skipped": len(items) - len(todo),
+        "completed": completed,
+        "failed": failed,
+        "elapsed_s": round(time.time() - start_time, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Resumable, checkpointed evaluation fetch")
+    parser.add_argument("--input", "-i", help="JSONL file of queries (optional when resuming)")
+    parser.add_argument("--project", "-p", required=True, help="AIFindr project ID")
+    parser.add_argument("--runs-dir", "-r", default="runs", help="Parent folder of run folders (default: runs)")
+    parser.add_argument("--resume", nargs="?", const="latest",
+                        help="Resume a run folder (default: the most recent one in --runs-dir)")
+    parser.add_argument("--concurrency", "-c", type=int, default=DEFAULT_CONCURRENCY,
+                        help=f"Queries in flight (default: {DEFAULT_CONCURRENCY})")
+    parser.add_argument("--timeout", "-t", type=float, default=DEFAULT_TIMEOUT,
+                        help=f"Maximum seconds per attempt (default: {DEFAULT_TIMEOUT:.0f})")
+    parser.add_argument("--retries", type=int, default=DEFAULT_RETRIES,
+                        help=f"Retries for transient failures (default: {DEFAULT_RETRIES})")
+    parser.add_argument("--show-sources", "-s", action="store_true", help="Include retrieved sources")
+    parser.add_argument("--full-sources", action="store_true",
+                        help="Keep the full retrieval payload under \"retrieval\" (see retrieval_metrics.py)")
+    parser.add_argument("--cache", nargs="?", const=DEFAULT_CACHE_PATH,
+                        help=f"Serve and store responses in a cache file (default: {DEFAULT_CACHE_PATH})")
+    parser.add_argument("--kb-version", default="", help="With --cache: knowledge-base/agent version tag")
+    parser.add_argument("--record", action="store_true",
+                        help=f"Save the raw SSE streams to {RECORDINGS_FILE} in the run folder")
+    parser.add_argument("--base-url",
+                        help="API base URL, e.g. a local mock_server.py (default: env AIFINDR_BASE_URL, else production)")
+    parser.add_argument("--store", nargs="?", const=DEFAULT_STORE_PATH,
+                        help=f"Append the run's responses to a columnar run store (default: {DEFAULT_STORE_PATH})")
+    args = parser.parse_args()
+
+    if args.resume:
+        run_dir = latest_run_dir(args.runs_dir) if args.resume == "latest" else Path(args.resume)
+        if run_dir is None or not run_dir.is_dir():
+            parser.error(f"No run folder to resume in {args.runs_dir}")
+    else:
+        if not args.input:
+            parser.error("--input is required for a new run")
+        run_dir = Path(args.runs_dir) / get_run_folder_name()
+        run_dir.mkdir(parents=True, exist_ok=True)
+
+    # Keep a copy of the queries so the run can be resumed without --input
+    queries_path = run_dir / QUERIES_FILE
+    if args.input and not queries_path.exists():
+        shutil.copyfile(args.input, queries_path)
+    if not queries_path.exists():
+        parser.error(f"{queries_path} not found; pass --input")
+    items = load_queries(args.input or str(queries_path))
+
+    cache = None
+    if args.cache:
+        # Only cached runs need response_cache (and the dataset builder's sqlite_cache)
+        from response_cache import ResponseCache
+        cache = ResponseCache(args.cache)
+    try:
+        stats = run_evaluation(
+            args.project, items, str(run_dir),
+            concurrency=args.concurrency,
+            timeout=args.timeout,
+            show_sources=args.show_sources,
+            full_sources=args.full_sources,
+            retries=args.retries,
+            cache=cache,
+            kb_version=args.kb_version,
+            base_url=args.base_url,
+            record=args.record,
+        )
+    except KeyboardInterrupt:
+        print(f"Interrupted. Resume with: --resume {run_dir}", file=sys.stderr)
+        return 130
+    finally:
+        if cache:
+            cache.close()
+
+    print(f"Run folder: {stats['run_dir']}")
+    print(f"  Skipped (already on disk): {stats['skipped']}")
+    print(f"  Completed: {stats['completed']}")
+    print(f"  Failed: {stats['failed']}" + (f" (see {ERRORS_FILE}; rerun with --resume)" if stats['failed'] else ""))
+    print(f"  Elapsed: {stats['elapsed_s']:.2f}s")
+
+    if args.store:
+        # Every response of the run folder: the store keeps the latest row per (run, query)
+        rows = RunStore(args.store).append(
+            read_jsonl(run_dir / RESPONSES_FILE), run_id=run_dir.resolve().name, project=args.project, source="fetch"
+        )
+        print(f"Run store: {rows} rows appended to {args.store} (run {run_dir.resolve().name})", file=sys.stderr)
+    return 1 if stats["failed"] else 0
+
+
+if __name__ == "__main__":
+    exit(main())
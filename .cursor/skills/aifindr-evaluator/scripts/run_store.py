@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+"""
+Append-only columnar store of evaluation history (Parquet, one row per run and query).
+
+fetch_response.py (--store) and generate_report.py (--store) append to it as
+runs are fetched and scored; cross-run questions ("p95 latency per product
+over the last 30 runs") are then answered with vectorized Arrow queries over
+typed columns instead of re-parsing every responses.jsonl and results.xlsx.
+
+Each append writes one new Parquet file, so writers never rewrite existing
+data. Rows for the same (run_id, id) written by different steps (fetch, then
+report) are merged on read, latest non-null value first.
+
+Usage:
+    # Trend of p50/p95 latency and pass rate over the last 30 runs, per product
+    python run_store.py summary --store evals/project/run_store --by run_id,product --last 30
+
+    # Backfill existing run folders
+    python run_store.py import evals/project/runs/* --store evals/project/run_store --project prj_xxx
+
+Or use programmatically:
+    from run_store import RunStore
+    store = RunStore("evals/project/run_store")
+    store.append(results, run_id="2026-01-21_14-30-45", project="prj_xxx")
+    print(store.summary(by=["run_id", "product"], last_runs=30).to_pandas())
+
+Requires pyarrow: pip install pyarrow
+"""
+
+import argparse
+import os
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+
+DEFAULT_STORE_PATH = "run_store"
+WRITE_BATCH_ROWS = 10_000
+
+KEY_COLUMNS = ["run_id", "id"]
+
+# (column, Arrow type name) for every stored column
+STORE_COLUMNS = [
+    ("run_id", "string"),
+    ("id", "string"),
+    ("project", "string"),
+    ("source", "string"),
+    ("written_at", "timestamp"),
+    ("query", "string"),
+    ("product", "string"),
+    ("variant_group", "string"),
+    ("verdict", "string"),
+    ("error", "string"),
+    ("cached", "bool"),
+    ("num_sources", "int32"),
+    ("num_deltas", "int32"),
+    ("latency_s", "float64"),
+    ("conversation_s", "float64"),
+    ("ttfb_s", "float64"),
+    ("retrieval_s", "float64"),
+    ("ttft_s", "float64"),
+    ("stream_s", "float64"),
+    ("tokens_per_s", "float64"),
+    ("total_s", "float64"),
+    ("min_distance", "float64"),
+    ("mean_distance", "float64"),
+    ("max_distance", "float64"),
+]
+
+
+def _require_pyarrow() -> None:
+    if not HAS_PYARROW:
+        raise ImportError("pyarrow is required for the run store. Install with: pip install pyarrow")
+
+
+def store_schema() -> "pa.Schema":
+    """Arrow schema of the store (see STORE_COLUMNS)."""
+    _require_pyarrow()
+    types = {
+        "string": pa.string(),
+        "bool": pa.bool_(),
+        "int32": pa.int32(),
+        "float64": pa.float64(),
+        "timestamp": pa.timestamp("ms", tz="UTC"),
+    }
+    return pa.schema([(name, types[kind]) for name, kind in STORE_COLUMNS])
+
+
+def _number(value: Any) -> Optional[float]:
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return value
+    return None
+
+
+def _text(value: Any) -> Optional[str]:
+    return None if value is None or value == "" else str(value)
+
+
+def to_row(result: Dict[str, Any], run_id: str, project: str, source: str, written_at: datetime) -> Dict[str, Any]:
+    """Flatten one fetch or evaluation result into a store row."""
+    meta = result.get("meta") if isinstance(result.get("meta"), dict) else {}
+    row = {
+        "run_id": run_id,
+        "id": _text(result.get("id")),
+        "project": _text(project),
+        "source": source,
+        "written_at": written_at,
+        "query": _text(result.get("query")),
+        "product": _text(result.get("product") or result.get("meta.product") or meta.get("product")),
+        "variant_group": _text(result.get("variant_group")),
+        "verdict": _text(str(result["verdict"]).upper()) if result.get("verdict") else None,
+        "error": _text(result.get("error")),
+        "cached": result.get("cached") if isinstance(result.get("cached"), bool) else None,
+    }
+    for name, kind in STORE_COLUMNS:
+        if kind in ("int32", "float64") and name not in row:
+            value = _number(result.get(name))
+            row[name] = int(value) if kind == "int32" and value is not None else value
+
+    distances = [
+        s["distance"] for s in result.get("sources") or []
+        if isinstance(s, dict) and _number(s.get("distance")) is not None
+    ]
+    if distances:
+        row["min_distance"] = min(distances)
+        row["mean_distance"] = sum(distances) / len(distances)
+        row["max_distance"] = max(distances)
+    return row
+
+
+class RunStore:
+    """
+    Parquet run store in a directory of append-only part files.
+
+    Args:
+        path: Store directory (created on first append)
+    """
+
+    def __init__(self, path: str = DEFAULT_STORE_PATH):
+        _require_pyarrow()
+        self.path = Path(path)
+        self.schema = store_schema()
+
+    def writer(self, run_id: str, project: str = "", source: str = "report") -> "RunStoreWriter":
+        """Streaming writer for one run; add() results, then close()."""
+        return RunStoreWriter(self, run_id, project, source)
+
+    def append(self, results: Iterable[Dict[str, Any]], run_id: str, project: str = "",
+               source: str = "report") -> int:
+        """Append results of one run as a new part file. Returns rows written."""
+        writer = self.writer(run_id, project, source)
+        try:
+            for result in results:
+                writer.add(result)
+        finally:
+            writer.close()
+        return writer.rows
+
+    def dataset(self) -> "ds.Dataset":
+        """Arrow dataset over every part file (in-progress parts start with "." and are skipped)."""
+        if not self.path.is_dir():
+            return ds.dataset(self.schema.empty_table())
+        return ds.dataset(str(self.path), format="parquet", schema=self.schema)
+
+    def runs(self, project: Optional[str] = None) -> List[str]:
+        """Run ids in the store, oldest first (by the time each run was first appended)."""
+        flt = pc.field("project") == project if project else None
+        table = self.dataset().to_table(columns=["run_id", "written_at"], filter=flt)
+        first = table.group_by("run_id", use_threads=False).aggregate([("written_at", "min")])
+        first = first.sort_by([("written_at_min", "ascending"), ("run_id", "ascending")])
+        return first.column("run_id").to_pylist()
+
+    def table(
+        self,
+        columns: Optional[List[str]] = None,
+        run_ids: Optional[List[str]] = None,
+        project: Optional[str] = None
+    ) -> "pa.Table":
+        """
+        One row per (run_id, id), merging rows written by different steps.
+
+        Args:
+            columns: Columns to return (key columns are always included)
+            run_ids: Only these runs
+            project: Only this project
+
+        Returns:
+            Arrow table; for each column the latest non-null value wins
+        """
+        flt = None
+        if run_ids is not None:
+            flt = pc.field("run_id").isin(run_ids)
+        if project:
+            project_flt = pc.field("project") == project
+            flt = project_flt if flt is None else flt & project_flt
+
+        value_columns = [c for c in (columns or self.schema.names) if c not in KEY_COLUMNS]
+        read_columns = KEY_COLUMNS + [c for c in value_columns + ["written_at"] if c not in KEY_COLUMNS]
+        raw = self.dataset().to_table(columns=list(dict.fromkeys(read_columns)), filter=flt)
+        raw = raw.sort_by("written_at")
+        merged = raw.group_by(KEY_COLUMNS, use_threads=False).aggregate([(c, "last") for c in value_columns])
+        return merged.rename_columns([c[:-5] if c.endswith("_last") else c for c in merged.column_names])
+
+    def summary(
+        self,
+        by: List[str] = ("run_id",),
+        metric: str = "latency_s",
+        last_runs: Optional[int] = None,
+        project: Optional[str] = None
+    ) -> "pa.Table":
+        """
+        Vectorized per-group summary.
+
+        Args:
+            by: Grouping columns (e.g. ["run_id"], ["run_id", "product"])
+            metric: Timing column for the percentiles
+            last_runs: Only the most recent N runs
+            project: Only this project
+
+        Returns:
+            Arrow table with queries, pass_rate, {metric} p50/p95/mean (without
+            cached results),
+            mean num_sources and mean min_distance per group, sorted by group
+        """
+        run_ids = None
+        if last_runs:
+            run_ids = self.runs(project)[-last_runs:]
+        by = list(by)
+        columns = list(dict.fromkeys(by + ["verdict", "num_sources", "min_distance", "cached", metric]))
+        table = self.table(columns=columns, run_ids=run_ids, project=project)
+
+        # Cached results replay the timings of the original fetch
+        cached = pc.fill_null(table["cached"], False)
+        table = table.set_column(
+            table.schema.get_field_index(metric), metric,
+            pc.if_else(cached, pa.scalar(None, table[metric].type), table[metric])
+        )
+
+        is_pass = pc.if_else(pc.is_null(table["verdict"]), None, pc.equal(table["verdict"], "PASS"))
+        table = table.append_column("is_pass", pc.cast(is_pass, pa.float64()))
+
+        grouped = table.group_by(by).aggregate([
+            ("id", "count"),
+            ("is_pass", "mean"),
+            (metric, "tdigest", pc.TDigestOptions(q=[0.5, 0.95])),
+            (metric, "mean"),
+            ("num_sources", "mean"),
+            ("min_distance", "mean"),
+        ])
+        quantiles = grouped[f"{metric}_tdigest"]
+        result = pa.table({
+            **{col: grouped[col] for col in by},
+            "queries": grouped["id_count"],
+            "pass_rate": grouped["is_pass_mean"],
+            f"{metric}_p50": pc.list_element(quantiles, 0),
+            f"{metric}_p95": pc.list_element(quantiles, 1),
+            f"{metric}_mean": grouped[f"{metric}_mean"],
+            "num_sources_mean": grouped["num_sources_mean"],
+            "min_distance_mean": grouped["min_distance_mean"],
+        })
+        return result.sort_by([(col, "ascending") for col in by])
+
+
+class RunStoreWriter:
+    """
+    Streams one run's results into a single new part file.
+
+    Rows are buffered in batches of WRITE_BATCH_ROWS; the file is written
+    under a temporary name and renamed on close(), so readers never see a
+    partial part.
+    """
+
+    def __init__(self, store: RunStore, run_id: str, project: str = "", source: str = "report"):
+        self.store = store
+        self.run_id = run_id
+        self.project = project
+        self.source = source
+        self.rows = 0
+        self._written_at = datetime.now(timezone.utc)
+        self._buffer = []
+        self._writer = None
+        name = f"{run_id}__{source}__{uuid.uuid4().hex[:8]}.parquet"
+        self._path = store.path / name
+        self._tmp_path = store.path / f".{name}.tmp"
+
+    def add(self, result: Dict[str, Any]) -> None:
+        self._buffer.append(to_row(result, self.run_id, self.project, self.source, self._written_at))
+        if len(self._buffer) >= WRITE_BATCH_ROWS:
+            self._flush()
+
+    def _flush(self) -> None:
+        if not self._buffer:
+            return
+        if self._writer is None:
+            self.store.path.mkdir(parents=True, exist_ok=True)
+            self._writer = pq.ParquetWriter(str(self._tmp_path), self.store.schema)
+        self._writer.write_table(pa.Table.from_pylist(self._buffer, schema=self.store.schema))
+        self.rows += len(self._buffer)
+        self._buffer = []
+
+    def finish(self, aggregate=None) -> Optional[str]:
+        """Report-writer protocol alias for close()."""
+        return self.close()
+
+    def close(self) -> Optional[str]:
+        """Write the part file. Returns its path (None if no rows were added)."""
+        self._flush()
+        if self._writer is None:
+            return None
+        self._writer.close()
+        self._writer = None
+        os.replace(self._tmp_path, self._path)
+        return str(self._path)
+
+
+def _print_table(table: "pa.Table") -> None:
+    rows = table.to_pylist()
+    names = table.column_names
+    cells = [[f"{v:.3f}" if isinstance(v, float) else ("-" if v is None else str(v)) for v in
+              (row[n] for n in names)] for row in rows]
+    widths = [max([len(n)] + [len(c[i]) for c in cells]) for i, n in enumerate(names)]
+    print("  ".join(n.ljust(w) for n, w in zip(names, widths)))
+    for c in cells:
+        print("  ".join(v.ljust(w) for v, w in zip(c, widths)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query or backfill the columnar run store")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    summary = sub.add_parser("summary", help="Per-run (or per-group) summary")
+    summary.add_argument("--store", default=DEFAULT_STORE_PATH, help=f"Store directory (default: {DEFAULT_STORE_PATH})")
+    summary.add_argument("--by", default="run_id", help="Comma-separated grouping columns (default: run_id)")
+    summary.add_argument("--metric", default="latency_s", help="Timing column for percentiles (default: latency_s)")
+    summary.add_argument("--last", type=int, help="Only the most recent N runs")
+    summary.add_argument("--project", help="Only this project")
+
+    backfill = sub.add_parser("import", help="Append existing run folders")
+    backfill.add_argument("runs", nargs="+", help="Run folders (folder name is the run id)")
+    backfill.add_argument("--store", default=DEFAULT_STORE_PATH, help=f"Store directory (default: {DEFAULT_STORE_PATH})")
+    backfill.add_argument("--project", default="", help="Project ID")
+    args = parser.parse_args()
+
+    store = RunStore(args.store)
+    if args.command == "summary":
+        _print_table(store.summary(
+            by=[c.strip() for c in args.by.split(",") if c.strip()],
+            metric=args.metric, last_runs=args.last, project=args.project
+        ))
+    else:
+        from compare_runs import load_run
+
+        for run in args.runs:
+            run_id = Path(run).resolve().name
+            rows = store.append(load_run(run).values(), run_id=run_id, project=args.project, source="import")
+            print(f"{run_id}: {rows} rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+Suggest a first-pass verdict for every response in a run.
+
+Compares each response with its expected answer using IDF-weighted token
+overlap, key-number matching and entity matching, and checks how much of the
+expected answer the retrieved sources contain (fetch_response.py
+--show-sources) to tell NO_RETRIEVAL from FAIL. Every suggested verdict gets a
+confidence; rows below --review-below are marked needs_review, so only those
+have to be checked by hand before generating the reports.
+
+Usage:
+    python score_verdicts.py --input evals/project/runs/2026-01-21_14-30-45/responses.jsonl \
+        --output evals/project/runs/2026-01-21_14-30-45/results.jsonl
+
+    # Responses without "expected": join it from the queries file by id
+    python score_verdicts.py --input responses.jsonl --expected queries.jsonl --output results.jsonl
+
+    python generate_report.py --results results.jsonl --output-dir evals/project/runs/2026-01-21_14-30-45/
+"""
+
+import argparse
+import json
+import math
+import re
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Optional
+
+import skill_paths  # noqa: F401  (text_terms lives in the dataset builder)
+from text_terms import STOPWORDS, fold, stem
+
+
+DEFAULT_REVIEW_BELOW = 0.7
+
+# Score thresholds (weighted match of expected tokens, numbers and entities)
+PASS_AT = 0.7
+PARTIAL_AT = 0.4
+# Share of the expected answer found in the retrieved sources
+RETRIEVED_AT = 0.6
+NOT_RETRIEVED_BELOW = 0.3
+
+WEIGHTS = {"tokens": 0.5, "numbers": 0.35, "entities": 0.15}
+
+# Answers that say the information is not available
+REFUSAL_PATTERNS = re.compile(
+    r"no (tengo|cuento con|dispongo de|encontr[eé]|encuentro|hay) (informaci[oó]n|datos)"
+    r"|no (puedo|pude) (responder|encontrar|ayudarte)"
+    r"|no se menciona|no est[aá] (especificad|indicad|mencionad)"
+    r"|i (don't|do not) have (any )?information",
+    re.IGNORECASE,
+)
+
+_NUMBER = re.compile(r"\d+(?:[.,]\d+)*")
+_THOUSANDS = re.compile(r"\d{1,3}(?:([.,])\d{3})(?:\1\d{3})*")
+
+
+def tokenize(text: str) -> list[str]:
+    """Content terms of a text (no stopwords or numbers)."""
+    return [stem(t) for t in re.findall(r"[^\W\d_]+", fold(text)) if len(t) > 1 and t not in STOPWORDS]
+
+
+def normalize_number(raw: str) -> str:
+    """
+    16 -> 16, 100,000 / 100.000 -> 100000, 0,5 -> 0.5, and with both
+    separators the last one is the decimal mark: 1,500.50 / 1.500,50 -> 1500.5.
+    """
+    if _THOUSANDS.fullmatch(raw):
+        return re.sub(r"[.,]", "", raw)
+    last = max(raw.rfind("."), raw.rfind(","))
+    if last < 0:
+        return raw
+    whole, fraction = raw[:last], raw[last + 1:]
+    if raw[last] not in whole and ("." in whole or "," in whole):
+        # Mixed separators: the others group thousands
+        value = re.sub(r"[.,]", "", whole) + "." + fraction
+    elif raw.count(raw[last]) > 1:
+        # The same separator repeated can only group thousands
+        return re.sub(r"[.,]", "", raw)
+    else:
+        value = whole + "." + fraction
+    value = value.rstrip("0")
+    return value[:-1] if value.endswith(".") else value
+
+
+def numbers(text: str) -> set[str]:
+    return {normalize_number(n) for n in _NUMBER.findall(text)}
+
+
+def entities(text: str) -> set[str]:
+    """Acronyms and capitalized names that do not start a sentence (SCTR, Vida Ley, Pacífico)."""
+    found = set()
+    for sentence in re.split(r"[.!?¿¡:\n]+", text):
+        words = re.findall(r"[^\W\d_]+", sentence)
+        for i, word in enumerate(words):
+            if (len(word) > 1 and word.isupper()) or (i > 0 and word[0].isupper()):
+                found.add(stem(fold(word)))
+    return found - STOPWORDS
+
+
+def source_text(sources) -> Optional[str]:
+    """Concatenated text of the retrieved sources, or None if the sources carry no text."""
+    if not isinstance(sources, list):
+        return None
+    texts = [s.get("text", "") for s in sources if isinstance(s, dict) and s.get("text")]
+    return "\n".join(texts) if texts else None
+
+
+def document_frequencies(rows: list[dict]) -> tuple[Counter, int]:
+    """Token document frequencies over the expected answers of a run."""
+    df = Counter()
+    docs = 0
+    for row in rows:
+        expected = row_expected(row)
+        if expected:
+            docs += 1
+            df.update(set(tokenize(expected)))
+    return df, docs
+
+
+def row_expected(row: dict) -> str:
+    return str(row.get("expected") or row.get("expected_response") or "")
+
+
+def weighted_recall(expected_tokens: set[str], found: set[str], idf: dict) -> Optional[float]:
+    if not expected_tokens:
+        return None
+    total = sum(idf[t] for t in expected_tokens)
+    return sum(idf[t] for t in expected_tokens if t in found) / total
+
+
+def _confidence(score: float) -> float:
+    """0.5 at a verdict boundary, 1.0 at 0.25 or more away from the nearest one."""
+    distance = min(abs(score - PASS_AT), abs(score - PARTIAL_AT))
+    return round(0.5 + min(0.5, distance * 2), 2)
+
+
+def score_row(row: dict, idf: dict) -> dict:
+    """
+    Suggested verdict for one response.
+
+    Returns:
+        {"verdict", "confidence", "score", "notes"}; verdict is None when the
+        row has no expected answer
+    """
+    if row.get("error"):
+        return {"verdict": "FAIL", "confidence": 1.0, "score": 0.0, "notes": f"auto: request failed ({row['error']})"}
+
+    expected = row_expected(row)
+    if not expected:
+        return {"verdict": None, "confidence": None, "score": None, "notes": "auto: no expected answer"}
+
+    response = str(row.get("response") or "")
+    sources = source_text(row.get("sources"))
+    num_sources = row.get("num_sources", len(row["sources"]) if isinstance(row.get("sources"), list) else None)
+
+    expected_tokens = set(tokenize(expected))
+    expected_numbers = numbers(expected)
+    expected_entities = entities(expected)
+    response_tokens = set(tokenize(response))
+    response_numbers = numbers(response)
+
+    parts = {
+        "tokens": weighted_recall(expected_tokens, response_tokens, idf),
+        "numbers": len(expected_numbers & response_numbers) / len(expected_numbers) if expected_numbers else None,
+        "entities": len(expected_entities & response_tokens) / len(expected_entities) if expected_entities else None,
+    }
+    present = {k: v for k, v in parts.items() if v is not None}
+    score = sum(WEIGHTS[k] * v for k, v in present.items()) / sum(WEIGHTS[k] for k in present) if present else 0.0
+
+    coverage = None
+    if sources is not None:
+        source_tokens = set(tokenize(sources))
+        source_numbers = numbers(sources)
+        covered = [t in source_tokens for t in expected_tokens] + [n in source_numbers for n in expected_numbers]
+        coverage = sum(covered) / len(covered) if covered else None
+
+    notes = [f"tokens {parts['tokens']:.2f}" if parts["tokens"] is not None else "tokens -"]
+    if expected_numbers:
+        notes.append(f"numbers {len(expected_numbers & response_numbers)}/{len(expected_numbers)}")
+    if expected_entities:
+        notes.append(f"entities {len(expected_entities & response_tokens)}/{len(expected_entities)}")
+    if coverage is not None:
+        notes.append(f"sources {coverage:.2f}")
+    refused = bool(REFUSAL_PATTERNS.search(response)) or not response.strip()
+    if refused:
+        notes.append("no answer")
+
+    if num_sources == 0:
+        verdict, confidence = "NO_RETRIEVAL", 0.9
+    elif refused:
+        if coverage is not None and coverage >= RETRIEVED_AT:
+            verdict, confidence = "FAIL", 0.6
+            notes.append("answer was in the sources")
+        else:
+            verdict, confidence = "NO_RETRIEVAL", 0.8 if coverage is not None else 0.6
+    elif expected_numbers and response_numbers and not expected_numbers & response_numbers:
+        verdict, confidence = "FAIL", 0.75
+        notes.append("different figures")
+    elif score >= PASS_AT:
+        verdict, confidence = "PASS", _confidence(score)
+    elif score >= PARTIAL_AT:
+        verdict, confidence = "PARTIAL", _confidence(score)
+    else:
+        if coverage is not None and coverage < NOT_RETRIEVED_BELOW:
+            verdict = "NO_RETRIEVAL"
+        else:
+            verdict = "FAIL"
+        confidence = _confidence(score) if coverage is not None else min(_confidence(score), 0.65)
+
+    return {"verdict": verdict, "confidence": confidence, "score": round(score, 3), "notes": "auto: " + ", ".join(notes)}
+
+
+def is_human_verdict(row: dict) -> bool:
+    """
+    Whether the row's verdict was set by hand.
+
+    A verdict equal to the auto_verdict of a previous scoring is the scorer's
+    own; one that differs from it, or on a row never scored, is human.
+    """
+    if not row.get("verdict"):
+        return False
+    if "auto_verdict" not in row:
+        return True
+    return row["verdict"] != (row["auto_verdict"] or "")
+
+
+def score_results(
+    rows: list[dict],
+    review_below: float = DEFAULT_REVIEW_BELOW,
+    overwrite: bool = False
+) -> list[dict]:
+    """
+    Add auto_verdict, confidence and needs_review to every row.
+
+    The suggested verdict also becomes the row's verdict unless the row
+    already has a human one (kept, unless overwrite). Verdicts this scorer
+    set before are re-scored, so it can be re-run on its own output. Token
+    weights come from the whole run, so score all rows of a run together.
+
+    Args:
+        rows: Response dicts (query, response, expected, sources, num_sources)
+        review_below: Rows with a lower confidence are marked needs_review
+        overwrite: Replace existing verdicts with the suggested ones
+
+    Returns:
+        The rows, updated in place
+    """
+    df, docs = document_frequencies(rows)
+    idf = {t: math.log(1 + (docs - n + 0.5) / (n + 0.5)) for t, n in df.items()}
+
+    for row in rows:
+        human = is_human_verdict(row)
+        scored = score_row(row, idf)
+        row["auto_verdict"] = scored["verdict"]
+        row["auto_score"] = scored["score"]
+        if human and not overwrite:
+            row["needs_review"] = False
+            continue
+        row["verdict"] = scored["verdict"] or ""
+        row["confidence"] = scored["confidence"]
+        row["needs_review"] = scored["verdict"] is None or scored["confidence"] < review_below
+        if not row.get("notes") or str(row["notes"]).startswith("auto:"):
+            row["notes"] = scored["notes"]
+    return rows
+
+
+def load_jsonl(path: str) -> list[dict]:
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def merge_expected(rows: list[dict], queries: list[dict]) -> int:
+    """Copy expected answers from a queries file into rows lacking one (joined by id). Returns rows filled."""
+    by_id = {str(q.get("id")): q for q in queries if q.get("id") is not None}
+    filled = 0
+    for row in rows:
+        query = by_id.get(str(row.get("id")))
+        if query and not row_expected(row) and row_expected(query):
+            row["expected"] = row_expected(query)
+            filled += 1
+    return filled
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Suggest verdicts for a run's responses")
+    parser.add_argument("--input", "-i", required=True, help="responses.jsonl (or a JSON list)")
+    parser.add_argument("--output", "-o", help="Scored results JSONL (default: results.jsonl next to the input)")
+    parser.add_argument("--expected", "-e", help="Queries JSONL with expected answers, joined by id")
+    parser.add_argument("--review-below", type=float, default=DEFAULT_REVIEW_BELOW,
+                        help=f"Mark rows with a lower confidence for review (default: {DEFAULT_REVIEW_BELOW})")
+    parser.add_argument("--overwrite", action="store_true", help="Replace verdicts already present in the input")
+    args = parser.parse_args()
+
+    if Path(args.input).suffix == ".jsonl":
+        rows = load_jsonl(args.input)
+    else:
+        with open(args.input, "r", encoding="utf-8") as f:
+            rows = json.load(f)
+    if args.expected:
+        filled = merge_expected(rows, load_jsonl(args.expected))
+        print(f"Expected answers joined for {filled} rows", file=sys.stderr)
+
+    start = time.perf_counter()
+    score_results(rows, args.review_below, args.overwrite)
+    elapsed = time.perf_counter() - start
+
+    output = args.output or str(Path(args.input).with_name("results.jsonl"))
+    with open(output, "w", encoding="utf-8") as f:
+        for row in rows:
+            f.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+    counts = Counter(row["verdict"] or "unscored" for row in rows)
+    review = sum(1 for row in rows if row.get("needs_review"))
+    print(f"Scored {len(rows)} rows in {elapsed:.2f}s: "
+          + ", ".join(f"{verdict} {count}" for verdict, count in counts.most_common()), file=sys.stderr)
+    print(f"{review} rows need review (confidence < {args.review_below})", file=sys.stderr)
+    print(output)
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+"""
+Scripts folders of the sibling skills whose helpers the evaluator reuses.
+
+Importing this module appends them to sys.path (after this folder, so an
+evaluator module is never shadowed):
+
+- aifindr-dataset-builder/scripts: text_terms.py (tokenizer terms),
+  sqlite_cache.py (SQLite TTL/LRU cache), dataset_rows.py (dataset row ids)
+- e2e-testing-knowledge-base/scripts: verify_weaviate.py (Weaviate reader)
+
+aifindr-evaluator.skill ships copies of these helpers in its own scripts/
+folder, which is searched first, so an installed bundle needs no siblings.
+
+Usage:
+    import skill_paths  # noqa: F401
+    from text_terms import STOPWORDS, fold, stem
+"""
+
+import sys
+from pathlib import Path
+
+
+SKILLS_DIR = Path(__file__).resolve().parents[2]
+DATASET_BUILDER_SCRIPTS = SKILLS_DIR / "aifindr-dataset-builder" / "scripts"
+E2E_SCRIPTS = SKILLS_DIR / "e2e-testing-knowledge-base" / "scripts"
+
+for _path in (DATASET_BUILDER_SCRIPTS, E2E_SCRIPTS):
+    if str(_path) not in sys.path:
+        sys.path.append(str(_path))
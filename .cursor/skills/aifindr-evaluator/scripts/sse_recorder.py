@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+Record raw SSE sessions and replay them through the answer parser.
+
+fetch_response.py (--record) and run_driver.py (--record) save every /ask
+stream, including failed and timed-out ones, to a gzip-compressed JSONL file
+in the run folder (sse_sessions.jsonl.gz). Each session keeps the event
+names, the raw data of every event and its arrival offset from the request,
+so a wrong or slow answer can be inspected after the fact. The same
+recordings are a corpus of real traffic for benchmarking parser changes.
+
+Usage:
+    python run_driver.py --input queries.jsonl --project prj_xxx --runs-dir evals/project/runs --record
+
+    # One line per session: id, events, TTFB, end, error
+    python sse_recorder.py list evals/project/runs/2026-01-21_14-30-45/sse_sessions.jsonl.gz
+
+    # Event timeline of one session (by query id, or --index)
+    python sse_recorder.py show sse_sessions.jsonl.gz --id 17
+
+    # Feed a session back through the parser at 10x speed and compare timings
+    python sse_recorder.py replay sse_sessions.jsonl.gz --id 17 --speed 10
+
+    # Parse every recording as fast as possible (parser throughput)
+    python sse_recorder.py bench sse_sessions.jsonl.gz --repeat 5
+
+Or use programmatically:
+    from sse_recorder import iter_sessions, replay_session
+    for session in iter_sessions("sse_sessions.jsonl.gz"):
+        parser = replay_session(session)
+        print(parser.result()[0], parser.timings())
+"""
+
+import argparse
+import gzip
+import json
+import os
+import sys
+import threading
+import time
+import zlib
+from datetime import datetime
+from typing import Any, Dict, Iterator, Optional
+
+
+RECORDINGS_FILE = "sse_sessions.jsonl.gz"
+
+
+class SSERecorder:
+    """
+    Thread-safe writer of SSE sessions to a gzip-compressed JSONL file.
+
+    The file is opened for appending (a resumed run adds a new gzip member),
+    and every session is flushed as it is written, so a crash loses at most
+    the sessions that were still streaming. A file left unterminated by a
+    crash is rewritten with its readable sessions before appending.
+
+    Args:
+        path: Recordings file (created, with its folder, if missing)
+        compresslevel: gzip level (default 6)
+    """
+
+    def __init__(self, path: str = RECORDINGS_FILE, compresslevel: int = 6):
+        self.path = path
+        self.count = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        if os.path.exists(path) and not _is_complete(path):
+            sessions = list(iter_sessions(path))
+            with gzip.open(path, "wb", compresslevel=compresslevel) as f:
+                f.writelines(_encode(session) for session in sessions)
+        self._file = gzip.open(path, "ab", compresslevel=compresslevel)
+
+    def __enter__(self) -> "SSERecorder":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def record(
+        self,
+        parser,
+        query: str,
+        conv_id: Optional[str] = None,
+        record_id: Any = None,
+        error: Optional[BaseException] = None
+    ) -> None:
+        """
+        Write the session captured by an SSEAnswerParser created with record=True.
+
+        Args:
+            parser: The parser that consumed the stream
+            query: The query asked
+            conv_id: Conversation the query was asked in
+            record_id: Id stored with the session (e.g. the query id)
+            error: Exception that ended the stream, if any
+        """
+        end_s = parser.end_at if parser.end_at is not None else time.monotonic() - parser.start
+        session = {
+            "id": record_id,
+            "query": query,
+            "conversation_id": conv_id,
+            "recorded_at": datetime.now().isoformat(timespec="seconds"),
+            "ttfb_s": _round(parser.first_byte_at),
+            "end_s": _round(end_s),
+            "error": f"{type(error).__name__}: {error}" if error else None,
+            "events": [[_round(offset), event, data] for offset, event, data in parser.events or ()],
+        }
+        line = _encode(session)
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            self.count += 1
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return round(value, 4) if value is not None else None
+
+
+def _encode(session: Dict[str, Any]) -> bytes:
+    return (json.dumps(session, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+def _is_complete(path: str) -> bool:
+    """Whether every gzip member of the file is terminated."""
+    try:
+        with gzip.open(path, "rb") as f:
+            while f.read(1 << 20):
+                pass
+    except (EOFError, zlib.error, gzip.BadGzipFile):
+        return False
+    return True
+
+
+def iter_sessions(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Yield the sessions of a recordings file, in recording order.
+
+    A file cut short by a crash yields every session flushed before it.
+    """
+    with gzip.open(path, "rb") as f:
+        try:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        except (EOFError, zlib.error, gzip.BadGzipFile, json.JSONDecodeError):
+            return
+
+
+def find_session(path: str, session_id: Optional[str] = None, index: Optional[int] = None) -> Dict[str, Any]:
+    """The last session recorded for a query id, or the index-th session (0-based)."""
+    found = None
+    for i, session in enumerate(iter_sessions(path)):
+        if index is not None and i == index:
+            return session
+        if session_id is not None and str(session.get("id")) == str(session_id):
+            found = session
+    if found is None:
+        raise KeyError(f"No session {session_id if session_id is not None else f'#{index}'} in {path}")
+    return found
+
+
+def replay_session(session: Dict[str, Any], speed: Optional[float] = None, parser=None):
+    """
+    Feed a recorded session through an SSEAnswerParser.
+
+    Args:
+        session: A session from iter_sessions
+        speed: None or 0 replays as fast as possible; otherwise lines are fed
+            at their recorded offsets divided by speed (1 = real time)
+        parser: Parser to feed (a new SSEAnswerParser by default)
+
+    Returns:
+        The parser, finished; its timings() are on the replay clock
+    """
+    from fetch_response import SSEAnswerParser
+
+    parser = parser or SSEAnswerParser()
+    parser.start = time.monotonic()
+
+    def wait(offset: Optional[float]) -> None:
+        if speed and offset is not None:
+            delay = parser.start + offset / speed - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+
+    if session.get("ttfb_s") is not None:
+        wait(session["ttfb_s"])
+        parser.feed_line("")
+    for offset, event, data in session["events"]:
+        wait(offset)
+        parser.feed_line(f"event: {event}")
+        parser.feed_line(f"data: {data}")
+        parser.feed_line("")
+    wait(session.get("end_s"))
+    parser.finish()
+    return parser
+
+
+def session_summary(session: Dict[str, Any]) -> str:
+    events = session["events"]
+    return (
+        f"[{session.get('id')}] {len(events)} events, "
+        f"ttfb {session.get('ttfb_s') or 0:.2f}s, end {session.get('end_s') or 0:.2f}s"
+        + (f", {session['error'].splitlines()[0]}" if session.get("error") else "")
+        + f"  {session.get('query', '')[:60]}"
+    )
+
+
+def show_session(session: Dict[str, Any], width: int = 100) -> None:
+    print(session_summary(session))
+    print(f"conversation {session.get('conversation_id')}, recorded {session.get('recorded_at')}")
+    for offset, event, data in session["events"]:
+        text = data if len(data) <= width else f"{data[:width]}... ({len(data)} chars)"
+        print(f"  {offset:8.3f}s  {event}  {text}")
+
+
+def bench(path: str, repeat: int = 1) -> Dict[str, Any]:
+    """Parse every recorded session `repeat` times without delays; returns throughput."""
+    from fetch_response import SSEAnswerParser
+
+    sessions = list(iter_sessions(path))
+    events = sum(len(s["events"]) for s in sessions)
+    payload = sum(len(data) for s in sessions for _, _, data in s["events"])
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for session in sessions:
+            replay_session(session, parser=SSEAnswerParser())
+    elapsed = time.perf_counter() - start
+    return {
+        "sessions": len(sessions),
+        "events": events * repeat,
+        "payload_mb": round(payload * repeat / 1e6, 2),
+        "elapsed_s": round(elapsed, 3),
+        "sessions_per_s": round(len(sessions) * repeat / elapsed, 1) if elapsed else None,
+        "events_per_s": round(events * repeat / elapsed, 1) if elapsed else None,
+        "mb_per_s": round(payload * repeat / 1e6 / elapsed, 2) if elapsed else None,
+    }
+
+
+def main():
+    from fetch_response import SSEAnswerParser
+
+    parser = argparse.ArgumentParser(description="Inspect, replay and benchmark recorded SSE sessions")
+    parser.add_argument("command", choices=["list", "show", "replay", "bench"])
+    parser.add_argument("path", help=f"Recordings file (e.g. run folder/{RECORDINGS_FILE})")
+    parser.add_argument("--id", help="show/replay: session of this query id (the last one recorded)")
+    parser.add_argument("--index", type=int, help="show/replay: session at this position (0-based)")
+    parser.add_argument("--speed", type=float, default=0,
+                        help="replay: 1 = real time, 10 = 10x faster, 0 = no delays (default: 0)")
+    parser.add_argument("--repeat", type=int, default=1, help="bench: passes over the recordings (default: 1)")
+    args = parser.parse_args()
+
+    if args.command == "list":
+        count = 0
+        for count, session in enumerate(iter_sessions(args.path), 1):
+            print(session_summary(session))
+        print(f"{count} sessions", file=sys.stderr)
+        return 0
+
+    if args.command == "bench":
+        print(json.dumps(bench(args.path, args.repeat), indent=2))
+        return 0
+
+    if args.id is None and args.index is None:
+        parser.error(f"{args.command} needs --id or --index")
+    try:
+        session = find_session(args.path, args.id, args.index)
+    except KeyError as e:
+        print(f"ERROR: {e.args[0]}", file=sys.stderr)
+        return 1
+
+    if args.command == "show":
+        show_session(session)
+        return 0
+
+    start = time.perf_counter()
+    replayed = replay_session(session, args.speed, SSEAnswerParser())
+    elapsed = time.perf_counter() - start
+    text_response, product, _, sources = replayed.result()
+    print(session_summary(session))
+    print(f"Product: {product}")
+    print(f"Sources: {len(sources)}")
+    print(f"Response: {text_response}")
+
+    recorded = recorded_timings(session)
+    if not args.speed:
+        print(f"\nReplayed without delays in {elapsed * 1000:.2f} ms. Recorded timings:")
+        for field, value in recorded.items():
+            print(f"  {field:<12} {_format(value)}")
+        return 0
+    print(f"\nTimings (recorded vs replayed at x{args.speed:g}, rescaled to real time):")
+    for field, value in replayed.timings().items():
+        if field in ("ttfb_s", "retrieval_s", "ttft_s", "stream_s") and value is not None:
+            value *= args.speed
+        elif field == "tokens_per_s" and value is not None:
+            value /= args.speed
+        print(f"  {field:<12} {_format(recorded.get(field)):>8}  {_format(value):>8}")
+    return 0
+
+
+def recorded_timings(session: Dict[str, Any]) -> Dict[str, Any]:
+    """Timing fields (see SSEAnswerParser.timings) as measured when the session was recorded."""
+    from fetch_response import SSEAnswerParser
+
+    parser = SSEAnswerParser()
+    parser.timeline = [(offset, event) for offset, event, _ in session["events"]]
+    parser.first_byte_at = session.get("ttfb_s")
+    parser.end_at = session.get("end_s")
+    return parser.timings()
+
+
+def _format(value) -> str:
+    if value is None:
+        return "-"
+    return f"{value:.3f}" if isinstance(value, float) else str(value)
+
+
+if __name__ == "__main__":
+    exit(main())
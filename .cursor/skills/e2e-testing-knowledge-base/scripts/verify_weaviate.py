@@ -0,0 +1,475 @@
+#!/usr/bin/env python3
+"""
+Verify a knowledge-base publication in Weaviate across many tenants at once.
+
+Replaces the per-tenant curl checks of references/weaviate-verification.md:
+
+- object counts of every tenant in batched GraphQL Aggregate queries (one
+  aliased sub-query per tenant, --batch-size tenants per request)
+- every chunk of every tenant read with cursor pagination (`after`), a page
+  of each tenant in a batch per request and --concurrency batches in flight
+- chunk completeness: per document (source + file), metadata.chunkNumber must
+  cover 1..totalChunks (or 0..totalChunks-1) exactly once, with one
+  totalChunks value
+- duplicate chunk_external_id values
+- orphans: content that should be gone (--absent, e.g. a deleted tenant and
+  its promotions after a cascade delete) or sources outside an expected list
+  (--expected-sources)
+
+Usage:
+    # Latest version of every project
+    python verify_weaviate.py --latest
+
+    # Phase 13: created content indexed, pre-publish delete absent
+    python verify_weaviate.py --latest --present amphora --present "promo 1" --absent "e2e delete test"
+
+    # Phase 16: tenant and its promotions removed (no orphans after the cascade delete)
+    python verify_weaviate.py --latest --absent amphora --absent promo
+
+    # Specific tenants, machine-readable output
+    python verify_weaviate.py --tenant org_1-prj_2-v3 --tenant org_1-prj_2-v4 --json
+
+Exits with status 1 when any check fails.
+
+Environment:
+    WEAVIATE_URL  Weaviate base URL when --url is not given (default: http://localhost:9000)
+
+Other scripts read Weaviate through this module too (WeaviateVerifier.pages
+streams cursor pages, weaviate_url resolves the URL), e.g. the evaluator's
+chunk_diff.py.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import sys
+import time
+from collections import Counter, defaultdict
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import httpx
+
+
+DEFAULT_URL = "http://localhost:9000"
+DEFAULT_CLASS = "Knowledge"
+DEFAULT_PAGE_SIZE = 500
+DEFAULT_BATCH_SIZE = 20
+DEFAULT_CONCURRENCY = 8
+DEFAULT_TIMEOUT = 60.0
+
+# Properties read for every chunk
+CHUNK_FIELDS = (
+    "chunk_external_id source title "
+    "metadata { chunkNumber totalChunks } "
+    "accessParams { sourceType fileName filePath } "
+    "_additional { id }"
+)
+
+# org_<orgId>-prj_<projectId>-<versionId>
+TENANT_PATTERN = re.compile(r"^(?P<project>org_.+?-prj_.+?)-(?P<version>[^-]+)$")
+
+
+def gql_string(value: str) -> str:
+    """A GraphQL string literal (JSON escaping is valid GraphQL)."""
+    return json.dumps(value, ensure_ascii=False)
+
+
+def weaviate_url(url: Optional[str] = None) -> str:
+    """The Weaviate base URL: url, else $WEAVIATE_URL, else DEFAULT_URL."""
+    return (url or os.environ.get("WEAVIATE_URL") or DEFAULT_URL).rstrip("/")
+
+
+def latest_tenants(names: List[str]) -> List[str]:
+    """The latest version tenant of each org/project (highest name, as in SKILL.md)."""
+    latest: Dict[str, str] = {}
+    for name in names:
+        match = TENANT_PATTERN.match(name)
+        project = match.group("project") if match else name
+        if project not in latest or name > latest[project]:
+            latest[project] = name
+    return sorted(latest.values())
+
+
+def latest_pair(names: List[str], prefix: str) -> Tuple[str, str]:
+    """The two latest version tenants (highest names) starting with prefix."""
+    versions = sorted(n for n in names if n.startswith(prefix))
+    if len(versions) < 2:
+        raise ValueError(f"Need two tenants starting with {prefix!r}, found {versions}")
+    return versions[-2], versions[-1]
+
+
+class WeaviateVerifier:
+    """
+    Batched, concurrent reader of a multi-tenant Weaviate class.
+
+    Args:
+        url: Weaviate base URL (default: weaviate_url())
+        class_name: Multi-tenant class holding the chunks
+        page_size: Objects per tenant per cursor page
+        batch_size: Tenants per GraphQL request
+        concurrency: GraphQL requests in flight
+        client: Optional shared httpx.AsyncClient (a private one is created
+            for each call otherwise)
+        timeout: Seconds per request
+    """
+
+    def __init__(
+        self,
+        url: Optional[str] = None,
+        class_name: str = DEFAULT_CLASS,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        client: Optional[httpx.AsyncClient] = None,
+        timeout: float = DEFAULT_TIMEOUT
+    ):
+        self.url = weaviate_url(url)
+        self.class_name = class_name
+        self.page_size = page_size
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.client = client
+        self.timeout = timeout
+        self.requests = 0
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+    async def _graphql(self, client: httpx.AsyncClient, query: str) -> Dict[str, Any]:
+        """
+        Run a GraphQL query.
+
+        Returns:
+            {"data": ..., "errors": {alias: message}}; errors without an
+            alias path abort with RuntimeError
+        """
+        async with self._semaphore:
+            self.requests += 1
+            resp = await client.post(f"{self.url}/v1/graphql", json={"query": query})
+        resp.raise_for_status()
+        payload = resp.json()
+        errors = {}
+        for error in payload.get("errors") or []:
+            path = error.get("path") or []
+            if len(path) < 2:
+                raise RuntimeError(f"GraphQL error: {error.get('message')}")
+            errors[path[1]] = error.get("message", "unknown error")
+        return {"data": payload.get("data") or {}, "errors": errors}
+
+    async def tenants(self, client: httpx.AsyncClient) -> List[str]:
+        """Names of every tenant of the class."""
+        resp = await client.get(f"{self.url}/v1/schema/{self.class_name}/tenants")
+        resp.raise_for_status()
+        return sorted(t["name"] for t in resp.json())
+
+    async def counts(self, client: httpx.AsyncClient, tenants: List[str]) -> Dict[str, Any]:
+        """Aggregate meta.count per tenant, batch_size tenants per request (errors as strings)."""
+        async def batch(names: List[str]) -> Dict[str, Any]:
+            aliases = {f"t{i}": name for i, name in enumerate(names)}
+            body = " ".join(
+                f"{alias}: {self.class_name}(tenant: {gql_string(name)}) {{ meta {{ count }} }}"
+                for alias, name in aliases.items()
+            )
+            result = await self._graphql(client, f"{{ Aggregate {{ {body} }} }}")
+            aggregate = result["data"].get("Aggregate") or {}
+            counts = {}
+            for alias, name in aliases.items():
+                if alias in result["errors"]:
+                    counts[name] = f"error: {result['errors'][alias]}"
+                else:
+                    groups = aggregate.get(alias) or [{}]
+                    counts[name] = (groups[0].get("meta") or {}).get("count", 0)
+            return counts
+
+        merged = {}
+        for counts in await asyncio.gather(*(
+            batch(tenants[i:i + self.batch_size]) for i in range(0, len(tenants), self.batch_size)
+        )):
+            merged.update(counts)
+        return merged
+
+    async def pages(
+        self,
+        client: httpx.AsyncClient,
+        tenants: List[str],
+        fields: str = CHUNK_FIELDS
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Cursor pages of a few tenants (up to batch_size), as they arrive.
+
+        Each request fetches the next page of every tenant still being read;
+        a tenant is done when a page comes back short.
+
+        Args:
+            client: httpx.AsyncClient
+            tenants: Tenant names
+            fields: GraphQL selection of each object (must include _additional { id })
+
+        Yields:
+            (tenant, list of objects), or (tenant, "error: ...") once for a
+            tenant that failed
+        """
+        cursors: Dict[str, Optional[str]] = {name: None for name in tenants}
+        while cursors:
+            aliases = {f"t{i}": name for i, name in enumerate(cursors)}
+            parts = []
+            for alias, name in aliases.items():
+                after = f", after: {gql_string(cursors[name])}" if cursors[name] else ""
+                parts.append(
+                    f"{alias}: {self.class_name}(tenant: {gql_string(name)}, "
+                    f"limit: {self.page_size}{after}) {{ {fields} }}"
+                )
+            result = await self._graphql(client, f"{{ Get {{ {' '.join(parts)} }} }}")
+            get = result["data"].get("Get") or {}
+            for alias, name in aliases.items():
+                if alias in result["errors"]:
+                    del cursors[name]
+                    yield name, f"error: {result['errors'][alias]}"
+                    continue
+                page = get.get(alias) or []
+                if len(page) < self.page_size:
+                    del cursors[name]
+                else:
+                    cursors[name] = page[-1]["_additional"]["id"]
+                yield name, page
+
+    async def chunks(self, client: httpx.AsyncClient, tenants: List[str]) -> Dict[str, Any]:
+        """
+        Every object of every tenant, read with cursor pagination (pages()
+        of batch_size tenants, concurrently).
+
+        Returns:
+            Dict of tenant -> list of objects, or an "error: ..." string
+        """
+        objects: Dict[str, Any] = {name: [] for name in tenants}
+
+        async def batch(names: List[str]) -> None:
+            async for name, page in self.pages(client, names):
+                if isinstance(page, str):
+                    objects[name] = page
+                else:
+                    objects[name].extend(page)
+
+        await asyncio.gather(*(
+            batch(tenants[i:i + self.batch_size]) for i in range(0, len(tenants), self.batch_size)
+        ))
+        return objects
+
+    async def verify(
+        self,
+        tenants: Optional[List[str]] = None,
+        latest: bool = False,
+        prefix: Optional[str] = None,
+        present: Optional[List[str]] = None,
+        absent: Optional[List[str]] = None,
+        expected_sources: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Read and check the selected tenants.
+
+        Args:
+            tenants: Tenant names (default: every tenant of the class)
+            latest: Keep only the latest version tenant of each project
+            prefix: Keep only tenants whose name starts with this
+            present: Text that must appear in some chunk's source or title
+            absent: Text that must not appear in any chunk's source or title
+            expected_sources: Sources allowed in the tenant; others are orphans
+
+        Returns:
+            {"tenants": [per-tenant report], "ok": bool, "elapsed_s", "requests"}
+        """
+        start = time.perf_counter()
+        client = self.client or httpx.AsyncClient(timeout=self.timeout)
+        try:
+            names = tenants or await self.tenants(client)
+            if prefix:
+                names = [n for n in names if n.startswith(prefix)]
+            if latest:
+                names = latest_tenants(names)
+            counts, objects = await asyncio.gather(self.counts(client, names), self.chunks(client, names))
+        finally:
+            if self.client is None:
+                await client.aclose()
+
+        reports = [
+            check_tenant(name, counts.get(name), objects.get(name), present, absent, expected_sources)
+            for name in names
+        ]
+        return {
+            "class": self.class_name,
+            "tenants": reports,
+            "ok": bool(reports) and all(r["ok"] for r in reports),
+            "elapsed_s": round(time.perf_counter() - start, 3),
+            "requests": self.requests,
+        }
+
+
+def document_key(obj: Dict[str, Any]) -> str:
+    """Chunks of one document share a source and, for files, a file path."""
+    access = obj.get("accessParams") or {}
+    file = access.get("filePath") or access.get("fileName")
+    return f"{obj.get('source')}::{file}" if file else str(obj.get("source"))
+
+
+def chunk_issues(objects: List[Dict[str, Any]]) -> List[str]:
+    """Incomplete or inconsistent chunk sequences, and duplicate chunk ids."""
+    issues = []
+    documents = defaultdict(list)
+    for obj in objects:
+        documents[document_key(obj)].append(obj.get("metadata") or {})
+
+    for key, metas in sorted(documents.items()):
+        totals = {m.get("totalChunks") for m in metas}
+        if len(totals) != 1 or None in totals:
+            issues.append(f"{key}: inconsistent totalChunks {sorted(totals, key=str)}")
+            continue
+        total = totals.pop()
+        numbers = Counter(m.get("chunkNumber") for m in metas)
+        duplicated = sorted(n for n, c in numbers.items() if c > 1 and n is not None)
+        first = 0 if 0 in numbers else 1
+        missing = sorted(set(range(first, first + total)) - set(numbers))
+        extra = sorted(n for n in numbers if n is None or not first <= n < first + total)
+        if missing:
+            issues.append(f"{key}: missing chunks {_ranges(missing)} of {total}")
+        if duplicated:
+            issues.append(f"{key}: duplicated chunkNumber {_ranges(duplicated)}")
+        if extra:
+            issues.append(f"{key}: chunkNumber out of range {extra[:10]}")
+
+    ids = Counter(obj.get("chunk_external_id") for obj in objects)
+    duplicates = [chunk_id for chunk_id, count in ids.items() if count > 1]
+    if duplicates:
+        issues.append(f"{len(duplicates)} duplicated chunk_external_id (e.g. {duplicates[0]})")
+    return issues
+
+
+def _ranges(numbers: List[int]) -> str:
+    """Compact "1-3, 7" rendering of sorted integers."""
+    parts, start = [], None
+    for i, n in enumerate(numbers):
+        if start is None:
+            start = n
+        if i + 1 == len(numbers) or numbers[i + 1] != n + 1:
+            parts.append(str(start) if start == n else f"{start}-{n}")
+            start = None
+    return ", ".join(parts)
+
+
+def check_tenant(
+    name: str,
+    count,
+    objects,
+    present: Optional[List[str]] = None,
+    absent: Optional[List[str]] = None,
+    expected_sources: Optional[List[str]] = None
+) -> Dict[str, Any]:
+    """Run every check on one tenant's objects."""
+    report = {"tenant": name, "count": count, "read": None, "documents": 0, "issues": [], "ok": False}
+    if isinstance(count, str) or isinstance(objects, str):
+        report["issues"].append(count if isinstance(count, str) else objects)
+        return report
+
+    issues = report["issues"]
+    report["read"] = len(objects)
+    report["documents"] = len({document_key(obj) for obj in objects})
+    if not objects:
+        issues.append("no objects")
+    if count != len(objects):
+        issues.append(f"Aggregate count {count} != {len(objects)} objects read")
+    issues.extend(chunk_issues(objects))
+
+    labels = [f"{obj.get('source') or ''} {obj.get('title') or ''}".casefold() for obj in objects]
+    for text in present or []:
+        if not any(text.casefold() in label for label in labels):
+            issues.append(f"missing: nothing matches {text!r}")
+    for text in absent or []:
+        found = sorted({obj.get("source") for obj, label in zip(objects, labels) if text.casefold() in label})
+        if found:
+            issues.append(f"orphans: {len(found)} sources still match {text!r} ({', '.join(map(str, found[:5]))})")
+    if expected_sources is not None:
+        sources = {obj.get("source") for obj in objects}
+        orphans = sorted(map(str, sources - set(expected_sources)))
+        missing = sorted(set(expected_sources) - sources)
+        if orphans:
+            issues.append(f"orphans: {len(orphans)} unexpected sources ({', '.join(orphans[:5])})")
+        if missing:
+            issues.append(f"missing: {len(missing)} expected sources ({', '.join(missing[:5])})")
+
+    report["ok"] = not issues
+    return report
+
+
+def load_sources(path: str) -> List[str]:
+    """Expected sources from a JSON list or a text file (one per line)."""
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    if text.lstrip().startswith("["):
+        return [str(s) for s in json.loads(text)]
+    return [line.strip() for line in text.splitlines() if line.strip()]
+
+
+def print_report(result: Dict[str, Any]) -> None:
+    print(f"{'Tenant':<50} {'Count':>8} {'Docs':>6}  Status")
+    for r in result["tenants"]:
+        count = r["count"] if isinstance(r["count"], int) else "-"
+        print(f"{r['tenant']:<50} {count:>8} {r['documents']:>6}  {'✅' if r['ok'] else '❌'}")
+        for issue in r["issues"]:
+            print(f"    - {issue}")
+    failed = sum(1 for r in result["tenants"] if not r["ok"])
+    print(f"\n{len(result['tenants'])} tenants, {failed} failed, "
+          f"{result['requests']} GraphQL requests in {result['elapsed_s']:.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verify a knowledge-base publication in Weaviate")
+    parser.add_argument("--url", help=f"Weaviate URL (default: $WEAVIATE_URL or {DEFAULT_URL})")
+    parser.add_argument("--class-name", default=DEFAULT_CLASS, help=f"Class (default: {DEFAULT_CLASS})")
+    parser.add_argument("--tenant", action="append", help="Tenant to verify (repeatable; default: all)")
+    parser.add_argument("--prefix", help="Only tenants starting with this (e.g. org_x-prj_y)")
+    parser.add_argument("--latest", action="store_true", help="Only the latest version tenant of each project")
+    parser.add_argument("--present", action="append", default=[],
+                        help="Text that must appear in a source or title (repeatable)")
+    parser.add_argument("--absent", action="append", default=[],
+                        help="Text that must not appear in any source or title (repeatable)")
+    parser.add_argument("--expected-sources", help="JSON list or text file of the sources a tenant should hold")
+    parser.add_argument("--page-size", type=int, default=DEFAULT_PAGE_SIZE,
+                        help=f"Objects per tenant per page (default: {DEFAULT_PAGE_SIZE})")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                        help=f"Tenants per GraphQL request (default: {DEFAULT_BATCH_SIZE})")
+    parser.add_argument("--concurrency", "-c", type=int, default=DEFAULT_CONCURRENCY,
+                        help=f"GraphQL requests in flight (default: {DEFAULT_CONCURRENCY})")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT,
+                        help=f"Seconds per request (default: {DEFAULT_TIMEOUT:.0f})")
+    parser.add_argument("--json", action="store_true", help="Print the full result as JSON")
+    args = parser.parse_args()
+
+    async def run():
+        verifier = WeaviateVerifier(
+            args.url, args.class_name, args.page_size, args.batch_size, args.concurrency, timeout=args.timeout
+        )
+        return await verifier.verify(
+            tenants=args.tenant,
+            latest=args.latest,
+            prefix=args.prefix,
+            present=args.present,
+            absent=args.absent,
+            expected_sources=load_sources(args.expected_sources) if args.expected_sources else None,
+        )
+
+    try:
+        result = asyncio.run(run())
+    except (httpx.HTTPError, RuntimeError) as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        return 1
+
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+    else:
+        print_report(result)
+    if not result["tenants"]:
+        print("No tenants matched", file=sys.stderr)
+    return 0 if result["ok"] else 1
+
+
+if __name__ == "__main__":
+    exit(main())